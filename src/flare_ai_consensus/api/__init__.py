@@ -1,3 +1,17 @@
+from .job_queue import Job, JobQueue, JobStatus, QueueFullError
+from .routes.batch import BatchRequest, BatchRouter
 from .routes.chat import ChatMessage, ChatRouter, router
+from .routes.jobs import JobsRouter
 
-__all__ = ["ChatMessage", "ChatRouter", "router"]
+__all__ = [
+    "BatchRequest",
+    "BatchRouter",
+    "ChatMessage",
+    "ChatRouter",
+    "Job",
+    "JobQueue",
+    "JobStatus",
+    "JobsRouter",
+    "QueueFullError",
+    "router",
+]
@@ -0,0 +1,222 @@
+"""
+Bounded job queue for running consensus requests in the background.
+
+A fixed pool of asyncio workers drains a bounded FIFO queue. Each submitted
+job gets an ID that can be polled for its status and result; finished jobs
+are kept for a configurable time before being evicted.
+
+Classes:
+    JobStatus: Lifecycle states of a job
+    QueueFullError: Raised when a job is submitted to a full queue
+    Job: A single queued unit of work and its outcome
+    JobQueue: The bounded queue and its worker pool
+"""
+
+import asyncio
+import math
+import time
+import uuid
+from collections import deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from enum import StrEnum
+from typing import Any
+
+import structlog
+
+from flare_ai_consensus.telemetry import API_QUEUE_DEPTH
+
+logger = structlog.get_logger(__name__)
+
+type JobHandler = Callable[[Any], Awaitable[dict[str, Any]]]
+
+
+class JobStatus(StrEnum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class QueueFullError(Exception):
+    """
+    Raised when a job is submitted to a full queue.
+
+    Attributes:
+        queue_position: Position the job would have taken in the queue
+        retry_after: Estimated seconds until a slot frees up
+    """
+
+    def __init__(self, queue_position: int, retry_after: int) -> None:
+        super().__init__(f"Job queue is full ({queue_position - 1} jobs waiting)")
+        self.queue_position = queue_position
+        self.retry_after = retry_after
+
+
+@dataclass
+class Job:
+    """
+    A single queued unit of work and its outcome.
+
+    Attributes:
+        job_id: Unique identifier returned to the client
+        payload: Input passed to the queue's handler
+        seq: Submission sequence number, used to derive the queue position
+        status: Current lifecycle state
+        result: Handler output once the job has succeeded
+        error: Error message once the job has failed
+    """
+
+    job_id: str
+    payload: Any
+    seq: int
+    status: JobStatus = JobStatus.QUEUED
+    result: dict[str, Any] | None = None
+    error: str | None = None
+    created_at: float = field(default_factory=time.monotonic)
+    started_at: float | None = None
+    finished_at: float | None = None
+
+
+class JobQueue:
+    """
+    Bounded FIFO queue drained by a fixed-size pool of async workers.
+
+    Args:
+        handler: Coroutine function called with each job's payload
+        workers: Number of concurrent workers
+        max_size: Maximum number of jobs waiting in the queue
+        result_ttl: Seconds a finished job is kept before eviction
+    """
+
+    def __init__(
+        self,
+        handler: JobHandler,
+        workers: int = 4,
+        max_size: int = 64,
+        result_ttl: float = 600.0,
+    ) -> None:
+        self.handler = handler
+        self.num_workers = workers
+        self.max_size = max_size
+        self.result_ttl = result_ttl
+        self._queue: asyncio.Queue[Job] = asyncio.Queue(maxsize=max_size)
+        self._jobs: dict[str, Job] = {}
+        self._finished: deque[Job] = deque()
+        self._workers: list[asyncio.Task[None]] = []
+        self._submitted = 0
+        self._dequeued = 0
+        self._avg_duration: float | None = None
+        self.logger = logger.bind(router="job_queue")
+
+    @property
+    def depth(self) -> int:
+        """Number of jobs waiting to be picked up by a worker."""
+        return self._queue.qsize()
+
+    async def start(self) -> None:
+        """Spawn the worker tasks."""
+        if self._workers:
+            return
+        self._workers = [
+            asyncio.create_task(self._worker(i), name=f"job-worker-{i}")
+            for i in range(self.num_workers)
+        ]
+        self.logger.info("job workers started", workers=self.num_workers)
+
+    async def stop(self) -> None:
+        """Cancel the worker tasks and wait for them to exit."""
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self.logger.info("job workers stopped")
+
+    def submit(self, payload: Any) -> Job:
+        """
+        Enqueue a new job.
+
+        :param payload: Input passed to the handler.
+        :return: The queued Job.
+        :raises QueueFullError: If the queue has no free slot.
+        """
+        self._evict_expired()
+        job = Job(job_id=uuid.uuid4().hex, payload=payload, seq=self._submitted)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull as e:
+            position = self.depth + 1
+            raise QueueFullError(position, self.estimated_wait(position)) from e
+        self._submitted += 1
+        self._jobs[job.job_id] = job
+        API_QUEUE_DEPTH.set(self.depth, queue="jobs")
+        self.logger.debug("job queued", job_id=job.job_id, depth=self.depth)
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        """Return a job by ID, or None if it is unknown or has expired."""
+        self._evict_expired()
+        return self._jobs.get(job_id)
+
+    def position(self, job: Job) -> int | None:
+        """Return the 1-based queue position of a waiting job, else None."""
+        if job.status != JobStatus.QUEUED:
+            return None
+        return job.seq - self._dequeued + 1
+
+    def estimated_wait(self, position: int) -> int:
+        """
+        Estimate the seconds until a job at the given position starts running.
+
+        Uses a moving average of recent job durations; falls back to one second
+        before any job has finished.
+        """
+        avg = self._avg_duration or 1.0
+        return max(1, math.ceil(avg * math.ceil(position / self.num_workers)))
+
+    async def _worker(self, idx: int) -> None:
+        """Pull jobs off the queue and run them until cancelled."""
+        while True:
+            job = await self._queue.get()
+            self._dequeued += 1
+            API_QUEUE_DEPTH.set(self.depth, queue="jobs")
+            job.status = JobStatus.RUNNING
+            job.started_at = time.monotonic()
+            self.logger.debug("job started", job_id=job.job_id, worker=idx)
+            try:
+                job.result = await self.handler(job.payload)
+            except asyncio.CancelledError:
+                job.status = JobStatus.FAILED
+                job.error = "cancelled"
+                raise
+            except Exception as e:
+                self.logger.exception("job failed", job_id=job.job_id, error=str(e))
+                job.status = JobStatus.FAILED
+                job.error = str(e)
+            else:
+                job.status = JobStatus.SUCCEEDED
+            finally:
+                self._finish(job)
+                self._queue.task_done()
+
+    def _finish(self, job: Job) -> None:
+        """Record a finished job for eviction and update the duration average."""
+        job.finished_at = time.monotonic()
+        self._finished.append(job)
+        if job.started_at is not None:
+            duration = job.finished_at - job.started_at
+            self._avg_duration = (
+                duration
+                if self._avg_duration is None
+                else 0.8 * self._avg_duration + 0.2 * duration
+            )
+
+    def _evict_expired(self) -> None:
+        """Drop finished jobs whose results have outlived the TTL."""
+        cutoff = time.monotonic() - self.result_ttl
+        while self._finished:
+            job = self._finished[0]
+            if job.finished_at is None or job.finished_at > cutoff:
+                break
+            self._finished.popleft()
+            self._jobs.pop(job.job_id, None)
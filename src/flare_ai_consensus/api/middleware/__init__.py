@@ -0,0 +1,4 @@
+from .admission import AdmissionController, AdmissionMiddleware
+from .metrics import MetricsMiddleware
+
+__all__ = ["AdmissionController", "AdmissionMiddleware", "MetricsMiddleware"]
@@ -0,0 +1,208 @@
+"""
+Admission control and load shedding for consensus endpoints.
+
+Caps the number of consensus runs executing at once and queues the rest. A
+request that would have to queue is rejected up front with 503 and a
+Retry-After hint when its estimated completion time, derived from recent run
+latencies, exceeds the request's deadline. Shedding load early keeps tail
+latency bounded under overload instead of letting every request time out.
+
+Endpoints with very different run times (e.g. chat and NDJSON batches) get
+separate middleware instances, so long runs neither take the slots of short
+ones nor inflate their latency estimate.
+
+Classes:
+    AdmissionController: Concurrency cap and latency-based wait estimator
+    AdmissionMiddleware: ASGI middleware applying the controller to requests
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+from collections.abc import Iterable
+from statistics import fmean
+
+import structlog
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from flare_ai_consensus.telemetry import API_QUEUE_DEPTH
+
+logger = structlog.get_logger(__name__)
+
+DEADLINE_HEADER = "x-request-deadline"
+
+
+class AdmissionController:
+    """
+    Concurrency cap with a latency-based queue wait estimator.
+
+    Args:
+        max_concurrent: Maximum number of runs executing at once
+        latency_window: Number of recent run latencies kept for estimation
+        initial_latency: Latency assumed before any run has completed
+        name: Label of the queue depth metric
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = 8,
+        latency_window: int = 100,
+        initial_latency: float = 10.0,
+        name: str = "admission",
+    ) -> None:
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.initial_latency = initial_latency
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._latencies: deque[float] = deque(maxlen=latency_window)
+        self.in_flight = 0
+        self.waiting = 0
+
+    @property
+    def typical_latency(self) -> float:
+        """Mean latency of recent runs in seconds."""
+        if not self._latencies:
+            return self.initial_latency
+        return fmean(self._latencies)
+
+    def estimated_wait(self) -> float:
+        """
+        Estimate how long a new request would queue before it starts running.
+
+        Each batch of max_concurrent requests ahead in the queue is assumed to
+        take one typical run to drain.
+        """
+        if self.in_flight + self.waiting < self.max_concurrent:
+            return 0.0
+        batches_ahead = math.ceil((self.waiting + 1) / self.max_concurrent)
+        return batches_ahead * self.typical_latency
+
+    async def acquire(self, max_wait: float) -> bool:
+        """
+        Wait for a free run slot.
+
+        :param max_wait: Maximum number of seconds to wait.
+        :return: True if a slot was acquired, False on timeout.
+        """
+        if not self._semaphore.locked():
+            await self._semaphore.acquire()
+            self.in_flight += 1
+            return True
+
+        self.waiting += 1
+        API_QUEUE_DEPTH.set(self.waiting, queue=self.name)
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=max_wait)
+        except TimeoutError:
+            return False
+        finally:
+            self.waiting -= 1
+            API_QUEUE_DEPTH.set(self.waiting, queue=self.name)
+        self.in_flight += 1
+        return True
+
+    def release(self, latency: float) -> None:
+        """Free a run slot and record the run's latency."""
+        self.in_flight -= 1
+        self._latencies.append(latency)
+        self._semaphore.release()
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware that admits, queues or sheds consensus requests.
+
+    Only paths starting with one of the guarded prefixes are subject to
+    admission control; exempt paths (e.g. health checks) always pass through.
+    Clients may shorten or extend the default deadline with an
+    `X-Request-Deadline` header given in seconds.
+
+    Args:
+        app: The wrapped ASGI application
+        max_concurrent: Maximum number of guarded requests executing at once
+        default_deadline: Deadline in seconds when the client sends none
+        guarded_prefixes: Path prefixes subject to admission control
+        exempt_paths: Paths that always bypass admission control
+        name: Name used in logs and the queue depth metric
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        app: ASGIApp,
+        max_concurrent: int = 8,
+        default_deadline: float = 60.0,
+        guarded_prefixes: Iterable[str] = ("/api/routes/chat",),
+        exempt_paths: Iterable[str] = ("/health",),
+        *,
+        name: str = "admission",
+    ) -> None:
+        self.app = app
+        self.default_deadline = default_deadline
+        self.guarded_prefixes = tuple(guarded_prefixes)
+        self.exempt_paths = frozenset(exempt_paths)
+        self.controller = AdmissionController(max_concurrent=max_concurrent, name=name)
+        self.logger = logger.bind(router=name)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self._is_guarded(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        deadline = self._deadline(scope)
+        controller = self.controller
+        estimated_wait = controller.estimated_wait()
+        if estimated_wait and estimated_wait + controller.typical_latency > deadline:
+            self.logger.warning(
+                "request shed",
+                path=scope["path"],
+                estimated_wait=estimated_wait,
+                deadline=deadline,
+                in_flight=controller.in_flight,
+                waiting=controller.waiting,
+            )
+            await self._reject(scope, receive, send, estimated_wait)
+            return
+
+        queue_budget = max(0.0, deadline - controller.typical_latency)
+        if not await controller.acquire(max_wait=queue_budget):
+            self.logger.warning("queue wait exceeded deadline", path=scope["path"])
+            await self._reject(scope, receive, send, controller.estimated_wait())
+            return
+
+        start = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            controller.release(time.monotonic() - start)
+
+    def _is_guarded(self, path: str) -> bool:
+        """Return whether a request path is subject to admission control."""
+        if path in self.exempt_paths:
+            return False
+        return path.startswith(self.guarded_prefixes)
+
+    def _deadline(self, scope: Scope) -> float:
+        """Read the request deadline in seconds, falling back to the default."""
+        value = Headers(scope=scope).get(DEADLINE_HEADER)
+        if value is None:
+            return self.default_deadline
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            return self.default_deadline
+
+    @staticmethod
+    async def _reject(
+        scope: Scope, receive: Receive, send: Send, retry_after: float
+    ) -> None:
+        """Answer with 503 and a Retry-After hint."""
+        retry_after_s = max(1, math.ceil(retry_after))
+        response = JSONResponse(
+            {"detail": "Server overloaded, retry later", "retry_after": retry_after_s},
+            status_code=503,
+            headers={"Retry-After": str(retry_after_s)},
+        )
+        await response(scope, receive, send)
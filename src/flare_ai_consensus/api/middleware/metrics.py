@@ -0,0 +1,28 @@
+from collections.abc import Iterable
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from flare_ai_consensus.telemetry import API_REQUESTS_IN_FLIGHT
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware that tracks the number of HTTP requests in flight.
+
+    Args:
+        app: The wrapped ASGI application
+        exclude_paths: Paths that are not tracked (e.g. the metrics endpoint)
+    """
+
+    def __init__(
+        self, app: ASGIApp, exclude_paths: Iterable[str] = ("/metrics",)
+    ) -> None:
+        self.app = app
+        self.exclude_paths = frozenset(exclude_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+        with API_REQUESTS_IN_FLIGHT.track_in_progress():
+            await self.app(scope, receive, send)
@@ -0,0 +1,80 @@
+import json
+from collections.abc import AsyncIterator
+from dataclasses import asdict
+
+import structlog
+from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+
+from flare_ai_consensus.api.routes.chat import ChatMessage
+from flare_ai_consensus.consensus import BatchEngine
+from flare_ai_consensus.settings import Message, settings
+
+logger = structlog.get_logger(__name__)
+
+
+class BatchRequest(BaseModel):
+    """
+    Pydantic model for batch chat validation.
+
+    Attributes:
+        messages (list[ChatMessage]): The chat messages to run, between one and
+            BATCH_MAX_SIZE
+    """
+
+    messages: list[ChatMessage] = Field(
+        ..., min_length=1, max_length=settings.batch_max_size
+    )
+
+
+class BatchRouter:
+    """
+    A router that runs many chat messages per request through the CL pipeline.
+    """
+
+    def __init__(self, router: APIRouter, engine: BatchEngine) -> None:
+        """
+        Initialize the BatchRouter.
+
+        Args:
+            router (APIRouter): FastAPI router to attach endpoints.
+            engine: batch engine shared by all batch requests.
+        """
+        self._router = router
+        self.engine = engine
+        self.logger = logger.bind(router="batch")
+        self._setup_routes()
+
+    def _setup_routes(self) -> None:
+        """
+        Set up FastAPI routes for the batch endpoint.
+        """
+
+        @self._router.post("/")
+        async def batch(request: BatchRequest) -> StreamingResponse:
+            """
+            Run a batch of chat messages through the CL pipeline.
+            Streams one NDJSON line per message in completion order.
+            """
+            self.logger.info("Received batch", size=len(request.messages))
+            conversations: list[list[Message]] = [
+                [
+                    {"role": "system", "content": message.system_message},
+                    {"role": "user", "content": message.user_message},
+                ]
+                for message in request.messages
+            ]
+            return StreamingResponse(
+                self._stream(conversations), media_type="application/x-ndjson"
+            )
+
+    async def _stream(self, conversations: list[list[Message]]) -> AsyncIterator[str]:
+        """Serialize batch results as NDJSON lines."""
+        async for result in self.engine.run(conversations):
+            yield json.dumps(asdict(result)) + "\n"
+
+    @property
+    def router(self) -> APIRouter:
+        """Return the underlying FastAPI router with registered endpoints."""
+        return self._router
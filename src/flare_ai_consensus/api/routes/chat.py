@@ -1,12 +1,13 @@
+import json
+
 import structlog
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field
-import json
 
-from flare_ai_consensus.consensus import run_consensus
+from flare_ai_consensus.consensus import RunHooks, run_consensus
+from flare_ai_consensus.embeddings import EmbeddingModel
 from flare_ai_consensus.router import AsyncOpenRouterProvider
 from flare_ai_consensus.settings import ConsensusConfig, Message
-from flare_ai_consensus.embeddings import EmbeddingModel
 
 logger = structlog.get_logger(__name__)
 router = APIRouter()
@@ -35,6 +36,8 @@ class ChatRouter:
         provider: AsyncOpenRouterProvider,
         embedding_model: EmbeddingModel,
         consensus_config: ConsensusConfig | None = None,
+        *,
+        hooks: RunHooks | None = None,
     ) -> None:
         """
         Initialize the ChatRouter.
@@ -42,11 +45,14 @@ class ChatRouter:
         Args:
             router (APIRouter): FastAPI router to attach endpoints.
             provider: instance of an async OpenRouter client.
+            embedding_model: embeds responses for aggregation and scoring.
             consensus_config: config for running the consensus algorithm.
+            hooks: optional pruning, semantic cache and transcript store.
         """
         self._router = router
         self.provider = provider
-        self.embedding_model=embedding_model
+        self.embedding_model = embedding_model
+        self.hooks = hooks or RunHooks()
         if consensus_config:
             self.consensus_config = consensus_config
         self.logger = logger.bind(router="chat")
@@ -64,27 +70,59 @@ class ChatRouter:
             Returns an aggregated response after a number of iterations.
             """
             try:
-                self.logger.debug("Received chat message", message=message.user_message)
-                # Build initial conversation
-                initial_conversation: list[Message] = [
-                    {"role": "system", "content": message.system_message},
-                    {"role": "user", "content": message.user_message},
-                ]
-
-                # Run consensus algorithm
-                answer, shapley_values = await run_consensus(
-                    self.provider,
-                    self.consensus_config,
-                    initial_conversation,
-                    self.embedding_model
-                )
-
+                return await self.process(message)
             except Exception as e:
                 self.logger.exception("Chat processing failed", error=str(e))
                 raise HTTPException(status_code=500, detail=str(e)) from e
-            else:
-                self.logger.info("Response generated", answer=answer)
-                return {"response": answer, "shapley_values": json.dumps(shapley_values)}
+
+    async def process(self, message: ChatMessage) -> dict[str, str]:
+        """
+        Run a chat message through the CL pipeline.
+
+        Shared by the synchronous chat endpoint and the background job workers.
+        With a semantic cache, the answer to a sufficiently similar earlier
+        request is returned instead, with path "cache".
+
+        Args:
+            message (ChatMessage): The validated chat message.
+
+        Returns:
+            dict[str, str]: The aggregated response, the execution path
+                ("cache", "cascade" or "consensus"), plus the models' Shapley
+                contributions and the run's token usage and cost, JSON-encoded.
+        """
+        self.logger.debug("Received chat message", message=message.user_message)
+        semantic_cache = self.hooks.semantic_cache
+        if semantic_cache is not None:
+            cached = await semantic_cache.lookup(
+                message.system_message, message.user_message
+            )
+            if cached is not None:
+                return {**cached, "path": "cache", "usage": json.dumps({})}
+
+        # Build initial conversation
+        initial_conversation: list[Message] = [
+            {"role": "system", "content": message.system_message},
+            {"role": "user", "content": message.user_message},
+        ]
+
+        # Run consensus algorithm
+        result = await run_consensus(
+            self.provider,
+            self.consensus_config,
+            initial_conversation,
+            self.embedding_model,
+            self.hooks.pruning,
+        )
+        self.logger.info("Response generated", answer=result.response)
+        if self.hooks.transcripts is not None:
+            self.hooks.transcripts.append(result.transcript())
+        answer = result.answer()
+        if semantic_cache is not None:
+            await semantic_cache.store(
+                message.system_message, message.user_message, answer
+            )
+        return answer
 
     @property
     def router(self) -> APIRouter:
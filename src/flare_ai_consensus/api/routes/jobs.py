@@ -0,0 +1,86 @@
+from typing import Any
+
+import structlog
+from fastapi import APIRouter, HTTPException
+
+from flare_ai_consensus.api.job_queue import Job, JobQueue, QueueFullError
+from flare_ai_consensus.api.routes.chat import ChatMessage
+
+logger = structlog.get_logger(__name__)
+
+
+class JobsRouter:
+    """
+    A router that runs chat messages as background jobs.
+
+    Clients submit a message and poll for its result instead of holding an
+    HTTP connection open for the whole consensus run.
+    """
+
+    def __init__(self, router: APIRouter, job_queue: JobQueue) -> None:
+        """
+        Initialize the JobsRouter.
+
+        Args:
+            router (APIRouter): FastAPI router to attach endpoints.
+            job_queue: bounded queue whose workers run the CL pipeline.
+        """
+        self._router = router
+        self.job_queue = job_queue
+        self.logger = logger.bind(router="jobs")
+        self._setup_routes()
+
+    def _setup_routes(self) -> None:
+        """
+        Set up FastAPI routes for submitting and polling jobs.
+        """
+
+        @self._router.post("/", status_code=202)
+        async def submit_job(message: ChatMessage) -> dict[str, Any]:
+            """
+            Enqueue a chat message and return the job ID.
+            Responds with 429 and a queue-position hint when the queue is full.
+            """
+            try:
+                job = self.job_queue.submit(message)
+            except QueueFullError as e:
+                self.logger.warning("Job queue full", queue_position=e.queue_position)
+                raise HTTPException(
+                    status_code=429,
+                    detail={
+                        "message": str(e),
+                        "queue_position": e.queue_position,
+                        "retry_after": e.retry_after,
+                    },
+                    headers={"Retry-After": str(e.retry_after)},
+                ) from e
+            self.logger.info("Job submitted", job_id=job.job_id)
+            return self._describe(job)
+
+        @self._router.get("/{job_id}")
+        async def get_job(job_id: str) -> dict[str, Any]:
+            """
+            Return the status of a job, and its result once finished.
+            """
+            job = self.job_queue.get(job_id)
+            if job is None:
+                raise HTTPException(status_code=404, detail="Job not found")
+            return self._describe(job)
+
+    def _describe(self, job: Job) -> dict[str, Any]:
+        """Build the public representation of a job."""
+        description: dict[str, Any] = {"job_id": job.job_id, "status": job.status}
+        position = self.job_queue.position(job)
+        if position is not None:
+            description["queue_position"] = position
+            description["estimated_wait"] = self.job_queue.estimated_wait(position)
+        if job.result is not None:
+            description["result"] = job.result
+        if job.error is not None:
+            description["error"] = job.error
+        return description
+
+    @property
+    def router(self) -> APIRouter:
+        """Return the underlying FastAPI router with registered endpoints."""
+        return self._router
@@ -1,4 +1,16 @@
+from .async_validation import AsyncVtpmValidation, ValidationResult
+from .batch_attestor import (
+    BatchAttestation,
+    BatchAttestor,
+    MerkleTree,
+    ProofStep,
+    result_digest,
+)
+from .cert_cache import CertificateCache
+from .claims_cache import ClaimsCache, ClaimsCacheStats
+from .document_cache import CachedDocument, DocumentCache, get_shared_cache
 from .vtpm_attestation import (
+    UnixHTTPConnection,
     Vtpm,
     VtpmAttestationError,
 )
@@ -11,11 +23,25 @@ from .vtpm_validation import (
 )
 
 __all__ = [
+    "AsyncVtpmValidation",
+    "BatchAttestation",
+    "BatchAttestor",
+    "CachedDocument",
+    "CertificateCache",
     "CertificateParsingError",
+    "ClaimsCache",
+    "ClaimsCacheStats",
+    "DocumentCache",
     "InvalidCertificateChainError",
+    "MerkleTree",
+    "ProofStep",
     "SignatureValidationError",
+    "UnixHTTPConnection",
+    "ValidationResult",
     "Vtpm",
     "VtpmAttestationError",
     "VtpmValidation",
     "VtpmValidationError",
+    "get_shared_cache",
+    "result_digest",
 ]
@@ -0,0 +1,307 @@
+"""
+Asynchronous and batched validation of Confidential Space vTPM tokens.
+
+`VtpmValidation` is synchronous: it fetches issuer documents with blocking
+`requests` calls and verifies signatures and certificate chains on the calling
+thread. Calling it from the FastAPI event loop would stall every other request.
+`AsyncVtpmValidation` wraps it so that:
+
+- issuer documents (OIDC configuration, JWKS, root certificate) are fetched
+  with an `httpx.AsyncClient` and fed into the validator's document cache, so
+  the validator itself never blocks on the network;
+- the CPU-heavy validation runs in an executor, by default a thread pool;
+  with `use_processes=True` it runs in a process pool instead, which scales
+  across cores because PyJWT's token parsing holds the GIL;
+- cached outcomes are answered on the event loop without any executor hop.
+
+`validate_many` validates a burst of tokens: duplicate tokens are validated
+once, and the documents needed by the whole batch are fetched once up front,
+including at most one forced JWKS refetch for key IDs the cache does not know.
+
+Classes:
+    ValidationResult: Outcome of validating one token in a batch
+    AsyncVtpmValidation: Async facade over VtpmValidation
+"""
+
+import asyncio
+import os
+from collections.abc import Sequence
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any
+
+import httpx
+import jwt
+import structlog
+
+from .document_cache import CachedDocument
+from .vtpm_validation import (
+    VtpmValidation,
+    VtpmValidationError,
+    get_unverified_header,
+)
+
+logger = structlog.get_logger(__name__)
+
+type Outcome = dict[str, Any] | Exception
+
+
+@dataclass
+class ValidationResult:
+    """
+    Outcome of validating one token in a batch.
+
+    Attributes:
+        index: Position of the token in the submitted batch
+        claims: The validated token claims, if validation succeeded
+        error: The validation error, if validation failed
+    """
+
+    index: int
+    claims: dict[str, Any] | None = None
+    error: Exception | None = None
+
+    @property
+    def ok(self) -> bool:
+        """Whether the token is valid."""
+        return self.error is None
+
+
+_worker_validator: VtpmValidation | None = None
+
+
+def _init_worker(
+    expected_issuer: str, oidc_endpoint: str, pki_endpoint: str, root_fingerprint: str
+) -> None:
+    """Create the validator used by a process pool worker."""
+    global _worker_validator  # noqa: PLW0603
+    _worker_validator = VtpmValidation(
+        expected_issuer=expected_issuer,
+        oidc_endpoint=oidc_endpoint,
+        pki_endpoint=pki_endpoint,
+        root_fingerprint=root_fingerprint,
+    )
+
+
+def _validate_in_worker(token: str) -> dict[str, Any]:
+    """Validate a token with the process pool worker's validator."""
+    if _worker_validator is None:
+        msg = "Worker validator is not initialized"
+        raise RuntimeError(msg)
+    return _worker_validator.validate_token_uncached(token)
+
+
+class AsyncVtpmValidation:
+    """
+    Async facade over `VtpmValidation` with batched validation.
+
+    Args:
+        validator: The synchronous validator whose configuration and caches
+            are used (default: a new VtpmValidation)
+        max_workers: Size of the executor (default: number of CPUs)
+        use_processes: Validate in a process pool instead of a thread pool.
+            Each worker process then keeps its own document and certificate
+            caches and fetches documents itself, off the event loop.
+        timeout: Timeout in seconds for document fetches
+
+    Usage:
+        validator = AsyncVtpmValidation()
+        claims = await validator.validate_token(token)
+        results = await validator.validate_many(tokens)
+        await validator.aclose()
+    """
+
+    def __init__(
+        self,
+        validator: VtpmValidation | None = None,
+        *,
+        max_workers: int | None = None,
+        use_processes: bool = False,
+        timeout: float = 10.0,
+    ) -> None:
+        self.validator = validator or VtpmValidation()
+        self.use_processes = use_processes
+        max_workers = max_workers or os.cpu_count() or 1
+        if use_processes:
+            self._executor: Executor = ProcessPoolExecutor(
+                max_workers=max_workers,
+                initializer=_init_worker,
+                initargs=(
+                    self.validator.expected_issuer,
+                    self.validator.oidc_endpoint,
+                    self.validator.pki_endpoint,
+                    self.validator.root_fingerprint,
+                ),
+            )
+        else:
+            self._executor = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="vtpm-validation"
+            )
+        self._client = httpx.AsyncClient(timeout=timeout)
+        self._fetches: dict[tuple[str, bool], asyncio.Task[CachedDocument]] = {}
+        self.logger = logger.bind(router="async_vtpm_validation")
+
+    async def validate_token(self, token: str) -> dict[str, Any]:
+        """
+        Validate a vTPM token without blocking the event loop.
+
+        Args:
+            token: The JWT token string to validate
+
+        Returns:
+            dict: The validated token claims
+
+        Raises:
+            VtpmValidationError: If token validation fails for any reason
+        """
+        results = await self.validate_many([token])
+        if results[0].error is not None:
+            raise results[0].error
+        return results[0].claims or {}
+
+    async def validate_many(self, tokens: Sequence[str]) -> list[ValidationResult]:
+        """
+        Validate a batch of tokens concurrently.
+
+        Failures are reported per token and do not abort the batch.
+
+        Args:
+            tokens: JWT token strings, possibly with duplicates
+
+        Returns:
+            list[ValidationResult]: One result per token, in input order
+        """
+        outcomes, pending = self._lookup_cached(tokens)
+        if pending:
+            outcomes |= await self._validate_pending(pending)
+
+        results = []
+        for index, token in enumerate(tokens):
+            outcome = outcomes[token]
+            if isinstance(outcome, Exception):
+                results.append(ValidationResult(index=index, error=outcome))
+            else:
+                results.append(ValidationResult(index=index, claims=dict(outcome)))
+        return results
+
+    def _lookup_cached(
+        self, tokens: Sequence[str]
+    ) -> tuple[dict[str, Outcome], dict[str, bytes]]:
+        """
+        Split distinct tokens into cached outcomes and tokens still to validate.
+
+        Returns:
+            tuple: Cached outcomes by token, and claims cache keys by pending token
+        """
+        claims_cache = self.validator.claims_cache
+        outcomes: dict[str, Outcome] = {}
+        pending: dict[str, bytes] = {}
+        for token in dict.fromkeys(tokens):
+            key = claims_cache.key(token)
+            try:
+                claims = claims_cache.get(key)
+            except Exception as e:  # noqa: BLE001
+                outcomes[token] = e
+                continue
+            if claims is None:
+                pending[token] = key
+            else:
+                outcomes[token] = claims
+        return outcomes, pending
+
+    async def _validate_pending(self, pending: dict[str, bytes]) -> dict[str, Outcome]:
+        """Validate distinct uncached tokens concurrently and cache the outcomes."""
+        if not self.use_processes:
+            await self._prefetch_documents(list(pending))
+        validated = await asyncio.gather(
+            *(self._validate_uncached(token) for token in pending),
+            return_exceptions=True,
+        )
+        claims_cache = self.validator.claims_cache
+        outcomes: dict[str, Outcome] = {}
+        for (token, key), outcome in zip(pending.items(), validated, strict=True):
+            if isinstance(outcome, VtpmValidationError | jwt.InvalidTokenError):
+                claims_cache.put_error(key, outcome)
+            elif isinstance(outcome, dict):
+                claims_cache.put(key, outcome)
+            elif not isinstance(outcome, Exception):
+                raise outcome
+            outcomes[token] = outcome
+        return outcomes
+
+    async def aclose(self) -> None:
+        """Close the HTTP client and shut down the executor."""
+        await self._client.aclose()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _validate_uncached(self, token: str) -> dict[str, Any]:
+        """Run the full validation of a token in the executor."""
+        loop = asyncio.get_running_loop()
+        if self.use_processes:
+            return await loop.run_in_executor(
+                self._executor, _validate_in_worker, token
+            )
+        return await loop.run_in_executor(
+            self._executor, self.validator.validate_token_uncached, token
+        )
+
+    async def _prefetch_documents(self, tokens: Sequence[str]) -> None:
+        """
+        Fetch the issuer documents a batch of tokens needs into the cache.
+
+        Failures are only logged: validation then falls back to fetching the
+        documents itself and reports the error per token.
+        """
+        headers = []
+        for token in tokens:
+            try:
+                headers.append(get_unverified_header(token))
+            except jwt.DecodeError:
+                continue
+
+        issuer = self.validator.expected_issuer
+        kids = {h.get("kid") for h in headers if not h.get("x5c")}
+        try:
+            if any(h.get("x5c") for h in headers):
+                await self._fetch_document(issuer + self.validator.pki_endpoint)
+            if kids:
+                config = await self._fetch_document(
+                    issuer + self.validator.oidc_endpoint
+                )
+                jwks_uri = config.json["jwks_uri"]
+                jwks = await self._fetch_document(jwks_uri)
+                known_kids = {key.get("kid") for key in jwks.json["keys"]}
+                if kids - known_kids:
+                    self.logger.info("kid_unknown", kids=sorted(map(str, kids)))
+                    await self._fetch_document(jwks_uri, force_refresh=True)
+        except Exception as e:  # noqa: BLE001
+            self.logger.warning("document_prefetch_failed", error=str(e))
+
+    async def _fetch_document(
+        self, url: str, *, force_refresh: bool = False
+    ) -> CachedDocument:
+        """
+        Return a document from the cache, fetching it asynchronously if needed.
+
+        Concurrent requests for the same URL share one fetch.
+        """
+        cache = self.validator.document_cache
+        entry = cache.peek(url, force_refresh=force_refresh)
+        if entry is not None:
+            return entry
+
+        key = (url, force_refresh)
+        task = self._fetches.get(key)
+        if task is None:
+            task = asyncio.create_task(self._request(url))
+            self._fetches[key] = task
+            task.add_done_callback(lambda _: self._fetches.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _request(self, url: str) -> CachedDocument:
+        """Send a (conditional) GET and store the response in the cache."""
+        cache = self.validator.document_cache
+        response = await self._client.get(url, headers=cache.conditional_headers(url))
+        return cache.store(
+            url, response.status_code, response.headers, response.content
+        )
@@ -0,0 +1,275 @@
+"""
+Amortized attestation of many results with a single vTPM token.
+
+Requesting a token per consensus result would put a round trip to the
+attestation service, and the service's signing work, on every response, and a
+token only carries a handful of 10-74 byte nonces. Instead, `BatchAttestor`
+collects result digests for a short window, builds a Merkle tree over them and
+requests one token whose nonce is the hex-encoded tree root. Every caller gets
+the shared token together with an inclusion proof for its own digest.
+
+A verifier checks that the token is valid and carries the root as a nonce
+(`eat_nonce` claim), and that the proof links the result's digest to that root.
+
+The tree follows RFC 6962: leaves and interior nodes are hashed with distinct
+prefixes, and an unpaired node is promoted to the next level rather than
+duplicated, so no two different batches share a root.
+
+Classes:
+    ProofStep: One sibling hash on the path from a leaf to the root
+    BatchAttestation: A shared token plus the inclusion proof for one result
+    MerkleTree: SHA-256 Merkle tree with inclusion proofs
+    BatchAttestor: Collects digests and attests them in batches
+"""
+
+import asyncio
+import hashlib
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Any, Final, Literal
+
+import structlog
+
+from .vtpm_attestation import Vtpm, VtpmAttestationError
+
+logger = structlog.get_logger(__name__)
+
+LEAF_PREFIX: Final[bytes] = b"\x00"
+NODE_PREFIX: Final[bytes] = b"\x01"
+
+
+def result_digest(result: str | bytes) -> bytes:
+    """SHA-256 digest of a consensus result, as submitted to the attestor."""
+    data = result.encode() if isinstance(result, str) else result
+    return hashlib.sha256(data).digest()
+
+
+def _hash_leaf(digest: bytes) -> bytes:
+    return hashlib.sha256(LEAF_PREFIX + digest).digest()
+
+
+def _hash_node(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(NODE_PREFIX + left + right).digest()
+
+
+@dataclass(frozen=True)
+class ProofStep:
+    """
+    One sibling hash on the path from a leaf to the root.
+
+    Attributes:
+        sibling: Hex-encoded hash of the sibling node
+        side: Whether the sibling is the left or right input of the parent
+    """
+
+    sibling: str
+    side: Literal["left", "right"]
+
+
+@dataclass(frozen=True)
+class BatchAttestation:
+    """
+    A shared attestation token plus the inclusion proof for one result.
+
+    Attributes:
+        token: The vTPM token whose nonce is the Merkle root
+        root: Hex-encoded Merkle root of the batch
+        leaf_index: Position of the result's digest in the batch
+        batch_size: Number of digests in the batch
+        proof: Sibling hashes from the leaf up to the root
+    """
+
+    token: str
+    root: str
+    leaf_index: int
+    batch_size: int
+    proof: tuple[ProofStep, ...]
+
+    def verify(self, digest: bytes, claims: dict[str, Any] | None = None) -> bool:
+        """
+        Check that a result digest is covered by this attestation.
+
+        Args:
+            digest: SHA-256 digest of the result, see `result_digest`
+            claims: Validated claims of `token`; if given, the root must also
+                appear in their `eat_nonce`
+
+        Returns:
+            bool: True if the proof links the digest to the attested root
+        """
+        node = _hash_leaf(digest)
+        for step in self.proof:
+            sibling = bytes.fromhex(step.sibling)
+            if step.side == "left":
+                node = _hash_node(sibling, node)
+            else:
+                node = _hash_node(node, sibling)
+        if node.hex() != self.root:
+            return False
+        if claims is None:
+            return True
+        nonces = claims.get("eat_nonce", [])
+        if isinstance(nonces, str):
+            nonces = [nonces]
+        return self.root in nonces
+
+
+class MerkleTree:
+    """
+    SHA-256 Merkle tree over a batch of digests.
+
+    Args:
+        digests: Leaf digests in batch order; must not be empty
+    """
+
+    def __init__(self, digests: Sequence[bytes]) -> None:
+        if not digests:
+            msg = "Cannot build a Merkle tree without leaves"
+            raise ValueError(msg)
+        self.levels: list[list[bytes]] = [[_hash_leaf(d) for d in digests]]
+        while len(self.levels[-1]) > 1:
+            level = self.levels[-1]
+            parents = [
+                _hash_node(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)
+            ]
+            if len(level) % 2:
+                parents.append(level[-1])
+            self.levels.append(parents)
+
+    @property
+    def root(self) -> bytes:
+        """The tree root."""
+        return self.levels[-1][0]
+
+    def proof(self, index: int) -> tuple[ProofStep, ...]:
+        """
+        Build the inclusion proof for the leaf at an index.
+
+        Args:
+            index: Leaf position in the batch
+
+        Returns:
+            tuple[ProofStep, ...]: Sibling hashes from the leaf to the root
+        """
+        steps = []
+        for level in self.levels[:-1]:
+            sibling = index ^ 1
+            if sibling < len(level):
+                side: Literal["left", "right"] = "left" if sibling < index else "right"
+                steps.append(ProofStep(sibling=level[sibling].hex(), side=side))
+            index //= 2
+        return tuple(steps)
+
+
+class BatchAttestor:
+    """
+    Collects result digests and attests them in batches with one token each.
+
+    The first digest of a batch opens a collection window; the batch is sealed
+    when the window closes or when it reaches max_batch digests, whichever
+    comes first. The blocking token request runs in a worker thread.
+
+    Args:
+        vtpm: Client for the attestation service
+        window: Seconds to collect digests before requesting a token
+        max_batch: Maximum number of digests per token
+        audience: Intended audience of the tokens
+        token_type: Type of token, either "OIDC" or "PKI"
+
+    Usage:
+        attestor = BatchAttestor(Vtpm())
+        attestation = await attestor.attest(result_digest(response))
+    """
+
+    def __init__(
+        self,
+        vtpm: Vtpm,
+        window: float = 0.05,
+        max_batch: int = 1024,
+        audience: str = "https://sts.google.com",
+        token_type: str = "OIDC",  # noqa: S107
+    ) -> None:
+        self.vtpm = vtpm
+        self.window = window
+        self.max_batch = max_batch
+        self.audience = audience
+        self.token_type = token_type
+        self._pending: list[tuple[bytes, asyncio.Future[BatchAttestation]]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._flushes: set[asyncio.Task[None]] = set()
+        self.logger = logger.bind(router="batch_attestor")
+
+    async def attest(self, digest: bytes) -> BatchAttestation:
+        """
+        Attest a result digest as part of the next batch.
+
+        Args:
+            digest: SHA-256 digest of the result, see `result_digest`
+
+        Returns:
+            BatchAttestation: The batch token and the digest's inclusion proof
+
+        Raises:
+            VtpmAttestationError: If the batch token could not be obtained
+        """
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[BatchAttestation] = loop.create_future()
+        self._pending.append((digest, future))
+        if len(self._pending) >= self.max_batch:
+            self._seal()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._seal)
+        return await future
+
+    async def flush(self) -> None:
+        """Seal the current batch and wait for all batches in flight."""
+        self._seal()
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+
+    def _seal(self) -> None:
+        """Close the current batch and request its token in the background."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        task = asyncio.create_task(self._attest_batch(batch))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _attest_batch(
+        self, batch: list[tuple[bytes, asyncio.Future[BatchAttestation]]]
+    ) -> None:
+        """Request one token for a batch and resolve every caller's future."""
+        tree = MerkleTree([digest for digest, _ in batch])
+        root = tree.root.hex()
+        try:
+            token = await asyncio.to_thread(
+                self.vtpm.get_token, [root], self.audience, self.token_type
+            )
+        except Exception as e:
+            self.logger.exception("batch_attestation_failed", batch_size=len(batch))
+            error = (
+                e
+                if isinstance(e, VtpmAttestationError)
+                else VtpmAttestationError(str(e))
+            )
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        self.logger.info("batch_attested", batch_size=len(batch), root=root)
+        for index, (_, future) in enumerate(batch):
+            if not future.done():
+                future.set_result(
+                    BatchAttestation(
+                        token=token,
+                        root=root,
+                        leaf_index=index,
+                        batch_size=len(batch),
+                        proof=tree.proof(index),
+                    )
+                )
@@ -0,0 +1,133 @@
+"""
+Memoized certificate parsing and chain verification for PKI tokens.
+
+Every PKI token carries its full x5c chain, but in practice the intermediate
+and root certificates are identical across tokens and the leaf changes only
+when the attesting VM rotates its key. This module keeps:
+
+- parsed certificates keyed by the SHA-256 fingerprint of their DER bytes,
+- one OpenSSL trust store per (root, intermediate) pair, built once after the
+  intermediate has been verified against the root.
+
+Each store trusts the already verified intermediate as a partial-chain
+anchor, so verifying a token only checks the leaf's signature and validity.
+
+Classes:
+    CertificateCache: Thread-safe cache of parsed certificates and trust stores
+"""
+
+import base64
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import Final
+
+from cryptography import x509
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import hashes
+from OpenSSL.crypto import X509, X509Store, X509StoreContext, X509StoreFlags
+
+PEM_MARKERS: Final[re.Pattern[str]] = re.compile(
+    r"-----BEGIN CERTIFICATE-----|-----END CERTIFICATE-----|\s+"
+)
+
+type ChainKey = tuple[bytes, bytes]
+
+
+class CertificateCache:
+    """
+    Thread-safe cache of parsed certificates and verified trust stores.
+
+    Args:
+        max_certificates: Maximum number of parsed certificates kept
+        max_chains: Maximum number of verified (root, intermediate) stores kept
+    """
+
+    def __init__(self, max_certificates: int = 256, max_chains: int = 16) -> None:
+        self.max_certificates = max_certificates
+        self.max_chains = max_chains
+        self._certificates: OrderedDict[bytes, x509.Certificate] = OrderedDict()
+        self._stores: OrderedDict[ChainKey, X509Store] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def load_certificate(self, cert_str: str) -> x509.Certificate:
+        """
+        Decode a base64 DER certificate, reusing an earlier parse of it.
+
+        Args:
+            cert_str: Base64-encoded certificate string, optionally with PEM markers
+
+        Returns:
+            x509.Certificate: Parsed X.509 certificate object
+
+        Raises:
+            ValueError: If the string is not a valid base64 DER certificate
+        """
+        der = base64.b64decode(PEM_MARKERS.sub("", cert_str))
+        key = hashlib.sha256(der).digest()
+        with self._lock:
+            cert = self._certificates.get(key)
+            if cert is not None:
+                self._certificates.move_to_end(key)
+                return cert
+        cert = x509.load_der_x509_certificate(der, default_backend())
+        with self._lock:
+            self._certificates[key] = cert
+            if len(self._certificates) > self.max_certificates:
+                self._certificates.popitem(last=False)
+        return cert
+
+    def verify_leaf(
+        self,
+        leaf_cert: x509.Certificate,
+        intermediate_cert: x509.Certificate,
+        root_cert: x509.Certificate,
+    ) -> None:
+        """
+        Verify that a leaf certificate chains to a root via an intermediate.
+
+        The intermediate is verified against the root only the first time the
+        pair is seen; afterwards only the leaf is checked.
+
+        Raises:
+            OpenSSL.crypto.X509StoreContextError: If verification fails
+        """
+        store = self._store_for(root_cert, intermediate_cert)
+        X509StoreContext(store, X509.from_cryptography(leaf_cert)).verify_certificate()
+
+    def clear(self) -> None:
+        """Drop all cached certificates and trust stores."""
+        with self._lock:
+            self._certificates.clear()
+            self._stores.clear()
+
+    def _store_for(
+        self, root_cert: x509.Certificate, intermediate_cert: x509.Certificate
+    ) -> X509Store:
+        """Return the trust store for a chain, verifying the chain if it is new."""
+        key = (
+            root_cert.fingerprint(hashes.SHA256()),
+            intermediate_cert.fingerprint(hashes.SHA256()),
+        )
+        with self._lock:
+            store = self._stores.get(key)
+            if store is not None:
+                self._stores.move_to_end(key)
+                return store
+
+        root = X509.from_cryptography(root_cert)
+        intermediate = X509.from_cryptography(intermediate_cert)
+        root_store = X509Store()
+        root_store.add_cert(root)
+        X509StoreContext(root_store, intermediate).verify_certificate()
+
+        store = X509Store()
+        store.add_cert(root)
+        store.add_cert(intermediate)
+        store.set_flags(X509StoreFlags.PARTIAL_CHAIN)
+        with self._lock:
+            self._stores[key] = store
+            if len(self._stores) > self.max_chains:
+                self._stores.popitem(last=False)
+        return store
@@ -0,0 +1,178 @@
+"""
+Cache of validated vTPM token claims keyed by token digest.
+
+Clients present the same attestation token many times before it expires.
+Validating it again means re-parsing the header, decoding certificates,
+verifying the chain and checking the RSA signature, none of which can change
+the outcome while the token is still valid. This module remembers the outcome
+per SHA-256 digest of the token:
+
+- Valid tokens map to their claims until the token's `exp`.
+- Invalid tokens map to the validation error for a short negative TTL, so a
+  flood of bad tokens does not cost a full validation each.
+
+The cache is a bounded LRU; least recently used entries are evicted first.
+
+Classes:
+    ClaimsCacheStats: Snapshot of the cache counters
+    ClaimsCache: Thread-safe LRU of validation outcomes
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+from flare_ai_consensus.telemetry import ATTESTATION_CLAIMS_CACHE
+
+
+@dataclass(frozen=True)
+class ClaimsCacheStats:
+    """
+    Snapshot of the cache counters.
+
+    Attributes:
+        hits: Lookups answered with cached claims
+        negative_hits: Lookups answered with a cached validation error
+        misses: Lookups that required a full validation
+        evictions: Entries dropped to respect the size bound
+        size: Number of entries currently cached
+    """
+
+    hits: int
+    negative_hits: int
+    misses: int
+    evictions: int
+    size: int
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups answered from the cache."""
+        lookups = self.hits + self.negative_hits + self.misses
+        return (self.hits + self.negative_hits) / lookups if lookups else 0.0
+
+
+@dataclass(frozen=True)
+class _Entry:
+    expires_at: float
+    claims: dict[str, Any] | None = None
+    error: tuple[type[Exception], str] | None = None
+
+
+class ClaimsCache:
+    """
+    Thread-safe LRU from SHA-256(token) to the outcome of validating it.
+
+    Args:
+        max_entries: Maximum number of tokens remembered
+        negative_ttl: Seconds an invalid token's error is remembered
+        max_ttl: Optional cap in seconds on how long valid claims are
+            remembered, regardless of the token's `exp`
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        negative_ttl: float = 5.0,
+        max_ttl: float | None = None,
+    ) -> None:
+        self.max_entries = max_entries
+        self.negative_ttl = negative_ttl
+        self.max_ttl = max_ttl
+        self._entries: OrderedDict[bytes, _Entry] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._negative_hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @staticmethod
+    def key(token: str) -> bytes:
+        """Digest identifying a token in the cache."""
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, key: bytes) -> dict[str, Any] | None:
+        """
+        Look up the outcome of validating a token.
+
+        Args:
+            key: Token digest from `key`
+
+        Returns:
+            dict | None: A copy of the cached claims, or None on a miss
+
+        Raises:
+            Exception: A new instance of the cached validation error, if the
+                token was recently found invalid
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= now:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self._misses += 1
+                ATTESTATION_CLAIMS_CACHE.inc(result="miss")
+                return None
+            self._entries.move_to_end(key)
+            if entry.error is not None:
+                self._negative_hits += 1
+                ATTESTATION_CLAIMS_CACHE.inc(result="negative_hit")
+                error_type, message = entry.error
+                raise error_type(message)
+            self._hits += 1
+        ATTESTATION_CLAIMS_CACHE.inc(result="hit")
+        return dict(entry.claims or {})
+
+    def put(self, key: bytes, claims: dict[str, Any]) -> None:
+        """
+        Remember the claims of a valid token until its `exp`.
+
+        Tokens without an `exp` claim are only cached when max_ttl is set.
+        """
+        expires_at = claims.get("exp")
+        if self.max_ttl is not None:
+            cap = time.time() + self.max_ttl
+            expires_at = cap if expires_at is None else min(float(expires_at), cap)
+        if expires_at is None:
+            return
+        self._store(key, _Entry(expires_at=float(expires_at), claims=dict(claims)))
+
+    def put_error(self, key: bytes, error: Exception) -> None:
+        """Remember that a token failed validation for negative_ttl seconds."""
+        if self.negative_ttl <= 0:
+            return
+        entry = _Entry(
+            expires_at=time.time() + self.negative_ttl,
+            error=(type(error), str(error)),
+        )
+        self._store(key, entry)
+
+    def clear(self) -> None:
+        """Drop all entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> ClaimsCacheStats:
+        """Return a snapshot of the cache counters."""
+        with self._lock:
+            return ClaimsCacheStats(
+                hits=self._hits,
+                negative_hits=self._negative_hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                size=len(self._entries),
+            )
+
+    def _store(self, key: bytes, entry: _Entry) -> None:
+        if entry.expires_at <= time.time():
+            return
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
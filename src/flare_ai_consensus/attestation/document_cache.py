@@ -0,0 +1,320 @@
+"""
+HTTP cache for the issuer's well-known documents and key sets.
+
+Token validation needs the OIDC configuration, the JWKS and the Confidential
+Space root certificate. These change rarely, so fetching them on every
+validation puts avoidable network round trips on the hot path. This module
+keeps them in a process-wide cache that follows the server's caching headers:
+
+- Entries live for the `max-age` of the `Cache-Control` header (minus `Age`),
+  or until `Expires`, falling back to a default TTL when neither is present.
+- Expired entries are revalidated with `If-None-Match`, so an unchanged
+  document costs a 304 instead of a full download.
+- Entries that are close to expiry are refreshed on a background thread while
+  the cached copy keeps being served.
+- Callers can force a refetch, e.g. when a token names a key ID that is not in
+  the cached JWKS because the issuer just rotated its keys. Forced refetches
+  of the same URL are rate limited.
+
+Classes:
+    CachedDocument: A fetched document and its cache metadata
+    DocumentCache: Thread-safe cache of documents keyed by URL
+"""
+
+import json
+import math
+import re
+import threading
+import time
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from functools import cached_property
+from typing import Any, Final
+
+import requests
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+SUCCESS_STATUS: Final[int] = 200
+NOT_MODIFIED_STATUS: Final[int] = 304
+MAX_AGE_PATTERN: Final[re.Pattern[str]] = re.compile(r"max-age\s*=\s*\"?(\d+)\"?")
+
+
+@dataclass
+class CachedDocument:
+    """
+    A fetched document and its cache metadata.
+
+    Attributes:
+        url: URL the document was fetched from
+        content: Raw response body
+        etag: Entity tag for conditional revalidation, if the server sent one
+        fetched_at: Monotonic time of the last fetch or revalidation
+        expires_at: Monotonic time after which the entry must be revalidated
+    """
+
+    url: str
+    content: bytes
+    etag: str | None = None
+    fetched_at: float = field(default_factory=time.monotonic)
+    expires_at: float = field(default_factory=time.monotonic)
+
+    @cached_property
+    def json(self) -> Any:
+        """The body parsed as JSON, decoded once per fetched body."""
+        return json.loads(self.content)
+
+    @property
+    def ttl(self) -> float:
+        """Lifetime granted by the last fetch in seconds."""
+        return self.expires_at - self.fetched_at
+
+    def is_fresh(self, now: float) -> bool:
+        """Return whether the entry can be served without revalidation."""
+        return now < self.expires_at
+
+
+def freshness_lifetime(headers: Mapping[str, str]) -> float | None:
+    """
+    Compute how long a response may be cached from its headers.
+
+    Args:
+        headers: Response headers, looked up case-insensitively
+
+    Returns:
+        float | None: Lifetime in seconds, or None if the headers do not say
+    """
+    cache_control = headers.get("Cache-Control", "").lower()
+    if "no-store" in cache_control or "no-cache" in cache_control:
+        return 0.0
+
+    match = MAX_AGE_PATTERN.search(cache_control)
+    if match:
+        try:
+            age = float(headers.get("Age", "0") or 0)
+        except ValueError:
+            age = 0.0
+        if not math.isfinite(age) or age < 0:
+            age = 0.0
+        return max(0.0, float(match.group(1)) - age)
+
+    expires = headers.get("Expires")
+    if expires:
+        try:
+            expires_at = parsedate_to_datetime(expires)
+            date = parsedate_to_datetime(headers["Date"]) if "Date" in headers else None
+        except (TypeError, ValueError):
+            return 0.0
+        if date is None:
+            return max(0.0, expires_at.timestamp() - time.time())
+        return max(0.0, (expires_at - date).total_seconds())
+    return None
+
+
+class DocumentCache:
+    """
+    Thread-safe cache of HTTP documents keyed by URL.
+
+    Args:
+        default_ttl: Lifetime in seconds when the server sends no caching headers
+        max_ttl: Upper bound on any entry's lifetime in seconds
+        refresh_ratio: Fraction of an entry's lifetime after which it is
+            refreshed in the background
+        min_forced_refresh_interval: Minimum seconds between forced refetches
+            of the same URL
+        timeout: Request timeout in seconds
+    """
+
+    def __init__(
+        self,
+        default_ttl: float = 300.0,
+        max_ttl: float = 86400.0,
+        refresh_ratio: float = 0.8,
+        min_forced_refresh_interval: float = 30.0,
+        timeout: float = 10.0,
+    ) -> None:
+        self.default_ttl = default_ttl
+        self.max_ttl = max_ttl
+        self.refresh_ratio = refresh_ratio
+        self.min_forced_refresh_interval = min_forced_refresh_interval
+        self.timeout = timeout
+        self._session = requests.Session()
+        self._entries: dict[str, CachedDocument] = {}
+        self._lock = threading.Lock()
+        self._fetch_locks: dict[str, threading.Lock] = {}
+        self._refreshing: set[str] = set()
+        self.logger = logger.bind(router="document_cache")
+
+    def get(self, url: str, *, force_refresh: bool = False) -> CachedDocument:
+        """
+        Return the document at a URL, fetching it only when needed.
+
+        Args:
+            url: Document URL
+            force_refresh: Revalidate now even if the cached entry is fresh,
+                unless the entry was fetched very recently
+
+        Returns:
+            CachedDocument: The cached or freshly fetched document
+
+        Raises:
+            requests.exceptions.HTTPError: If the server answers with an
+                unexpected status code
+        """
+        now = time.monotonic()
+        entry = self._entries.get(url)
+        if entry is not None and entry.is_fresh(now):
+            recently_fetched = now - entry.fetched_at < self.min_forced_refresh_interval
+            if not force_refresh or recently_fetched:
+                if now - entry.fetched_at > entry.ttl * self.refresh_ratio:
+                    self._refresh_in_background(url)
+                return entry
+        return self._fetch(url, force=force_refresh)
+
+    def peek(self, url: str, *, force_refresh: bool = False) -> CachedDocument | None:
+        """
+        Return the cached document for a URL if it can be served without a fetch.
+
+        Follows the same freshness and forced-refetch rules as `get`, but never
+        touches the network; callers that fetch on their own (e.g. with an
+        async client) feed the result back through `store`.
+        """
+        now = time.monotonic()
+        entry = self._entries.get(url)
+        if entry is None or not entry.is_fresh(now):
+            return None
+        recently_fetched = now - entry.fetched_at < self.min_forced_refresh_interval
+        if force_refresh and not recently_fetched:
+            return None
+        return entry
+
+    def conditional_headers(self, url: str) -> dict[str, str]:
+        """Request headers for revalidating the cached copy of a URL."""
+        entry = self._entries.get(url)
+        if entry is not None and entry.etag:
+            return {"If-None-Match": entry.etag}
+        return {}
+
+    def store(
+        self,
+        url: str,
+        status_code: int,
+        headers: Mapping[str, str],
+        content: bytes,
+    ) -> CachedDocument:
+        """
+        Record a response fetched for a URL and return the resulting entry.
+
+        Args:
+            url: Document URL
+            status_code: Response status; 304 refreshes the cached copy
+            headers: Response headers, looked up case-insensitively
+            content: Response body
+
+        Returns:
+            CachedDocument: The updated cache entry
+
+        Raises:
+            requests.exceptions.HTTPError: If the status code is not 200 or a
+                304 for a cached URL
+        """
+        entry = self._entries.get(url)
+        now = time.monotonic()
+
+        if status_code == NOT_MODIFIED_STATUS and entry is not None:
+            content, etag = entry.content, headers.get("ETag", entry.etag)
+            self.logger.debug("document_not_modified", url=url)
+        elif status_code == SUCCESS_STATUS:
+            etag = headers.get("ETag")
+            self.logger.debug("document_fetched", url=url)
+        else:
+            msg = f"Failed to fetch {url}: {status_code}"
+            raise requests.exceptions.HTTPError(msg)
+
+        lifetime = freshness_lifetime(headers)
+        if lifetime is None:
+            lifetime = self.default_ttl
+        lifetime = min(lifetime, self.max_ttl)
+
+        if entry is not None and content == entry.content:
+            # Keep the entry object so its parsed JSON stays cached
+            entry.etag, entry.fetched_at, entry.expires_at = etag, now, now + lifetime
+            updated = entry
+        else:
+            updated = CachedDocument(
+                url=url,
+                content=content,
+                etag=etag,
+                fetched_at=now,
+                expires_at=now + lifetime,
+            )
+        with self._lock:
+            self._entries[url] = updated
+        return updated
+
+    def invalidate(self, url: str | None = None) -> None:
+        """Drop one cached URL, or every entry when no URL is given."""
+        with self._lock:
+            if url is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(url, None)
+
+    def _fetch(self, url: str, *, force: bool = False) -> CachedDocument:
+        """
+        Fetch or revalidate a URL, letting only one thread do so at a time.
+
+        Threads that waited on another thread's fetch reuse its result.
+        """
+        with self._lock:
+            fetch_lock = self._fetch_locks.setdefault(url, threading.Lock())
+        requested_at = time.monotonic()
+        with fetch_lock:
+            entry = self._entries.get(url)
+            if entry is not None and entry.fetched_at >= requested_at:
+                return entry
+            if entry is not None and not force and entry.is_fresh(time.monotonic()):
+                return entry
+            return self._request(url)
+
+    def _request(self, url: str) -> CachedDocument:
+        """Send a (conditional) GET and store the result."""
+        response = self._session.get(
+            url, headers=self.conditional_headers(url), timeout=self.timeout
+        )
+        return self.store(url, response.status_code, response.headers, response.content)
+
+    def _refresh_in_background(self, url: str) -> None:
+        """Revalidate a URL on a daemon thread unless a refresh is running."""
+        with self._lock:
+            if url in self._refreshing:
+                return
+            self._refreshing.add(url)
+
+        def refresh() -> None:
+            try:
+                self._fetch(url, force=True)
+            except Exception as e:
+                self.logger.exception(
+                    "background_refresh_failed", url=url, error=str(e)
+                )
+            finally:
+                with self._lock:
+                    self._refreshing.discard(url)
+
+        threading.Thread(target=refresh, name="document-refresh", daemon=True).start()
+
+
+_shared_cache: DocumentCache | None = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_shared_cache() -> DocumentCache:
+    """Return the process-wide cache shared by all validators."""
+    global _shared_cache  # noqa: PLW0603
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = DocumentCache()
+        return _shared_cache
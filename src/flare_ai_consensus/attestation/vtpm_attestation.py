@@ -3,18 +3,28 @@ Client for communicating with the Confidential Space vTPM attestation service.
 
 This module provides a client to request attestation tokens from a local Unix domain
 socket endpoint. It extends HTTPConnection to handle Unix socket communication and
-implements token request functionality with nonce validation.
+implements token request functionality with nonce validation. The connection is kept
+alive and reused across token requests, and tokens are cached per audience, token type
+and nonces until shortly before they expire.
 
 Classes:
     VtpmAttestationError: Exception for attestation service communication errors
+    UnixHTTPConnection: HTTP connection over a Unix domain socket
     VtpmAttestation: Client for requesting attestation tokens
 """
 
 import json
 import socket
-from http.client import HTTPConnection
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
+from http.client import HTTPConnection, RemoteDisconnected
 from pathlib import Path
+from typing import override
 
+import jwt
 import structlog
 
 logger = structlog.get_logger(__name__)
@@ -38,20 +48,80 @@ class VtpmAttestationError(Exception):
     """
 
 
+type TokenKey = tuple[str, str, tuple[str, ...]]
+
+
+@dataclass(frozen=True)
+class _CachedToken:
+    token: str
+    expires_at: float
+    refresh_at: float
+
+
+class UnixHTTPConnection(HTTPConnection):
+    """
+    HTTP connection that talks to a Unix domain socket instead of TCP.
+
+    Because `connect` is overridden, the standard library reconnects on its own
+    when the server closes a kept-alive connection between requests.
+    """
+
+    def __init__(self, unix_socket_path: str, timeout: float = 10) -> None:
+        super().__init__("localhost", timeout=timeout)
+        self.unix_socket_path = unix_socket_path
+
+    @override
+    def connect(self) -> None:
+        """Open the Unix domain socket."""
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.unix_socket_path)
+        self.sock = sock
+
+
 class Vtpm:
     """
-    Client for requesting attestation tokens via Unix domain socket."""
+    Client for requesting attestation tokens via Unix domain socket.
+
+    The HTTP connection to the attestation service is opened lazily and reused
+    by later token requests; call `close` to release it.
+
+    Tokens are cached per (audience, token type, nonces) and reused until
+    `refresh_margin` seconds before their `exp` claim (or half their lifetime,
+    if shorter). Concurrent requests for the same parameters share one fetch.
+    In simulate mode the fixed simulated token's lifetime is counted from the
+    time it was handed out, since its `exp` lies in the past.
+
+    Args:
+        url: Token endpoint URL
+        unix_socket_path: Path to the attestation service socket
+        simulate: Return the simulated token instead of contacting the service
+        token_cache_size: Maximum number of cached tokens; 0 disables caching
+        refresh_margin: Seconds before expiry after which a token is refetched
+    """
 
     def __init__(
         self,
         url: str = "http://localhost/v1/token",
         unix_socket_path: str = "/run/container_launcher/teeserver.sock",
         simulate: bool = False,  # noqa: FBT001, FBT002
+        *,
+        token_cache_size: int = 256,
+        refresh_margin: float = 300.0,
     ) -> None:
         self.url = url
         self.unix_socket_path = unix_socket_path
         self.simulate = simulate
+        self.token_cache_size = token_cache_size
+        self.refresh_margin = refresh_margin
         self.attestation_requested: bool = False
+        self.cache_hits = 0
+        self.token_fetches = 0
+        self._conn: UnixHTTPConnection | None = None
+        self._conn_lock = threading.Lock()
+        self._tokens: OrderedDict[TokenKey, _CachedToken] = OrderedDict()
+        self._inflight: dict[TokenKey, Future[str]] = {}
+        self._cache_lock = threading.Lock()
         self.logger = logger.bind(router="vtpm")
         self.logger.debug(
             "vtpm", simulate=simulate, url=url, unix_socket_path=self.unix_socket_path
@@ -90,7 +160,8 @@ class Vtpm:
 
         Requests a token with specified nonces for replay protection,
         targeted at the specified audience. Supports both OIDC and PKI
-        token types.
+        token types. A cached token for the same parameters is returned
+        while it is not close to expiry.
 
         Args:
             nonces: List of random nonce strings for replay protection
@@ -113,34 +184,117 @@ class Vtpm:
             )
         """
         self._check_nonce_length(nonces)
+        key: TokenKey = (audience, token_type, tuple(nonces))
+        with self._cache_lock:
+            cached = self._tokens.get(key)
+            if cached is not None and time.time() < cached.refresh_at:
+                self._tokens.move_to_end(key)
+                self.cache_hits += 1
+                return cached.token
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                inflight = Future()
+                self._inflight[key] = inflight
+                is_leader = True
+            else:
+                is_leader = False
+
+        if not is_leader:
+            return inflight.result()
+        try:
+            token = self._fetch_token(nonces, audience, token_type)
+            self._cache_token(key, token)
+        except BaseException as e:
+            inflight.set_exception(e)
+            raise
+        else:
+            inflight.set_result(token)
+            return token
+        finally:
+            with self._cache_lock:
+                self._inflight.pop(key, None)
+
+    def _fetch_token(self, nonces: list[str], audience: str, token_type: str) -> str:
+        """Request a new token from the attestation service."""
+        with self._cache_lock:
+            self.token_fetches += 1
         if self.simulate:
             self.logger.debug("sim_token", token=SIM_TOKEN)
             return SIM_TOKEN
 
-        # Connect to the socket
-        client_socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
-        client_socket.connect(self.unix_socket_path)
-
-        # Create an HTTP connection object
-        conn = HTTPConnection("localhost", timeout=10)
-        conn.sock = client_socket
-
-        # Send a POST request
         headers = {"Content-Type": "application/json"}
         body = json.dumps(
             {"audience": audience, "token_type": token_type, "nonces": nonces}
         )
-        conn.request("POST", self.url, body=body, headers=headers)
+        with self._conn_lock:
+            status, reason, token = self._post(body, headers)
 
-        # Get and decode the response
-        res = conn.getresponse()
         success_status = 200
-        if res.status != success_status:
-            msg = f"Failed to get attestation response: {res.status} {res.reason}"
+        if status != success_status:
+            msg = f"Failed to get attestation response: {status} {reason}"
             raise VtpmAttestationError(msg)
-        token = res.read().decode()
         self.logger.debug("token", token_type=token_type, token=token)
-
-        # Close the connection
-        conn.close()
         return token
+
+    def _cache_token(self, key: TokenKey, token: str) -> None:
+        """Remember a token until shortly before its expiry."""
+        if self.token_cache_size <= 0:
+            return
+        try:
+            claims = jwt.decode(token, options={"verify_signature": False})
+            expires_at = float(claims["exp"])
+            lifetime = expires_at - float(claims.get("iat", expires_at))
+        except (jwt.InvalidTokenError, KeyError, TypeError, ValueError):
+            self.logger.debug("token_not_cacheable")
+            return
+
+        now = time.time()
+        if self.simulate and expires_at <= now:
+            expires_at = now + lifetime
+        refresh_at = expires_at - min(self.refresh_margin, lifetime / 2)
+        if refresh_at <= now:
+            return
+        with self._cache_lock:
+            self._tokens[key] = _CachedToken(token, expires_at, refresh_at)
+            self._tokens.move_to_end(key)
+            while len(self._tokens) > self.token_cache_size:
+                self._tokens.popitem(last=False)
+
+    def close(self) -> None:
+        """Close the kept-alive connection to the attestation service."""
+        with self._conn_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _post(self, body: str, headers: dict[str, str]) -> tuple[int, str, str]:
+        """
+        Send a token request over the kept-alive connection.
+
+        A request that fails because the service dropped an idle connection is
+        retried once on a fresh connection.
+
+        Returns:
+            tuple: The response status, reason and decoded body
+        """
+        for attempt in range(2):
+            if self._conn is None:
+                self._conn = UnixHTTPConnection(self.unix_socket_path, timeout=10)
+            try:
+                self._conn.request("POST", self.url, body=body, headers=headers)
+                res = self._conn.getresponse()
+                return res.status, res.reason, res.read().decode()
+            except (RemoteDisconnected, ConnectionError) as e:
+                self._conn.close()
+                self._conn = None
+                if attempt:
+                    msg = f"Failed to reach attestation service: {e}"
+                    raise VtpmAttestationError(msg) from e
+                self.logger.debug("vtpm_reconnect", error=str(e))
+            except OSError as e:
+                self._conn.close()
+                self._conn = None
+                msg = f"Failed to reach attestation service: {e}"
+                raise VtpmAttestationError(msg) from e
+        msg = "Failed to reach attestation service"
+        raise VtpmAttestationError(msg)
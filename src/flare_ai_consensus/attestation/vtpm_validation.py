@@ -20,22 +20,27 @@ Constants:
 """
 
 import base64
+import binascii
 import datetime
 import hashlib
-import re
+import json
 from dataclasses import dataclass
-from typing import Any, Final
+from functools import lru_cache
+from typing import Any, Final, cast
 
 import jwt
-import requests
 import structlog
 from cryptography import x509
 from cryptography.exceptions import InvalidKey
 from cryptography.hazmat.backends import default_backend
-from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.asymmetric import rsa
-from OpenSSL.crypto import X509, X509Store, X509StoreContext
 from OpenSSL.crypto import Error as OpenSSLError
+from OpenSSL.crypto import X509StoreContextError
+
+from .cert_cache import CertificateCache
+from .claims_cache import ClaimsCache, ClaimsCacheStats
+from .document_cache import CachedDocument, DocumentCache, get_shared_cache
 
 logger = structlog.get_logger(__name__)
 
@@ -83,6 +88,53 @@ CERT_FINGERPRINT: Final[str] = (
 )
 
 
+@lru_cache(maxsize=64)
+def _rsa_key_from_jwk_numbers(n: str, e: str) -> rsa.RSAPublicKey:
+    """Build an RSA public key from base64url JWK numbers, cached per key."""
+    modulus = int.from_bytes(base64.urlsafe_b64decode(n + "=="), "big")
+    exponent = int.from_bytes(base64.urlsafe_b64decode(e + "=="), "big")
+    return rsa.RSAPublicNumbers(exponent, modulus).public_key(backend=default_backend())
+
+
+@lru_cache(maxsize=8)
+def _load_pem_certificate(pem: bytes) -> x509.Certificate:
+    """Parse a PEM certificate, cached per certificate body."""
+    return x509.load_pem_x509_certificate(pem, default_backend())
+
+
+@lru_cache(maxsize=8)
+def _sha1_fingerprint(cert: x509.Certificate) -> str:
+    """Colon-separated SHA-1 fingerprint of a certificate, as in CERT_FINGERPRINT."""
+    fingerprint = cert.fingerprint(hashes.SHA1())  # noqa: S303
+    return ":".join(format(b, "02x") for b in fingerprint).upper()
+
+
+def get_unverified_header(token: str) -> dict[str, Any]:
+    """
+    Decode a JWT header without verifying the token.
+
+    Equivalent to `jwt.get_unverified_header`, but decodes the segment with
+    the C base64 decoder: PyJWT checks every character of it in Python, which
+    dominates validation time for PKI tokens with their large x5c headers. The
+    signature check in `jwt.decode` still parses the token strictly.
+
+    Raises:
+        jwt.DecodeError: If the header is not a base64url-encoded JSON object
+    """
+    segment = token.split(".", 1)[0]
+    try:
+        header = json.loads(
+            base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+        )
+    except (ValueError, binascii.Error) as e:
+        msg = "Invalid header padding"
+        raise jwt.DecodeError(msg) from e
+    if not isinstance(header, dict):
+        msg = "Invalid header string: must be a json object"
+        raise jwt.DecodeError(msg)
+    return header
+
+
 class VtpmValidation:
     """
     Validates Confidential Space vTPM tokens through PKI or OIDC schemes.
@@ -97,6 +149,14 @@ class VtpmValidation:
             (default: /.well-known/openid-configuration)
         pki_endpoint: Path to root certificate
             (default: /.well-known/confidential_space_root.crt)
+        root_fingerprint: Expected SHA-1 fingerprint of the root certificate
+            (default: CERT_FINGERPRINT, the Confidential Space root)
+        document_cache: Cache for well-known documents and key sets
+            (default: a cache shared by all validators in the process)
+        claims_cache: Cache of validation outcomes per token
+            (default: a new cache owned by this validator)
+        certificate_cache: Cache of parsed certificates and verified chains
+            (default: a new cache owned by this validator)
 
     Usage:
         validator = VtpmValidation()
@@ -107,15 +167,24 @@ class VtpmValidation:
             # Handle validation failure
     """
 
-    def __init__(
+    def __init__(  # noqa: PLR0913
         self,
         expected_issuer: str = "https://confidentialcomputing.googleapis.com",
         oidc_endpoint: str = "/.well-known/openid-configuration",
         pki_endpoint: str = "/.well-known/confidential_space_root.crt",
+        *,
+        root_fingerprint: str = CERT_FINGERPRINT,
+        document_cache: DocumentCache | None = None,
+        claims_cache: ClaimsCache | None = None,
+        certificate_cache: CertificateCache | None = None,
     ) -> None:
         self.expected_issuer = expected_issuer
         self.oidc_endpoint = oidc_endpoint
         self.pki_endpoint = pki_endpoint
+        self.root_fingerprint = root_fingerprint
+        self.document_cache = document_cache or get_shared_cache()
+        self.claims_cache = claims_cache or ClaimsCache()
+        self.certificate_cache = certificate_cache or CertificateCache()
         self.logger = logger.bind(router="vtpm_validation")
 
     def validate_token(self, token: str) -> dict[str, Any]:
@@ -123,7 +192,9 @@ class VtpmValidation:
         Validates a vTPM token and returns its claims if valid.
 
         The method automatically detects whether to use PKI or OIDC validation based on
-        the presence of x5c certificates in the token header.
+        the presence of x5c certificates in the token header. Outcomes are cached
+        per token digest: claims until the token expires, and validation errors
+        for a short time.
 
         Args:
             token: The JWT token string to validate
@@ -137,7 +208,26 @@ class VtpmValidation:
             SignatureValidationError: If the token signature is invalid
             CertificateParsingError: If certificates cannot be parsed
         """
-        unverified_header = jwt.get_unverified_header(token)
+        key = self.claims_cache.key(token)
+        claims = self.claims_cache.get(key)
+        if claims is not None:
+            return claims
+
+        try:
+            claims = self.validate_token_uncached(token)
+        except (VtpmValidationError, jwt.InvalidTokenError) as e:
+            self.claims_cache.put_error(key, e)
+            raise
+        self.claims_cache.put(key, claims)
+        return claims
+
+    def cache_stats(self) -> ClaimsCacheStats:
+        """Return the hit, miss and eviction counters of the claims cache."""
+        return self.claims_cache.stats()
+
+    def validate_token_uncached(self, token: str) -> dict[str, Any]:
+        """Run the full PKI or OIDC validation of a token, bypassing the cache."""
+        unverified_header = get_unverified_header(token)
         self.logger.info("token", unverified_header=unverified_header)
 
         if unverified_header.get("alg") != ALGO:
@@ -159,8 +249,10 @@ class VtpmValidation:
         """
         Validates a token using OIDC JWKS-based validation.
 
-        Fetches the JWKS from the issuer's endpoint, finds the matching key by key ID,
-        and validates the token signature.
+        Looks up the JWKS from the issuer's endpoint, finds the matching key by key ID,
+        and validates the token signature. The JWKS is served from the document
+        cache; an unknown key ID triggers one forced refetch in case the issuer
+        has rotated its keys.
 
         Args:
             token: The JWT token string
@@ -173,18 +265,15 @@ class VtpmValidation:
             VtpmValidationError: For any validation failure
             SignatureValidationError: If signature validation fails
         """
-        res = self._get_well_known_file(self.expected_issuer, self.oidc_endpoint).json()
+        res = self._get_well_known_file(self.expected_issuer, self.oidc_endpoint).json
         jwks_uri = res["jwks_uri"]
 
-        jwks = self._fetch_jwks(jwks_uri)
-        rsa_key = None
-
-        # Find the correct key based on the key ID (kid) in header
-        for key in jwks["keys"]:
-            if key.get("kid") == unverified_header["kid"]:
-                self.logger.info("kid_match", kid=key["kid"])
-                rsa_key = self._jwk_to_rsa_key(key)
-                break
+        kid = unverified_header.get("kid")
+        rsa_key = self._find_rsa_key(self._fetch_jwks(jwks_uri), kid)
+        if rsa_key is None:
+            self.logger.info("kid_unknown", kid=kid)
+            jwks = self._fetch_jwks(jwks_uri, force_refresh=True)
+            rsa_key = self._find_rsa_key(jwks, kid)
 
         if rsa_key is None:
             msg = "Unable to find appropriate key id (kid) in header"
@@ -237,13 +326,12 @@ class VtpmValidation:
             InvalidCertificateChainError: If certificate chain validation fails
         """
         res = self._get_well_known_file(self.expected_issuer, self.pki_endpoint).content
-        root_cert = x509.load_pem_x509_certificate(res, default_backend())
-        fingerprint = root_cert.fingerprint(hashes.SHA1())  # noqa: S303
-        calculated_fingerprint = ":".join(format(b, "02x") for b in fingerprint).upper()
+        root_cert = _load_pem_certificate(res)
+        calculated_fingerprint = _sha1_fingerprint(root_cert)
 
-        if calculated_fingerprint != CERT_FINGERPRINT:
+        if calculated_fingerprint != self.root_fingerprint:
             msg = "Root certificate fingerprint does not match expected fingerprint."
-            f"Expected: {CERT_FINGERPRINT}, Received: {calculated_fingerprint}"
+            f"Expected: {self.root_fingerprint}, Received: {calculated_fingerprint}"
             raise VtpmValidationError(msg)
         try:
             certs = self._extract_and_validate_certificates(unverified_header)
@@ -252,15 +340,10 @@ class VtpmValidation:
             self._check_certificate_validity(certs)
             self._verify_certificate_chain(certs)
 
-            public_key = certs.leaf_cert.public_key()
-            public_pem = public_key.public_bytes(
-                encoding=serialization.Encoding.PEM,
-                format=serialization.PublicFormat.SubjectPublicKeyInfo,
-            )
-
             return jwt.decode(
                 token,
-                key=public_pem,
+                # RSA key type checked by _validate_leaf_certificate
+                key=cast("rsa.RSAPublicKey", certs.leaf_cert.public_key()),
                 algorithms=[ALGO],
             )
         except (InvalidKey, jwt.InvalidTokenError) as e:
@@ -270,15 +353,15 @@ class VtpmValidation:
             msg = f"Unexpected error during validation: {e}"
             raise VtpmValidationError(msg) from e
 
-    @staticmethod
     def _get_well_known_file(
-        expected_issuer: str, well_known_path: str
-    ) -> requests.Response:
+        self, expected_issuer: str, well_known_path: str
+    ) -> CachedDocument:
         """
         Fetch configuration data from a well-known endpoint.
 
-        This static method retrieves data from a well-known URL endpoint by combining
-        the issuer URL with the well-known path.
+        Retrieves data from a well-known URL endpoint by combining the issuer URL
+        with the well-known path. Responses are served from the document cache
+        for as long as the endpoint's caching headers allow.
 
         Args:
             expected_issuer: Base URL of the token issuer
@@ -287,28 +370,23 @@ class VtpmValidation:
                 (e.g., "/.well-known/openid-configuration")
 
         Returns:
-            requests.Response: The HTTP response from the well-known endpoint
+            CachedDocument: The cached response body of the well-known endpoint
 
         Raises:
             requests.exceptions.HTTPError: If the response status code is not 200
         """
-        response = requests.get(expected_issuer + well_known_path, timeout=10)
-        valid_status_code = 200
-        if response.status_code == valid_status_code:
-            return response
-        msg = f"Failed to fetch well known file: {response.status_code}"
-        raise requests.exceptions.HTTPError(msg)
+        return self.document_cache.get(expected_issuer + well_known_path)
 
-    @staticmethod
-    def _fetch_jwks(uri: str) -> JSONWebKeySet:
+    def _fetch_jwks(self, uri: str, *, force_refresh: bool = False) -> JSONWebKeySet:
         """
         Fetch JSON Web Key Set (JWKS) from a remote endpoint.
 
-        This static method retrieves and parses the JWKS containing public keys
-        used for token validation.
+        Retrieves and parses the JWKS containing public keys used for token
+        validation, going through the document cache.
 
         Args:
             uri: Full URL of the JWKS endpoint
+            force_refresh: Bypass the cached copy, e.g. after an unknown key ID
 
         Returns:
             JWKSResponse: Parsed JWKS data containing public keys
@@ -316,12 +394,17 @@ class VtpmValidation:
         Raises:
             requests.exceptions.HTTPError: If the response status code is not 200
         """
-        response = requests.get(uri, timeout=10)
-        valid_status_code = 200
-        if response.status_code == valid_status_code:
-            return response.json()
-        msg = f"Failed to fetch JWKS: {response.status_code}"
-        raise requests.exceptions.HTTPError(msg)
+        return self.document_cache.get(uri, force_refresh=force_refresh).json
+
+    def _find_rsa_key(
+        self, jwks: JSONWebKeySet, kid: str | None
+    ) -> rsa.RSAPublicKey | None:
+        """Return the RSA key with the given key ID (kid), if the JWKS has one."""
+        for key in jwks["keys"]:
+            if key.get("kid") == kid:
+                self.logger.info("kid_match", kid=kid)
+                return self._jwk_to_rsa_key(key)
+        return None
 
     @staticmethod
     def _jwk_to_rsa_key(jwk: dict[str, str]) -> rsa.RSAPublicKey:
@@ -336,11 +419,10 @@ class VtpmValidation:
                 and 'e' (exponent) fields in base64url encoding
 
         Returns:
-            RSAPublicKey: A cryptographic RSA public key object
+            RSAPublicKey: A cryptographic RSA public key object, shared between
+                calls with the same modulus and exponent
         """
-        n = int.from_bytes(base64.urlsafe_b64decode(jwk["n"] + "=="), "big")
-        e = int.from_bytes(base64.urlsafe_b64decode(jwk["e"] + "=="), "big")
-        return rsa.RSAPublicNumbers(e, n).public_key(backend=default_backend())
+        return _rsa_key_from_jwk_numbers(jwk["n"], jwk["e"])
 
     def _extract_and_validate_certificates(
         self, headers: dict[str, Any]
@@ -382,13 +464,13 @@ class VtpmValidation:
             msg = f"Failed to parse certificates: {e}"
             raise CertificateParsingError(msg) from e
 
-    @staticmethod
-    def _decode_der_certificate(cert_str: str) -> x509.Certificate:
+    def _decode_der_certificate(self, cert_str: str) -> x509.Certificate:
         """
         Decode and parse a DER-encoded certificate from base64 string.
 
-        This static method handles cleaning and decoding of a certificate string,
-        removing PEM headers/footers and whitespace before base64 decoding.
+        Handles cleaning and decoding of a certificate string, removing PEM
+        headers/footers and whitespace before base64 decoding. Certificates seen
+        before are served from the certificate cache by DER fingerprint.
 
         Args:
             cert_str: Base64-encoded certificate string, optionally with PEM markers
@@ -400,13 +482,7 @@ class VtpmValidation:
             CertificateParsingError: If certificate parsing fails
         """
         try:
-            cleaned_cert = re.sub(
-                r"-----BEGIN CERTIFICATE-----|-----END CERTIFICATE-----|\s+",
-                "",
-                cert_str,
-            )
-            cert_bytes = base64.b64decode(cleaned_cert)
-            return x509.load_der_x509_certificate(cert_bytes, default_backend())
+            return self.certificate_cache.load_certificate(cert_str)
         except Exception as e:
             msg = f"Failed to decode certificate: {e}"
             raise CertificateParsingError(msg) from e
@@ -443,14 +519,15 @@ class VtpmValidation:
             msg = "Invalid certificate format"
             raise VtpmValidationError(msg) from e
 
-    @staticmethod
-    def _verify_certificate_chain(certificates: PKICertificates) -> None:
+    def _verify_certificate_chain(self, certificates: PKICertificates) -> None:
         """
         Verify the trust chain of certificates.
 
-        This static method validates the certificate chain using OpenSSL, ensuring
-        that each certificate is signed by its issuer and the chain leads to a
-        trusted root certificate.
+        Validates the certificate chain using OpenSSL, ensuring that each
+        certificate is signed by its issuer and the chain leads to a trusted root
+        certificate. The intermediate is verified against the root once per
+        (root, intermediate) pair; later tokens only have their leaf verified
+        against the cached trust store.
 
         Args:
             certificates: PKICertificates object containing leaf, intermediate,
@@ -460,16 +537,12 @@ class VtpmValidation:
             InvalidCertificateChainError: If chain validation fails
         """
         try:
-            store = X509Store()
-            store.add_cert(X509.from_cryptography(certificates.root_cert))
-            store.add_cert(X509.from_cryptography(certificates.intermediate_cert))
-
-            store_ctx = X509StoreContext(
-                store, X509.from_cryptography(certificates.leaf_cert)
+            self.certificate_cache.verify_leaf(
+                certificates.leaf_cert,
+                certificates.intermediate_cert,
+                certificates.root_cert,
             )
-            store_ctx.verify_certificate()
-
-        except OpenSSLError as e:
+        except (OpenSSLError, X509StoreContextError) as e:
             msg = f"Certificate chain verification failed: {e}"
             raise InvalidCertificateChainError(msg) from e
 
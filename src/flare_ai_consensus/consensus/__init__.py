@@ -1,9 +1,68 @@
-from .aggregator import async_centralized_llm_aggregator, centralized_llm_aggregator
-from .consensus import run_consensus, send_round
+from .aggregator import (
+    async_centralized_llm_aggregator,
+    async_tree_llm_aggregator,
+    centralized_llm_aggregator,
+)
+from .batch import BatchEngine, BatchResult
+from .consensus import ConsensusResult, run_consensus, send_round
+from .embedding_aggregator import (
+    centrality_index,
+    centrality_weights,
+    embedding_aggregator,
+    medoid_index,
+)
+from .hooks import RunHooks
+from .pruning import InfluenceTracker, ModelInfluence, PruningPolicy
+from .shapley import exact_shapley, sampled_shapley, shapley_contributions
+from .strategies import (
+    AggregationContext,
+    AggregationStrategy,
+    aggregate,
+    aggregate_sync,
+    available_aggregators,
+    get_aggregator,
+    register_aggregator,
+)
+from .vote_aggregator import (
+    ExtractionError,
+    extract_answer,
+    majority_vote,
+    median,
+    trimmed_mean,
+    weighted_vote,
+)
 
 __all__ = [
+    "AggregationContext",
+    "AggregationStrategy",
+    "BatchEngine",
+    "BatchResult",
+    "ConsensusResult",
+    "ExtractionError",
+    "InfluenceTracker",
+    "ModelInfluence",
+    "PruningPolicy",
+    "RunHooks",
+    "aggregate",
+    "aggregate_sync",
     "async_centralized_llm_aggregator",
+    "async_tree_llm_aggregator",
+    "available_aggregators",
+    "centrality_index",
+    "centrality_weights",
     "centralized_llm_aggregator",
+    "embedding_aggregator",
+    "exact_shapley",
+    "extract_answer",
+    "get_aggregator",
+    "majority_vote",
+    "median",
+    "medoid_index",
+    "register_aggregator",
     "run_consensus",
+    "sampled_shapley",
     "send_round",
+    "shapley_contributions",
+    "trimmed_mean",
+    "weighted_vote",
 ]
@@ -1,9 +1,19 @@
+import asyncio
+
 from flare_ai_consensus.router import (
     AsyncOpenRouterProvider,
     ChatRequest,
     OpenRouterProvider,
+    mark_cache_breakpoint,
 )
 from flare_ai_consensus.settings import AggregatorConfig, Message
+from flare_ai_consensus.telemetry import (
+    AGGREGATOR_LATENCY,
+    PROMPT_COMPACTIONS,
+    PROMPT_TOKENS,
+    start_span,
+)
+from flare_ai_consensus.utils import compact_responses, estimate_message_tokens
 
 
 def _concatenate_aggregator(responses: dict[str, str]) -> str:
@@ -16,6 +26,70 @@ def _concatenate_aggregator(responses: dict[str, str]) -> str:
     return "\n\n".join([f"{model}: {text}" for model, text in responses.items()])
 
 
+def _build_aggregator_messages(
+    aggregator_config: AggregatorConfig, aggregated_responses: dict[str, str]
+) -> list[Message]:
+    """
+    Build the aggregator conversation, compacting responses to the budget.
+
+    The messages are the context, the responses, then the aggregator prompt,
+    so the conversation ends on the instruction. The context is identical on
+    every call and can be served from the prompt cache. If the aggregator
+    model has a prompt_budget, the responses are compacted to whatever the
+    context, prompt and labels leave of it.
+
+    :param aggregator_config: An instance of AggregatorConfig.
+    :param aggregated_responses: A dictionary mapping model IDs to their
+        response texts.
+    :return: The list of messages to send to the aggregator.
+    """
+    budget = aggregator_config.model.prompt_budget
+    if budget is not None:
+        fixed = [*aggregator_config.context, *aggregator_config.prompt]
+        header = _concatenate_aggregator(dict.fromkeys(aggregated_responses, ""))
+        available = (
+            budget
+            - estimate_message_tokens(fixed)
+            - estimate_message_tokens([{"role": "system", "content": header}])
+        )
+        aggregated_responses, method = compact_responses(
+            aggregated_responses, max(available, 1)
+        )
+        if method is not None:
+            PROMPT_COMPACTIONS.inc(call="aggregator", method=method)
+
+    messages: list[Message] = []
+    messages.extend(aggregator_config.context)
+    aggregated_str = _concatenate_aggregator(aggregated_responses)
+    messages.append(
+        {"role": "system", "content": f"Aggregated responses:\n{aggregated_str}"}
+    )
+    messages.extend(aggregator_config.prompt)
+    return messages
+
+
+def _build_aggregator_payload(
+    aggregator_config: AggregatorConfig, messages: list[Message]
+) -> ChatRequest:
+    """
+    Build the aggregator request, marking the context as a cacheable prefix.
+
+    :param aggregator_config: An instance of AggregatorConfig.
+    :param messages: The messages from `_build_aggregator_messages`.
+    :return: The chat completion payload.
+    """
+    model = aggregator_config.model
+    prefix = len(aggregator_config.context)
+    return {
+        "model": model.model_id,
+        "messages": mark_cache_breakpoint(messages, prefix)
+        if model.prompt_cache
+        else messages,
+        "max_tokens": model.max_tokens,
+        "temperature": model.temperature,
+    }
+
+
 def centralized_llm_aggregator(
     provider: OpenRouterProvider,
     aggregator_config: AggregatorConfig,
@@ -29,28 +103,27 @@ def centralized_llm_aggregator(
         responses from individual models.
     :return: The aggregator's combined response.
     """
-    # Build the message list.
-    messages: list[Message] = []
-    messages.extend(aggregator_config.context)
-
-    # Add a system message with the aggregated responses.
-    aggregated_str = _concatenate_aggregator(aggregated_responses)
-    messages.append(
-        {"role": "system", "content": f"Aggregated responses:\n{aggregated_str}"}
+    # Build the message list: context, aggregated responses, aggregator prompt.
+    messages = _build_aggregator_messages(aggregator_config, aggregated_responses)
+    prompt_tokens = estimate_message_tokens(messages)
+    PROMPT_TOKENS.observe(
+        prompt_tokens, model=aggregator_config.model.model_id, call="aggregator"
     )
 
-    # Add the aggregator prompt
-    messages.extend(aggregator_config.prompt)
-
-    payload: ChatRequest = {
-        "model": aggregator_config.model.model_id,
-        "messages": messages,
-        "max_tokens": aggregator_config.model.max_tokens,
-        "temperature": aggregator_config.model.temperature,
-    }
+    payload = _build_aggregator_payload(aggregator_config, messages)
 
     # Get aggregated response from the centralized LLM
-    response = provider.send_chat_completion(payload)
+    with (
+        AGGREGATOR_LATENCY.time(approach=aggregator_config.approach),
+        start_span(
+            "centralized_llm_aggregator",
+            model_id=aggregator_config.model.model_id,
+            responses=len(aggregated_responses),
+            prompt_tokens_estimate=prompt_tokens,
+        ) as span,
+    ):
+        response = provider.send_chat_completion(payload)
+        span.set_usage(response)
     return response.get("choices", [])[0].get("message", {}).get("content", "")
 
 
@@ -68,19 +141,81 @@ async def async_centralized_llm_aggregator(
         responses from individual models.
     :return: The aggregator's combined response as a string.
     """
-    messages = []
-    messages.extend(aggregator_config.context)
-    messages.append(
-        {"role": "system", "content": f"Aggregated responses:\n{aggregated_responses}"}
+    messages = _build_aggregator_messages(aggregator_config, aggregated_responses)
+    prompt_tokens = estimate_message_tokens(messages)
+    PROMPT_TOKENS.observe(
+        prompt_tokens, model=aggregator_config.model.model_id, call="aggregator"
     )
-    messages.extend(aggregator_config.prompt)
 
-    payload: ChatRequest = {
-        "model": aggregator_config.model.model_id,
-        "messages": messages,
-        "max_tokens": aggregator_config.model.max_tokens,
-        "temperature": aggregator_config.model.temperature,
-    }
+    payload = _build_aggregator_payload(aggregator_config, messages)
 
-    response = await provider.send_chat_completion(payload)
+    with (
+        AGGREGATOR_LATENCY.time(approach=aggregator_config.approach),
+        start_span(
+            "async_centralized_llm_aggregator",
+            model_id=aggregator_config.model.model_id,
+            responses=len(aggregated_responses),
+            prompt_tokens_estimate=prompt_tokens,
+        ) as span,
+    ):
+        response = await provider.send_chat_completion(payload)
+        span.set_usage(response)
     return response.get("choices", [])[0].get("message", {}).get("content", "")
+
+
+async def _aggregate_group(
+    provider: AsyncOpenRouterProvider,
+    aggregator_config: AggregatorConfig,
+    group: dict[str, str],
+) -> str:
+    """Aggregate one group of a tree level; a lone response passes through."""
+    if len(group) == 1:
+        return next(iter(group.values()))
+    return await async_centralized_llm_aggregator(provider, aggregator_config, group)
+
+
+async def async_tree_llm_aggregator(
+    provider: AsyncOpenRouterProvider,
+    aggregator_config: AggregatorConfig,
+    aggregated_responses: dict[str, str],
+) -> str:
+    """
+    Aggregate responses hierarchically in groups of fan_in.
+
+    Each level splits the responses into groups of at most
+    `aggregator_config.fan_in`, aggregates the groups concurrently and passes
+    the partial aggregates to the next level, until at most fan_in remain for
+    a final aggregation. Every call sees at most fan_in responses, so prompt
+    size stays bounded and latency grows with the number of levels,
+    logarithmically in the ensemble size.
+
+    :param provider: An asynchronous OpenRouterProvider.
+    :param aggregator_config: An instance of AggregatorConfig.
+    :param aggregated_responses: A dictionary mapping model IDs to their
+        response texts.
+    :return: The aggregator's combined response as a string.
+    :raises ValueError: If fan_in is smaller than 2.
+    """
+    fan_in = aggregator_config.fan_in
+    min_fan_in = 2
+    if fan_in < min_fan_in:
+        msg = f"Tree aggregation needs a fan_in of at least 2, got {fan_in}"
+        raise ValueError(msg)
+
+    level = aggregated_responses
+    depth = 0
+    with start_span(
+        "async_tree_llm_aggregator", fan_in=fan_in, responses=len(level)
+    ) as span:
+        while len(level) > fan_in:
+            items = list(level.items())
+            groups = [dict(items[i : i + fan_in]) for i in range(0, len(items), fan_in)]
+            partials = await asyncio.gather(
+                *(_aggregate_group(provider, aggregator_config, g) for g in groups)
+            )
+            level = {f"group {i + 1}": text for i, text in enumerate(partials)}
+            depth += 1
+        span.set_attribute("levels", depth + 1)
+        return await async_centralized_llm_aggregator(
+            provider, aggregator_config, level
+        )
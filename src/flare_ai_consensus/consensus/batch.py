@@ -0,0 +1,147 @@
+import asyncio
+from collections.abc import AsyncIterator, Sequence
+from dataclasses import dataclass
+
+import structlog
+
+from flare_ai_consensus.consensus.consensus import run_consensus
+from flare_ai_consensus.consensus.hooks import RunHooks
+from flare_ai_consensus.embeddings import EmbeddingModel
+from flare_ai_consensus.router import AsyncOpenRouterProvider
+from flare_ai_consensus.settings import ConsensusConfig, Message
+
+logger = structlog.get_logger(__name__)
+
+
+@dataclass
+class BatchResult:
+    """
+    Outcome of one conversation in a batch.
+
+    :param index: Position of the conversation in the submitted batch.
+    :param response: The aggregated consensus response, if the run succeeded.
+    :param error: The error message, if the run failed.
+    """
+
+    index: int
+    response: str | None = None
+    error: str | None = None
+
+
+class BatchEngine:
+    """
+    Runs many conversations through the CL pipeline under one concurrency limit.
+
+    The limit is global to the engine, so concurrent batches share it, and the
+    provider's own request cap keeps every consensus run on one rate-limit
+    budget. Conversations made of one system and one user message share the
+    semantic cache with chat; longer conversations always run consensus.
+    """
+
+    def __init__(
+        self,
+        provider: AsyncOpenRouterProvider,
+        consensus_config: ConsensusConfig,
+        max_concurrency: int = 8,
+        embedding_model: EmbeddingModel | None = None,
+        *,
+        hooks: RunHooks | None = None,
+    ) -> None:
+        """
+        :param provider: An instance of an asynchronous OpenRouter provider.
+        :param consensus_config: An instance of ConsensusConfig.
+        :param max_concurrency: Maximum number of consensus runs at once.
+        :param embedding_model: Shared embedding model for the embedding-based
+            aggregation approaches.
+        :param hooks: Optional pruning, semantic cache and transcript store.
+        """
+        self.provider = provider
+        self.consensus_config = consensus_config
+        self.embedding_model = embedding_model
+        self.hooks = hooks or RunHooks()
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run(
+        self, conversations: Sequence[list[Message]]
+    ) -> AsyncIterator[BatchResult]:
+        """
+        Run a batch of conversations, yielding results in completion order.
+
+        At most max_concurrency runs of the batch are in flight at once; the
+        next conversation is started as each one finishes, so a large batch
+        never holds more tasks than the limit. Failures are reported per item
+        and do not abort the batch. Closing the iterator early cancels the
+        outstanding runs.
+
+        :param conversations: Initial conversations, one per consensus run.
+        :return: An async iterator of BatchResult.
+        """
+        pending: set[asyncio.Task[BatchResult]] = set()
+        items = enumerate(conversations)
+        try:
+            while True:
+                for index, conversation in items:
+                    pending.add(
+                        asyncio.create_task(self._run_item(index, conversation))
+                    )
+                    if len(pending) >= self.max_concurrency:
+                        break
+                if not pending:
+                    return
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def run_all(
+        self, conversations: Sequence[list[Message]]
+    ) -> list[BatchResult]:
+        """
+        Run a batch of conversations and return the results in input order.
+
+        :param conversations: Initial conversations, one per consensus run.
+        :return: A list of BatchResult ordered by index.
+        """
+        results = [result async for result in self.run(conversations)]
+        return sorted(results, key=lambda result: result.index)
+
+    async def _run_item(self, index: int, conversation: list[Message]) -> BatchResult:
+        """Run one conversation once a concurrency slot is free."""
+        semantic_cache = self.hooks.semantic_cache
+        request = _cacheable(conversation) if semantic_cache is not None else None
+        async with self._semaphore:
+            try:
+                if semantic_cache is not None and request is not None:
+                    cached = await semantic_cache.lookup(*request)
+                    if cached is not None:
+                        return BatchResult(index=index, response=cached["response"])
+                result = await run_consensus(
+                    self.provider,
+                    self.consensus_config,
+                    conversation,
+                    self.embedding_model,
+                    self.hooks.pruning,
+                )
+            except Exception as e:
+                logger.exception("batch item failed", index=index, error=str(e))
+                return BatchResult(index=index, error=str(e))
+        if self.hooks.transcripts is not None:
+            self.hooks.transcripts.append(result.transcript())
+        if semantic_cache is not None and request is not None:
+            await semantic_cache.store(*request, result.answer())
+        return BatchResult(index=index, response=result.response)
+
+
+def _cacheable(conversation: list[Message]) -> tuple[str, str] | None:
+    """Return the system and user message of a chat-shaped conversation."""
+    if len(conversation) != 2:  # noqa: PLR2004
+        return None
+    system, user = conversation
+    if system["role"] != "system" or user["role"] != "user":
+        return None
+    return system["content"], user["content"]
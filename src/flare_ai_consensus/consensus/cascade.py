@@ -0,0 +1,56 @@
+"""
+Confidence signal for the cascade execution mode.
+
+In cascade mode a fast model answers first and a second cheap answer is
+drawn: another sample of the fast model (self-consistency) or the answer of
+a verifier model. If the two agree, the fast answer is returned and the full
+multi-model consensus is skipped. Agreement is measured as:
+
+    answer match: 1.0 or 0.0, when the aggregator has an answer_schema and a
+        typed answer can be extracted from both texts
+    cosine similarity: of the two texts' embeddings, otherwise
+
+Self-consistency only carries signal if the fast model samples with a
+non-zero temperature.
+
+The threshold is only meaningful for the embedding model it was tuned with.
+The local hashing model measures word overlap, so a one-word contradiction in
+a long answer can still score above 0.8; the app therefore refuses to start a
+cascade without an answer_schema unless a semantic embedding model is
+configured.
+"""
+
+from typing import Final
+
+from flare_ai_consensus.consensus.vote_aggregator import extract_answer
+from flare_ai_consensus.embeddings import EmbeddingModel, get_shared_model
+from flare_ai_consensus.settings import AnswerSchema
+
+CASCADE: Final[str] = "cascade"
+CONSENSUS: Final[str] = "consensus"
+
+
+async def agreement(
+    first: str,
+    second: str,
+    schema: AnswerSchema | None = None,
+    embedding_model: EmbeddingModel | None = None,
+) -> float:
+    """
+    Score how much two answers to the same prompt agree.
+
+    :param first: The fast model's answer.
+    :param second: The second sample or the verifier's answer.
+    :param schema: Optional answer schema; if both texts contain a valid
+        answer, the score is whether they match.
+    :param embedding_model: The model used to embed the texts otherwise;
+        defaults to a shared local hashing model.
+    :return: A score in [-1, 1]; 1 means the answers agree.
+    """
+    if schema is not None:
+        answers = extract_answer(first, schema), extract_answer(second, schema)
+        if None not in answers:
+            return 1.0 if answers[0] == answers[1] else 0.0
+    model = embedding_model or get_shared_model()
+    vectors = await model.embed([first, second])
+    return float(vectors[0] @ vectors[1])
@@ -1,41 +1,315 @@
 import asyncio
+import json
+import math
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from typing import Any
 
 import structlog
 
-from flare_ai_consensus.consensus.aggregator import async_centralized_llm_aggregator
-from flare_ai_consensus.router import AsyncOpenRouterProvider, ChatRequest
-from flare_ai_consensus.settings import ConsensusConfig, Message, ModelConfig
-from flare_ai_consensus.utils import parse_chat_response
+from flare_ai_consensus.consensus.cascade import CASCADE, CONSENSUS, agreement
+from flare_ai_consensus.consensus.embedding_aggregator import response_divergence
+from flare_ai_consensus.consensus.pruning import PruningPolicy
+from flare_ai_consensus.consensus.shapley import shapley_contributions
+from flare_ai_consensus.consensus.strategies import AggregationContext, aggregate
+from flare_ai_consensus.embeddings import EmbeddingModel
 from flare_ai_consensus.nft_monitor import main as nft_monitor_main
+from flare_ai_consensus.router import (
+    AsyncOpenRouterProvider,
+    ChatRequest,
+    RunUsage,
+    mark_cache_breakpoint,
+    track_run,
+)
+from flare_ai_consensus.settings import (
+    CascadeConfig,
+    ConsensusConfig,
+    Message,
+    ModelConfig,
+)
+from flare_ai_consensus.telemetry import (
+    CONSENSUS_BUDGET_STOPS,
+    CONSENSUS_PATHS,
+    CONSENSUS_REQUERIES,
+    CONSENSUS_ROUND_DURATION,
+    CONSENSUS_ROUNDS,
+    CONSENSUS_RUN_DURATION,
+    PROMPT_COMPACTIONS,
+    PROMPT_TOKENS,
+    start_span,
+)
+from flare_ai_consensus.utils import (
+    compact_text,
+    estimate_message_tokens,
+    parse_chat_response,
+)
 
 logger = structlog.get_logger(__name__)
 
 
+@dataclass
+class ConsensusResult:
+    """
+    Outcome of a consensus run.
+
+    :param response: The final aggregated response.
+    :param shapley_values: Each configured model's contribution to the final
+        aggregate; models that did not answer the final round score 0. A
+        cascade answer scores 1 for the fast model and 0 for the ensemble.
+    :param usage: Tokens, cost and latency of the run, in total and per round
+        and model.
+    :param path: "cascade" if the fast model's answer was confident enough,
+        "consensus" if the full ensemble ran.
+    :param confidence: The cascade's agreement score, if the cascade ran.
+    :param rounds: The initial conversation and every round's responses and
+        aggregate, keyed "iteration_<i>" and "aggregate_<i>", or "cascade".
+    :param run_id: Unique ID of the run.
+    :param started_at: Unix time at which the run started.
+    """
+
+    response: str
+    shapley_values: dict[str, float] = field(default_factory=dict)
+    usage: dict[str, dict] = field(default_factory=dict)
+    path: str = CONSENSUS
+    confidence: float | None = None
+    rounds: dict[str, Any] = field(default_factory=dict)
+    run_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    started_at: float = field(default_factory=time.time)
+
+    def transcript(self) -> dict[str, Any]:
+        """Return the run as a JSON-serializable transcript record."""
+        record = asdict(self)
+        record["timestamp"] = record.pop("started_at")
+        return record
+
+    def answer(self) -> dict[str, str]:
+        """
+        Return the run as an API answer, as served and cached by chat.
+
+        :return: The response and path, plus the Shapley values and usage,
+            JSON-encoded.
+        """
+        return {
+            "response": self.response,
+            "path": self.path,
+            "shapley_values": json.dumps(self.shapley_values),
+            "usage": json.dumps(self.usage),
+        }
+
+
 async def run_consensus(
     provider: AsyncOpenRouterProvider,
     consensus_config: ConsensusConfig,
     initial_conversation: list[Message],
-) -> str:
+    embedding_model: EmbeddingModel | None = None,
+    pruning: PruningPolicy | None = None,
+) -> ConsensusResult:
     """
     Asynchronously runs the consensus learning loop.
 
+    With a cascade configured, the fast model answers first and the loop only
+    runs if its answer's confidence is below the cascade threshold. With a
+    pruning policy, the loop only queries the models the policy selects, and
+    their contributions are added to its influence history.
+
     :param provider: An instance of an AsyncOpenRouterProvider.
     :param consensus_config: An instance of ConsensusConfig.
     :param initial_conversation: the input user prompt with system instructions.
+    :param embedding_model: Embeds responses for the embedding-based
+        aggregation approaches and the contribution scores; defaults to a
+        shared local model.
+    :param pruning: Optional policy skipping models with low historical
+        influence.
+
+    Returns: ConsensusResult with the aggregated response, each model's
+    Shapley contribution to it and the run's token usage and cost.
+    All responses are returned in its rounds, e.g. for the transcript store.
+    """
+    started_at = time.time()
+    with (
+        CONSENSUS_RUN_DURATION.time(),
+        start_span(
+            "run_consensus",
+            models=len(consensus_config.models),
+            iterations=consensus_config.iterations,
+        ) as span,
+        track_run() as usage,
+    ):
+        cascade = consensus_config.cascade
+        confidence = None
+        result = None
+        if cascade is not None:
+            usage.start_round(CASCADE)
+            confidence, result = await _run_cascade(
+                provider,
+                consensus_config,
+                cascade,
+                initial_conversation,
+                embedding_model,
+            )
+        if result is None:
+            if pruning is not None:
+                consensus_config = consensus_config.model_copy(
+                    update={"models": pruning.select(consensus_config.models)}
+                )
+            result = await _run_consensus(
+                provider, consensus_config, initial_conversation, embedding_model, usage
+            )
+            if pruning is not None:
+                pruning.record(result.shapley_values)
+        result.confidence = confidence
+        result.started_at = started_at
+        CONSENSUS_PATHS.inc(path=result.path)
+        span.set_attribute("path", result.path)
+        span.set_attribute("confidence", confidence)
+        span.set_attribute("queried_models", len(consensus_config.models))
+        span.set_attribute("total_tokens", usage.total.total_tokens)
+        span.set_attribute("cost", usage.total.cost)
+    result.usage = usage.summary()
+    logger.info("run usage", path=result.path, **usage.total.to_dict())
+    return result
+
+
+async def _run_cascade(
+    provider: AsyncOpenRouterProvider,
+    consensus_config: ConsensusConfig,
+    cascade: CascadeConfig,
+    initial_conversation: list[Message],
+    embedding_model: EmbeddingModel | None,
+) -> tuple[float | None, ConsensusResult | None]:
+    """
+    Answer with the fast model if a second cheap answer agrees with it.
+
+    :param provider: An instance of an AsyncOpenRouterProvider.
+    :param consensus_config: An instance of ConsensusConfig.
+    :param cascade: The fast model, optional verifier and threshold.
+    :param initial_conversation: the input user prompt with system instructions.
+    :param embedding_model: Embeds the answers to compare them.
+    :return: The agreement score (None if a request failed) and the fast
+        model's answer as a result, or None if full consensus should run.
+    """
+    checker = cascade.verifier or cascade.model
+    fast, check = await asyncio.gather(
+        _get_response_for_model(
+            provider, consensus_config, cascade.model, initial_conversation, None
+        ),
+        _get_response_for_model(
+            provider, consensus_config, checker, initial_conversation, None
+        ),
+        return_exceptions=True,
+    )
+    if isinstance(fast, BaseException) or isinstance(check, BaseException):
+        error = fast if isinstance(fast, BaseException) else check
+        logger.warning("cascade request failed, escalating", error=str(error))
+        return None, None
+    (model_id, answer), (_, check_answer) = fast, check
+    confidence = await agreement(
+        answer,
+        check_answer,
+        consensus_config.aggregator_config.answer_schema,
+        embedding_model,
+    )
+    escalate = confidence < cascade.threshold
+    logger.info(
+        "cascade answered",
+        model_id=model_id,
+        confidence=round(confidence, 4),
+        escalate=escalate,
+    )
+    if escalate:
+        return confidence, None
+    return confidence, ConsensusResult(
+        response=answer,
+        shapley_values={
+            **dict.fromkeys((m.model_id for m in consensus_config.models), 0.0),
+            model_id: 1.0,
+        },
+        path=CASCADE,
+        rounds={
+            "initial_conversation": initial_conversation,
+            CASCADE: {"answer": answer, "check": check_answer},
+        },
+    )
 
-    Returns: aggregated response (str)
-    All responses are stored in response_data and can be returned for future use.
+
+async def _select_models(
+    consensus_config: ConsensusConfig,
+    responses: dict[str, str],
+    aggregated_response: str,
+    embedding_model: EmbeddingModel | None,
+) -> list[ModelConfig]:
+    """
+    Choose the models to re-query in an improvement round.
+
+    Without a requery_threshold every model is re-queried. Otherwise only
+    models whose last response diverges from the aggregate by more than the
+    threshold, or that have no response, are; the rest keep their response.
+
+    :param consensus_config: An instance of ConsensusConfig.
+    :param responses: The latest response of each model.
+    :param aggregated_response: The current aggregate.
+    :param embedding_model: Embeds the responses to measure divergence.
+    :return: The models to re-query, in configuration order.
+    """
+    threshold = consensus_config.requery_threshold
+    if threshold is None:
+        return consensus_config.models
+    divergence = await response_divergence(
+        responses, aggregated_response, embedding_model
+    )
+    models = [
+        model
+        for model in consensus_config.models
+        if divergence.get(model.model_id, math.inf) > threshold
+    ]
+    CONSENSUS_REQUERIES.inc(len(models), result="requeried")
+    CONSENSUS_REQUERIES.inc(len(consensus_config.models) - len(models), result="reused")
+    logger.info(
+        "selected models to re-query",
+        requeried=[model.model_id for model in models],
+        divergence=divergence,
+    )
+    return models
+
+
+def _budget_exceeded(consensus_config: ConsensusConfig, usage: RunUsage) -> str | None:
     """
-    response_data = {}
+    Check the run's usage against the configured caps.
+
+    :param consensus_config: An instance of ConsensusConfig.
+    :param usage: The usage of the run so far.
+    :return: The limit reached ("cost" or "tokens"), or None.
+    """
+    max_cost = consensus_config.max_run_cost
+    if max_cost is not None and usage.total.cost >= max_cost:
+        return "cost"
+    max_tokens = consensus_config.max_run_tokens
+    if max_tokens is not None and usage.total.total_tokens >= max_tokens:
+        return "tokens"
+    return None
+
+
+async def _run_consensus(
+    provider: AsyncOpenRouterProvider,
+    consensus_config: ConsensusConfig,
+    initial_conversation: list[Message],
+    embedding_model: EmbeddingModel | None,
+    usage: RunUsage,
+) -> ConsensusResult:
+    """Run the initial round and improvement rounds while within budget."""
+    context = AggregationContext(
+        provider, consensus_config.aggregator_config, embedding_model
+    )
+    response_data: dict[str, Any] = {}
     response_data["initial_conversation"] = initial_conversation
 
     # Step 1: Initial round.
+    usage.start_round("initial")
     responses = await send_round(
         provider, consensus_config, response_data["initial_conversation"]
     )
-    aggregated_response = await async_centralized_llm_aggregator(
-        provider, consensus_config.aggregator_config, responses
-    )
+    aggregated_response = await aggregate(context, responses)
     logger.info(
         "initial response aggregation complete", aggregated_response=aggregated_response
     )
@@ -45,12 +319,32 @@ async def run_consensus(
 
     # Step 2: Improvement rounds.
     for i in range(consensus_config.iterations):
-        responses = await send_round(
-            provider, consensus_config, initial_conversation, aggregated_response
+        if limit := _budget_exceeded(consensus_config, usage):
+            CONSENSUS_BUDGET_STOPS.inc(limit=limit)
+            logger.warning(
+                "run budget reached, skipping remaining rounds",
+                limit=limit,
+                completed_iterations=i,
+                cost=usage.total.cost,
+                total_tokens=usage.total.total_tokens,
+            )
+            break
+        models = await _select_models(
+            consensus_config, responses, aggregated_response, embedding_model
         )
-        aggregated_response = await async_centralized_llm_aggregator(
-            provider, consensus_config.aggregator_config, responses
+        if not models:
+            logger.info("all responses match the aggregate", completed_iterations=i)
+            break
+        usage.start_round(f"iteration_{i + 1}")
+        fresh = await send_round(
+            provider,
+            consensus_config,
+            initial_conversation,
+            aggregated_response,
+            models=models,
         )
+        responses = {**responses, **fresh}
+        aggregated_response = await aggregate(context, responses)
         logger.info(
             "responses aggregated",
             iteration=i + 1,
@@ -60,21 +354,49 @@ async def run_consensus(
         response_data[f"iteration_{i + 1}"] = responses
         response_data[f"aggregate_{i + 1}"] = aggregated_response
 
-    return aggregated_response
+    # Step 3: Score each model's final response against the aggregate.
+    shapley_values = await shapley_contributions(
+        [model.model_id for model in consensus_config.models],
+        responses,
+        aggregated_response,
+        embedding_model,
+    )
+    return ConsensusResult(
+        response=aggregated_response,
+        shapley_values=shapley_values,
+        rounds=response_data,
+    )
 
 
 def _build_improvement_conversation(
     consensus_config: ConsensusConfig,
     initial_conversation: list[Message],
     aggregated_response: str,
+    prompt_budget: int | None = None,
 ) -> list[Message]:
     """Build an updated conversation using the consensus configuration.
 
     :param consensus_config: An instance of ConsensusConfig.
     :param initial_conversation: the input user prompt with system instructions.
     :param aggregated_response: The aggregated consensus response.
+    :param prompt_budget: Optional token budget for the whole conversation;
+        the aggregated response is compacted to whatever the rest leaves.
     :return: A list of messages for the updated conversation.
     """
+    if prompt_budget is not None:
+        fixed_tokens = estimate_message_tokens(
+            [
+                *initial_conversation,
+                {"role": "user", "content": consensus_config.improvement_prompt},
+                {"role": "system", "content": "Consensus: "},
+            ]
+        )
+        aggregated_response, method = compact_text(
+            aggregated_response, max(prompt_budget - fixed_tokens, 1)
+        )
+        if method is not None:
+            PROMPT_COMPACTIONS.inc(call="improvement", method=method)
+
     conversation = initial_conversation.copy()
 
     # Add aggregated response
@@ -98,7 +420,7 @@ async def _get_response_for_model(
     model: ModelConfig,
     initial_conversation: list[Message],
     aggregated_response: str | None,
-) -> tuple[str | None, str]:
+) -> tuple[str, str]:
     """
     Asynchronously sends a chat completion request for a given model.
 
@@ -117,17 +439,32 @@ async def _get_response_for_model(
     else:
         # Build the improvement conversation.
         conversation = _build_improvement_conversation(
-            consensus_config, initial_conversation, aggregated_response
+            consensus_config,
+            initial_conversation,
+            aggregated_response,
+            model.prompt_budget,
         )
         logger.info("sending improvement prompt", model_id=model.model_id)
 
+    # The initial conversation is the same prefix in every round; mark it so
+    # later rounds are served from the provider's prompt cache.
     payload: ChatRequest = {
         "model": model.model_id,
-        "messages": conversation,
+        "messages": mark_cache_breakpoint(conversation, len(initial_conversation))
+        if model.prompt_cache
+        else conversation,
         "max_tokens": model.max_tokens,
         "temperature": model.temperature,
     }
-    response = await provider.send_chat_completion(payload)
+    prompt_tokens = estimate_message_tokens(conversation)
+    PROMPT_TOKENS.observe(prompt_tokens, model=model.model_id, call="model")
+    with start_span(
+        "get_response_for_model",
+        model_id=model.model_id,
+        prompt_tokens_estimate=prompt_tokens,
+    ) as span:
+        response = await provider.send_chat_completion(payload)
+        span.set_usage(response)
     text = parse_chat_response(response)
     logger.info("new response", model_id=model.model_id, response=text)
     return model.model_id, text
@@ -138,6 +475,7 @@ async def send_round(
     consensus_config: ConsensusConfig,
     initial_conversation: list[Message],
     aggregated_response: str | None = None,
+    models: list[ModelConfig] | None = None,
 ) -> dict:
     """
     Asynchronously sends a round of chat completion requests for all models.
@@ -147,15 +485,23 @@ async def send_round(
     :param initial_conversation: the input user prompt with system instructions.
     :param aggregated_response: The aggregated consensus response from the
         previous round (or None).
+    :param models: The models to query; defaults to all configured models.
     :return: A dictionary mapping model IDs to their response texts.
     """
+    round_type = "initial" if aggregated_response is None else "improvement"
+    models = consensus_config.models if models is None else models
     tasks = [
         _get_response_for_model(
             provider, consensus_config, model, initial_conversation, aggregated_response
         )
-        for model in consensus_config.models
+        for model in models
     ]
-    results = await asyncio.gather(*tasks)
+    with (
+        CONSENSUS_ROUND_DURATION.time(round=round_type),
+        start_span("send_round", round=round_type, models=len(tasks)),
+    ):
+        results = await asyncio.gather(*tasks)
+    CONSENSUS_ROUNDS.inc(round=round_type)
     return dict(results)
 
 
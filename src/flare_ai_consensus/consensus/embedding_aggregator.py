@@ -0,0 +1,149 @@
+"""
+Aggregation by response selection in embedding space, without an LLM call.
+
+Instead of asking an aggregator model to synthesize the responses, these
+approaches embed them and return the one that best represents the ensemble:
+
+    medoid: the response with the highest mean cosine similarity to the others
+    centrality: the response closest to the centrality-weighted centroid, where
+        each response is weighted by a softmax over its mean similarity, so
+        outlying answers pull the centroid less than under a plain mean
+
+Both are a handful of vectorized NumPy operations on an (n, dim) matrix, so a
+round finishes as soon as the embeddings are available (in-process for the
+local embedding backend).
+"""
+
+from typing import Final
+
+import numpy as np
+import numpy.typing as npt
+import structlog
+
+from flare_ai_consensus.embeddings import EmbeddingModel, Vectors, get_shared_model
+from flare_ai_consensus.settings import AggregatorConfig
+from flare_ai_consensus.telemetry import AGGREGATOR_LATENCY, start_span
+
+logger = structlog.get_logger(__name__)
+
+MEDOID: Final[str] = "medoid"
+CENTRALITY: Final[str] = "centrality"
+EMBEDDING_APPROACHES: Final[frozenset[str]] = frozenset({MEDOID, CENTRALITY})
+
+
+def mean_similarity(embeddings: Vectors) -> npt.NDArray[np.float32]:
+    """
+    Mean cosine similarity of each row to every other row.
+
+    :param embeddings: Unit-norm embeddings, one row per response.
+    :return: One score per row; 1.0 for a single row.
+    """
+    n = embeddings.shape[0]
+    if n == 1:
+        return np.ones(1, dtype=np.float32)
+    similarity = embeddings @ embeddings.T
+    return (similarity.sum(axis=1) - np.diagonal(similarity)) / (n - 1)
+
+
+def medoid_index(embeddings: Vectors) -> int:
+    """
+    Index of the medoid: the row with the highest mean similarity to the rest.
+
+    :param embeddings: Unit-norm embeddings, one row per response.
+    :return: The medoid's row index.
+    """
+    return int(np.argmax(mean_similarity(embeddings)))
+
+
+def centrality_weights(
+    embeddings: Vectors, temperature: float = 0.1
+) -> npt.NDArray[np.float32]:
+    """
+    Softmax weights over mean similarity; central responses weigh more.
+
+    :param embeddings: Unit-norm embeddings, one row per response.
+    :param temperature: Softmax temperature; lower values concentrate the
+        weight on the most central responses.
+    :return: Non-negative weights summing to 1.
+    """
+    scores = mean_similarity(embeddings) / temperature
+    weights = np.exp(scores - scores.max())
+    return weights / weights.sum()
+
+
+def centrality_index(embeddings: Vectors, temperature: float = 0.1) -> int:
+    """
+    Index of the row closest to the centrality-weighted centroid.
+
+    :param embeddings: Unit-norm embeddings, one row per response.
+    :param temperature: Softmax temperature for `centrality_weights`.
+    :return: The selected row index.
+    """
+    centroid = centrality_weights(embeddings, temperature) @ embeddings
+    return int(np.argmax(embeddings @ centroid))
+
+
+async def response_divergence(
+    responses: dict[str, str],
+    reference: str,
+    embedding_model: EmbeddingModel | None = None,
+) -> dict[str, float]:
+    """
+    Cosine distance of each response from a reference text.
+
+    :param responses: A dictionary mapping model IDs to their response texts.
+    :param reference: The text to compare against, e.g. the current aggregate.
+    :param embedding_model: The model used to embed the texts; defaults to a
+        shared local hashing model.
+    :return: A dictionary mapping model IDs to 1 - cosine similarity, in [0, 2].
+    """
+    if not responses:
+        return {}
+    model = embedding_model or get_shared_model()
+    vectors = await model.embed([*responses.values(), reference])
+    similarity = vectors[:-1] @ vectors[-1]
+    return {
+        model_id: round(1.0 - float(s), 6)
+        for model_id, s in zip(responses, similarity, strict=True)
+    }
+
+
+async def embedding_aggregator(
+    aggregator_config: AggregatorConfig,
+    aggregated_responses: dict[str, str],
+    embedding_model: EmbeddingModel | None = None,
+) -> str:
+    """
+    Select the most representative response by embedding similarity.
+
+    :param aggregator_config: An AggregatorConfig whose approach is "medoid"
+        or "centrality".
+    :param aggregated_responses: A dictionary mapping model IDs to their
+        response texts.
+    :param embedding_model: The model used to embed the responses; defaults
+        to a shared local hashing model.
+    :return: The selected response text.
+    :raises ValueError: If the approach is not an embedding approach.
+    """
+    approach = aggregator_config.approach
+    if approach not in EMBEDDING_APPROACHES:
+        msg = f"Unsupported embedding aggregation approach: {approach!r}"
+        raise ValueError(msg)
+    model = embedding_model or get_shared_model()
+    model_ids = list(aggregated_responses)
+    texts = list(aggregated_responses.values())
+
+    with (
+        AGGREGATOR_LATENCY.time(approach=approach),
+        start_span(
+            "embedding_aggregator", approach=approach, responses=len(texts)
+        ) as span,
+    ):
+        embeddings = await model.embed(texts)
+        if approach == MEDOID:
+            index = medoid_index(embeddings)
+        else:
+            index = centrality_index(embeddings)
+        span.set_attribute("selected_model", model_ids[index])
+    logger.info("response selected", approach=approach, model_id=model_ids[index])
+    return texts[index]
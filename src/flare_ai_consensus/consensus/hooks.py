@@ -0,0 +1,20 @@
+from dataclasses import dataclass
+
+from flare_ai_consensus.consensus.pruning import PruningPolicy
+from flare_ai_consensus.embeddings import SemanticCache
+from flare_ai_consensus.transcripts import TranscriptStore
+
+
+@dataclass(frozen=True)
+class RunHooks:
+    """
+    Optional collaborators applied around every consensus run.
+
+    :param pruning: Policy skipping low-influence models.
+    :param semantic_cache: Cache answering near-duplicate requests.
+    :param transcripts: Store receiving every run's transcript.
+    """
+
+    pruning: PruningPolicy | None = None
+    semantic_cache: SemanticCache | None = None
+    transcripts: TranscriptStore | None = None
@@ -0,0 +1,186 @@
+"""
+Contribution-based ensemble pruning from historical runs.
+
+`InfluenceTracker` keeps an exponentially weighted moving average of each
+model's Shapley contribution to the final aggregate, persisted as JSON so the
+history survives restarts. `PruningPolicy` uses it to skip models that rarely
+shape the aggregate:
+
+    - a model is low-influence once it has min_runs observations and its
+      average contribution is below relative_threshold times the mean of all
+      established models
+    - low-influence models are still queried on a sample_rate fraction of
+      requests, so their influence keeps being measured and they can recover
+    - while the provider's load is at or above high_load they are not queried
+    - at least min_models models always run, highest influence first
+
+Contributions are only recorded for models that ran, and are relative to the
+ensemble of that run.
+"""
+
+import json
+import random
+from collections.abc import Callable, Mapping
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from statistics import fmean
+
+import structlog
+
+from flare_ai_consensus.settings import ModelConfig, PruningConfig
+from flare_ai_consensus.telemetry import CONSENSUS_PRUNED_MODELS
+
+logger = structlog.get_logger(__name__)
+
+
+@dataclass
+class ModelInfluence:
+    """
+    Influence history of one model.
+
+    :param runs: Number of runs the model took part in.
+    :param influence: Moving average of its contribution to the aggregate.
+    """
+
+    runs: int = 0
+    influence: float = 0.0
+
+
+class InfluenceTracker:
+    """Moving averages of per-model contributions, persisted as JSON."""
+
+    def __init__(
+        self, path: Path | None = None, decay: float = 0.05, save_every: int = 10
+    ) -> None:
+        """
+        :param path: JSON file holding the history; None keeps it in memory.
+        :param decay: Weight of each new observation in the moving average.
+        :param save_every: Write the file after this many recorded runs.
+        """
+        self.path = path
+        self.decay = decay
+        self.save_every = save_every
+        self.models: dict[str, ModelInfluence] = {}
+        self._unsaved = 0
+        self.load()
+
+    def get(self, model_id: str) -> ModelInfluence | None:
+        """Return a model's history, or None if it was never recorded."""
+        return self.models.get(model_id)
+
+    def update(self, contributions: Mapping[str, float]) -> None:
+        """
+        Record one run's contributions.
+
+        :param contributions: A dictionary mapping the models that ran to
+            their contributions.
+        """
+        for model_id, value in contributions.items():
+            stats = self.models.setdefault(model_id, ModelInfluence())
+            if stats.runs == 0:
+                stats.influence = value
+            else:
+                stats.influence += self.decay * (value - stats.influence)
+            stats.runs += 1
+        self._unsaved += 1
+        if self._unsaved >= self.save_every:
+            self.save()
+
+    def load(self) -> None:
+        """Read the history from the file, if it exists and is valid."""
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            data = json.loads(self.path.read_text())
+            self.models = {k: ModelInfluence(**v) for k, v in data.items()}
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning("ignoring unreadable influence history", error=str(e))
+
+    def save(self) -> None:
+        """Write the history atomically, replacing the previous file."""
+        self._unsaved = 0
+        if self.path is None:
+            return
+        data = {k: asdict(v) for k, v in self.models.items()}
+        tmp = self.path.with_suffix(".tmp")
+        try:
+            tmp.write_text(json.dumps(data, indent=2))
+            tmp.replace(self.path)
+        except OSError as e:
+            logger.warning("failed to save influence history", error=str(e))
+
+
+class PruningPolicy:
+    """Chooses which models run for a request from their influence history."""
+
+    def __init__(
+        self,
+        config: PruningConfig,
+        tracker: InfluenceTracker,
+        load: Callable[[], float] | None = None,
+        rng: random.Random | None = None,
+    ) -> None:
+        """
+        :param config: Thresholds and rates of the policy.
+        :param tracker: The per-model influence history.
+        :param load: Returns the current load, e.g. the provider's pending
+            requests as a fraction of its concurrency cap.
+        :param rng: Random source for sampling low-influence models.
+        """
+        self.config = config
+        self.tracker = tracker
+        self._load = load
+        # Only picks which low-influence models to sample; not security related.
+        self._rng = rng or random.Random()  # noqa: S311
+
+    def low_influence(self, models: list[ModelConfig]) -> set[str]:
+        """
+        Find the established models whose influence is well below average.
+
+        :param models: The configured models.
+        :return: The IDs of the low-influence models.
+        """
+        established = {
+            m.model_id: stats.influence
+            for m in models
+            if (stats := self.tracker.get(m.model_id))
+            and stats.runs >= self.config.min_runs
+        }
+        if not established:
+            return set()
+        cutoff = self.config.relative_threshold * fmean(established.values())
+        return {model_id for model_id, v in established.items() if v < cutoff}
+
+    def select(self, models: list[ModelConfig]) -> list[ModelConfig]:
+        """
+        Choose the models to query for one request.
+
+        :param models: The configured models.
+        :return: The selected models, in configuration order.
+        """
+        low = self.low_influence(models)
+        if not low:
+            return models
+        high_load = self._load is not None and self._load() >= self.config.high_load
+        selected = {
+            m.model_id
+            for m in models
+            if m.model_id not in low
+            or (not high_load and self._rng.random() < self.config.sample_rate)
+        }
+        dropped = sorted(
+            (m.model_id for m in models if m.model_id not in selected),
+            key=lambda model_id: self.tracker.models[model_id].influence,
+            reverse=True,
+        )
+        while len(selected) < self.config.min_models and dropped:
+            selected.add(dropped.pop(0))
+        for model_id in dropped:
+            CONSENSUS_PRUNED_MODELS.inc(model=model_id)
+        if dropped:
+            logger.info("models pruned", pruned=dropped, high_load=high_load)
+        return [m for m in models if m.model_id in selected]
+
+    def record(self, contributions: Mapping[str, float]) -> None:
+        """Record the contributions of the models that ran."""
+        self.tracker.update(contributions)
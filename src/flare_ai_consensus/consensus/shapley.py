@@ -0,0 +1,142 @@
+"""
+Model contribution scores from response embeddings, without extra LLM calls.
+
+The value of a coalition of models is the cosine similarity between the mean
+embedding of its members' responses and the embedding of the final aggregate
+(0 for the empty coalition). Each model's Shapley value is its average marginal
+gain in that value over all orderings in which the coalition could form.
+
+Coalition values only need the Gram matrix of the response embeddings and
+their similarities to the aggregate, so after one (n, dim) product the cost no
+longer depends on the embedding size. For up to max_exact models every
+coalition is enumerated: the 2^n coalition values are computed at once from a
+bitmask matrix, and each model's value is the weighted sum of its marginal
+gains. For larger ensembles, orderings are sampled and all prefix coalitions
+of all samples are evaluated in one batch, giving an unbiased estimate.
+"""
+
+import math
+import time
+from typing import Final
+
+import numpy as np
+import numpy.typing as npt
+import structlog
+
+from flare_ai_consensus.embeddings import EmbeddingModel, Vectors, get_shared_model
+from flare_ai_consensus.telemetry import start_span
+
+logger = structlog.get_logger(__name__)
+
+MIN_NORM: Final[float] = 1e-12
+
+
+def _cosine(dots: np.ndarray, squared_norms: np.ndarray) -> np.ndarray:
+    """Cosine similarity of summed coalition vectors to the target."""
+    norms = np.sqrt(np.maximum(squared_norms, 0.0))
+    return np.divide(dots, norms, out=np.zeros_like(dots), where=norms > MIN_NORM)
+
+
+def exact_shapley(embeddings: Vectors, target: Vectors) -> npt.NDArray[np.float64]:
+    """
+    Exact Shapley values by enumerating every coalition.
+
+    :param embeddings: Unit-norm response embeddings, one row per model.
+    :param target: Unit-norm embedding of the aggregate.
+    :return: One contribution per row, summing to the grand coalition's value.
+    """
+    n = embeddings.shape[0]
+    gram = (embeddings @ embeddings.T).astype(np.float64)
+    alignment = (embeddings @ target).astype(np.float64)
+    masks = np.arange(1 << n)
+    members = ((masks[:, None] >> np.arange(n)) & 1).astype(np.float64)
+    values = _cosine(members @ alignment, ((members @ gram) * members).sum(axis=1))
+    sizes = members.sum(axis=1)
+    # Weight of a coalition S not containing i: |S|! (n - |S| - 1)! / n!
+    weights = np.array(
+        [
+            math.factorial(s) * math.factorial(n - s - 1) / math.factorial(n)
+            for s in range(n)
+        ]
+    )
+    contributions = np.empty(n)
+    for i in range(n):
+        without = masks[members[:, i] == 0]
+        gains = values[without | (1 << i)] - values[without]
+        contributions[i] = weights[sizes[without].astype(int)] @ gains
+    return contributions
+
+
+def sampled_shapley(
+    embeddings: Vectors, target: Vectors, samples: int, seed: int | None = None
+) -> npt.NDArray[np.float64]:
+    """
+    Monte Carlo Shapley estimate from random orderings of the models.
+
+    :param embeddings: Unit-norm response embeddings, one row per model.
+    :param target: Unit-norm embedding of the aggregate.
+    :param samples: Number of orderings to sample.
+    :param seed: Optional seed for reproducible estimates.
+    :return: One estimated contribution per row.
+    """
+    n = embeddings.shape[0]
+    gram = (embeddings @ embeddings.T).astype(np.float64)
+    alignment = (embeddings @ target).astype(np.float64)
+    rng = np.random.default_rng(seed)
+    orderings = np.argsort(rng.random((samples, n)), axis=1)
+    # Squared norm of each prefix sum: the leading k x k block of the
+    # permuted Gram matrix, read off the diagonal of its 2-D running sum.
+    permuted = gram[orderings[:, :, None], orderings[:, None, :]]
+    squared_norms = np.diagonal(permuted.cumsum(axis=1).cumsum(axis=2), 0, 1, 2)
+    values = _cosine(np.cumsum(alignment[orderings], axis=1), squared_norms)
+    gains = np.diff(values, axis=1, prepend=0.0)
+    contributions = np.zeros(n)
+    np.add.at(contributions, orderings.ravel(), gains.ravel())
+    return contributions / samples
+
+
+async def shapley_contributions(  # noqa: PLR0913
+    model_ids: list[str],
+    responses: dict[str, str],
+    aggregated_response: str,
+    embedding_model: EmbeddingModel | None = None,
+    *,
+    max_exact: int = 10,
+    samples: int = 512,
+) -> dict[str, float]:
+    """
+    Score how much each model's response contributed to the aggregate.
+
+    :param model_ids: Every model in the ensemble; models without a response
+        in the final round score 0.
+    :param responses: A dictionary mapping model IDs to their final-round
+        response texts.
+    :param aggregated_response: The final aggregated response.
+    :param embedding_model: The model used to embed the texts; defaults to a
+        shared local hashing model.
+    :param max_exact: Largest ensemble scored by exact enumeration.
+    :param samples: Orderings sampled for larger ensembles.
+    :return: A dictionary mapping each model ID to its contribution.
+    """
+    contributions = dict.fromkeys(model_ids, 0.0)
+    if not responses:
+        return contributions
+    model = embedding_model or get_shared_model()
+    start = time.perf_counter()
+    with start_span("shapley_contributions", models=len(responses)) as span:
+        vectors = await model.embed([*responses.values(), aggregated_response])
+        embeddings, target = vectors[:-1], vectors[-1]
+        exact = len(responses) <= max_exact
+        if exact:
+            values = exact_shapley(embeddings, target)
+        else:
+            values = sampled_shapley(embeddings, target, samples)
+        span.set_attribute("exact", exact)
+    for model_id, value in zip(responses, values, strict=True):
+        contributions[model_id] = round(float(value), 6)
+    logger.debug(
+        "contributions computed",
+        exact=exact,
+        duration_ms=round((time.perf_counter() - start) * 1000, 3),
+    )
+    return contributions
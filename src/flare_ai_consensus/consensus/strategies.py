@@ -0,0 +1,238 @@
+"""
+Registry of aggregation strategies, selected by `AggregatorConfig.approach`.
+
+Each strategy turns one round of responses into the aggregated response.
+Built-in approaches:
+
+    centralized: an aggregator LLM synthesizes the responses (also used for an
+        empty or unknown approach)
+    tree_reduce: the aggregator LLM combines groups of fan_in responses in
+        parallel, level by level, until one response remains
+    medoid, centrality: embedding-based response selection
+    majority_vote, weighted_vote, median, trimmed_mean: votes over answers
+        extracted with the aggregator's answer_schema
+
+Vote strategies fall back to the centralized LLM aggregator when the schema is
+missing or too few responses contain a valid answer. `aggregate_sync` applies
+the same votes for synchronous callers such as the NFT monitor; any other
+approach runs the synchronous centralized aggregator there.
+
+Usage:
+    @register_aggregator("longest")
+    async def longest(context, responses):
+        return max(responses.values(), key=len)
+"""
+
+from collections.abc import Awaitable, Callable, Mapping
+from dataclasses import dataclass
+from typing import Final
+
+import structlog
+
+from flare_ai_consensus.consensus.aggregator import (
+    async_centralized_llm_aggregator,
+    async_tree_llm_aggregator,
+    centralized_llm_aggregator,
+)
+from flare_ai_consensus.consensus.embedding_aggregator import (
+    EMBEDDING_APPROACHES,
+    embedding_aggregator,
+)
+from flare_ai_consensus.consensus.vote_aggregator import (
+    Answer,
+    ExtractionError,
+    extract_answers,
+    format_answer,
+    majority_vote,
+    median,
+    trimmed_mean,
+    weighted_vote,
+)
+from flare_ai_consensus.embeddings import EmbeddingModel
+from flare_ai_consensus.router import AsyncOpenRouterProvider, OpenRouterProvider
+from flare_ai_consensus.settings import AggregatorConfig
+from flare_ai_consensus.telemetry import (
+    AGGREGATOR_FALLBACKS,
+    AGGREGATOR_LATENCY,
+    start_span,
+)
+
+logger = structlog.get_logger(__name__)
+
+CENTRALIZED: Final[str] = "centralized"
+TREE_REDUCE: Final[str] = "tree_reduce"
+
+
+@dataclass
+class AggregationContext:
+    """
+    Everything a strategy may need besides the responses.
+
+    :param provider: An asynchronous OpenRouter provider for LLM strategies.
+    :param aggregator_config: The aggregator configuration.
+    :param embedding_model: Embedding model for embedding-based strategies.
+    """
+
+    provider: AsyncOpenRouterProvider
+    aggregator_config: AggregatorConfig
+    embedding_model: EmbeddingModel | None = None
+
+
+type AggregationStrategy = Callable[
+    [AggregationContext, dict[str, str]], Awaitable[str]
+]
+
+_strategies: dict[str, AggregationStrategy] = {}
+
+
+def register_aggregator(
+    name: str,
+) -> Callable[[AggregationStrategy], AggregationStrategy]:
+    """
+    Register a strategy under an approach name, replacing any existing one.
+
+    :param name: The approach name used in `AggregatorConfig.approach`.
+    :return: A decorator registering the strategy and returning it unchanged.
+    """
+
+    def decorator(strategy: AggregationStrategy) -> AggregationStrategy:
+        _strategies[name] = strategy
+        return strategy
+
+    return decorator
+
+
+def get_aggregator(approach: str) -> AggregationStrategy:
+    """
+    Look up the strategy for an approach.
+
+    :param approach: The approach name; empty or unknown names select the
+        centralized LLM aggregator.
+    :return: The registered strategy.
+    """
+    strategy = _strategies.get(approach or CENTRALIZED)
+    if strategy is None:
+        logger.warning("unknown aggregation approach", approach=approach)
+        return _strategies[CENTRALIZED]
+    return strategy
+
+
+def available_aggregators() -> list[str]:
+    """Return the registered approach names."""
+    return sorted(_strategies)
+
+
+async def aggregate(context: AggregationContext, responses: dict[str, str]) -> str:
+    """
+    Aggregate one round with the strategy selected by the configured approach.
+
+    :param context: The provider, aggregator configuration and embedding model.
+    :param responses: A dictionary mapping model IDs to their response texts.
+    :return: The aggregated response.
+    """
+    strategy = get_aggregator(context.aggregator_config.approach)
+    return await strategy(context, responses)
+
+
+@register_aggregator(CENTRALIZED)
+async def _centralized(context: AggregationContext, responses: dict[str, str]) -> str:
+    return await async_centralized_llm_aggregator(
+        context.provider, context.aggregator_config, responses
+    )
+
+
+@register_aggregator(TREE_REDUCE)
+async def _tree_reduce(context: AggregationContext, responses: dict[str, str]) -> str:
+    return await async_tree_llm_aggregator(
+        context.provider, context.aggregator_config, responses
+    )
+
+
+async def _embedding(context: AggregationContext, responses: dict[str, str]) -> str:
+    return await embedding_aggregator(
+        context.aggregator_config, responses, context.embedding_model
+    )
+
+
+for _approach in EMBEDDING_APPROACHES:
+    register_aggregator(_approach)(_embedding)
+
+
+type Combiner = Callable[[Mapping[str, Answer], AggregatorConfig], Answer]
+
+_combiners: dict[str, Combiner] = {}
+
+
+def _vote(
+    name: str, combine: Combiner, config: AggregatorConfig, responses: dict[str, str]
+) -> str:
+    """Extract the answers and combine them, raising ExtractionError on failure."""
+    schema = config.answer_schema
+    if schema is None:
+        msg = f"Approach {name!r} needs an answer_schema"
+        raise ExtractionError(msg)
+    with (
+        AGGREGATOR_LATENCY.time(approach=name),
+        start_span("vote_aggregator", approach=name) as span,
+    ):
+        answers = extract_answers(responses, schema)
+        result = format_answer(combine(answers, config), schema)
+        span.set_attribute("answers", len(answers))
+    logger.info("answers aggregated", approach=name, answers=answers, result=result)
+    return result
+
+
+def _fall_back(name: str, error: ExtractionError) -> None:
+    """Count and log a vote that falls back to the LLM aggregator."""
+    AGGREGATOR_FALLBACKS.inc(approach=name)
+    logger.warning("vote aggregation fell back", approach=name, error=str(error))
+
+
+def _vote_strategy(name: str, combine: Combiner) -> AggregationStrategy:
+    """Wrap a combiner of extracted answers as a strategy with LLM fallback."""
+
+    async def strategy(context: AggregationContext, responses: dict[str, str]) -> str:
+        try:
+            return _vote(name, combine, context.aggregator_config, responses)
+        except ExtractionError as e:
+            _fall_back(name, e)
+            return await _centralized(context, responses)
+
+    _combiners[name] = combine
+    return register_aggregator(name)(strategy)
+
+
+def aggregate_sync(
+    provider: OpenRouterProvider,
+    aggregator_config: AggregatorConfig,
+    responses: dict[str, str],
+) -> str:
+    """
+    Aggregate one round without an event loop.
+
+    Vote approaches are computed locally and fall back to the synchronous
+    centralized LLM aggregator, which also handles every other approach.
+
+    :param provider: A synchronous OpenRouter provider for the LLM fallback.
+    :param aggregator_config: The aggregator configuration.
+    :param responses: A dictionary mapping model IDs to their response texts.
+    :return: The aggregated response.
+    """
+    name = aggregator_config.approach
+    combine = _combiners.get(name)
+    if combine is not None:
+        try:
+            return _vote(name, combine, aggregator_config, responses)
+        except ExtractionError as e:
+            _fall_back(name, e)
+    return centralized_llm_aggregator(provider, aggregator_config, responses)
+
+
+_vote_strategy("majority_vote", lambda answers, _: majority_vote(answers))
+_vote_strategy(
+    "weighted_vote", lambda answers, config: weighted_vote(answers, config.weights)
+)
+_vote_strategy("median", lambda answers, _: median(answers))
+_vote_strategy(
+    "trimmed_mean", lambda answers, config: trimmed_mean(answers, config.trim)
+)
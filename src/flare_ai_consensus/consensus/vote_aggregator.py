@@ -0,0 +1,200 @@
+"""
+Vote and robust-statistic aggregation over answers extracted from responses.
+
+For structured tasks (a score, a yes/no verdict, one label out of a fixed
+set) the aggregator LLM only has to count. These functions pull a typed value
+out of each response with an `AnswerSchema` and combine the values directly:
+
+    majority_vote: the most common value
+    weighted_vote: the value with the highest total model weight
+    median: the median of numeric values
+    trimmed_mean: the mean after discarding a fraction of the extremes
+
+If too few responses yield a value, `ExtractionError` is raised so that the
+caller can fall back to an LLM aggregator.
+"""
+
+import math
+import re
+import statistics
+from collections import Counter
+from collections.abc import Mapping
+from typing import Final
+
+from flare_ai_consensus.settings import AnswerSchema
+
+type Answer = str | float
+
+NUMBER_PATTERN: Final[str] = r"-?\d+(?:\.\d+)?"
+BOOLEAN_PATTERN: Final[str] = r"\b(yes|no|true|false)\b"
+TRUE_WORDS: Final[frozenset[str]] = frozenset({"yes", "true"})
+
+
+class ExtractionError(Exception):
+    """Raised when too few responses contain an answer matching the schema."""
+
+
+def _search(pattern: str, text: str) -> str | None:
+    """Return the first match of a pattern, or its first group if it has one."""
+    match = re.search(pattern, text, re.IGNORECASE)
+    if match is None:
+        return None
+    return match.group(1) if match.groups() else match.group(0)
+
+
+def _extract_choice(text: str, schema: AnswerSchema) -> str | None:
+    """The configured label matched by the pattern, or mentioned first."""
+    if schema.pattern:
+        raw = _search(schema.pattern, text)
+        labels = {c.lower(): c for c in schema.choices}
+        return labels.get(raw.strip().lower()) if raw else None
+    positions = [
+        (match.start(), choice)
+        for choice in schema.choices
+        if (match := re.search(rf"\b{re.escape(choice)}\b", text, re.IGNORECASE))
+    ]
+    return min(positions)[1] if positions else None
+
+
+def _extract_boolean(text: str, schema: AnswerSchema) -> str | None:
+    """Map the first yes/no/true/false in the text to "yes" or "no"."""
+    raw = _search(schema.pattern or BOOLEAN_PATTERN, text)
+    if raw is None or raw.lower() not in {"yes", "no", "true", "false"}:
+        return None
+    return "yes" if raw.lower() in TRUE_WORDS else "no"
+
+
+def _parse_number(raw: str, schema: AnswerSchema) -> float | None:
+    """Parse a number, or None if it is invalid or outside the bounds."""
+    try:
+        value = float(raw)
+    except ValueError:
+        return None
+    low = schema.minimum if schema.minimum is not None else -math.inf
+    high = schema.maximum if schema.maximum is not None else math.inf
+    if not low <= value <= high:
+        return None
+    return float(round(value)) if schema.type == "integer" else value
+
+
+def _extract_number(text: str, schema: AnswerSchema) -> float | None:
+    """
+    The number matched by the pattern or, without one, the last number in the
+    text that lies within the schema's bounds. Responses tend to state their
+    answer last, after restating scales such as "0-100".
+    """
+    if schema.pattern:
+        raw = _search(schema.pattern, text)
+        return _parse_number(raw, schema) if raw is not None else None
+    for raw in reversed(re.findall(NUMBER_PATTERN, text)):
+        if (value := _parse_number(raw, schema)) is not None:
+            return value
+    return None
+
+
+def extract_answer(text: str, schema: AnswerSchema) -> Answer | None:
+    """
+    Extract a typed answer from a response.
+
+    :param text: The response text.
+    :param schema: The expected answer type, bounds and optional pattern.
+    :return: A float for numeric schemas, "yes"/"no" for booleans, the
+        canonical label for choices, or None if no valid answer was found.
+    """
+    if schema.type == "choice":
+        return _extract_choice(text, schema)
+    if schema.type == "boolean":
+        return _extract_boolean(text, schema)
+    return _extract_number(text, schema)
+
+
+def extract_answers(
+    responses: Mapping[str, str], schema: AnswerSchema
+) -> dict[str, Answer]:
+    """
+    Extract answers from every response and enforce the schema's quorum.
+
+    :param responses: A dictionary mapping model IDs to their response texts.
+    :param schema: The expected answer type and quorum.
+    :return: A dictionary mapping model IDs to their extracted answers.
+    :raises ExtractionError: If fewer than min_valid of the responses contain
+        a valid answer.
+    """
+    answers = {
+        model_id: answer
+        for model_id, text in responses.items()
+        if (answer := extract_answer(text, schema)) is not None
+    }
+    required = max(1, math.ceil(schema.min_valid * len(responses)))
+    if len(answers) < required:
+        msg = (
+            f"Extracted {len(answers)} of {len(responses)} answers, {required} required"
+        )
+        raise ExtractionError(msg)
+    return answers
+
+
+def format_answer(value: Answer, schema: AnswerSchema) -> str:
+    """Render an aggregated answer in the schema's canonical form."""
+    if isinstance(value, str):
+        return value
+    if schema.type == "integer":
+        return str(round(value))
+    return f"{value:g}"
+
+
+def majority_vote(answers: Mapping[str, Answer]) -> Answer:
+    """
+    The most common answer; ties go to the answer seen first.
+
+    :param answers: A dictionary mapping model IDs to their answers.
+    :return: The winning answer.
+    """
+    return Counter(answers.values()).most_common(1)[0][0]
+
+
+def weighted_vote(
+    answers: Mapping[str, Answer], weights: Mapping[str, float]
+) -> Answer:
+    """
+    The answer with the highest total weight; models default to weight 1.
+
+    :param answers: A dictionary mapping model IDs to their answers.
+    :param weights: A dictionary mapping model IDs to their vote weights.
+    :return: The winning answer.
+    """
+    totals: dict[Answer, float] = {}
+    for model_id, answer in answers.items():
+        totals[answer] = totals.get(answer, 0.0) + weights.get(model_id, 1.0)
+    return max(totals, key=lambda answer: totals[answer])
+
+
+def _numeric(answers: Mapping[str, Answer]) -> list[float]:
+    values = [float(a) for a in answers.values() if not isinstance(a, str)]
+    if not values:
+        msg = "Numeric aggregation needs an integer or number schema"
+        raise ExtractionError(msg)
+    return values
+
+
+def median(answers: Mapping[str, Answer]) -> float:
+    """
+    The median of numeric answers.
+
+    :param answers: A dictionary mapping model IDs to their numeric answers.
+    :return: The median value.
+    """
+    return statistics.median(_numeric(answers))
+
+
+def trimmed_mean(answers: Mapping[str, Answer], trim: float = 0.2) -> float:
+    """
+    The mean of numeric answers after dropping the extremes.
+
+    :param answers: A dictionary mapping model IDs to their numeric answers.
+    :param trim: Fraction of values dropped from each end, rounded down.
+    :return: The trimmed mean.
+    """
+    values = sorted(_numeric(answers))
+    cut = min(int(len(values) * trim), (len(values) - 1) // 2)
+    return statistics.fmean(values[cut : len(values) - cut])
@@ -0,0 +1,20 @@
+from .embedding_model import (
+    LOCAL_MODEL,
+    EmbeddingCacheStats,
+    EmbeddingModel,
+    Vectors,
+    get_shared_model,
+    normalize,
+)
+from .semantic_cache import SemanticCache, system_key
+
+__all__ = [
+    "LOCAL_MODEL",
+    "EmbeddingCacheStats",
+    "EmbeddingModel",
+    "SemanticCache",
+    "Vectors",
+    "get_shared_model",
+    "normalize",
+    "system_key",
+]
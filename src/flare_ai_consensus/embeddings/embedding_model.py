@@ -0,0 +1,236 @@
+"""
+Batched, cached text embeddings for response comparison.
+
+Consensus features that compare model responses (embedding aggregation,
+contribution scores, selective re-query) embed the same texts several times
+per run. `EmbeddingModel` embeds a batch in one call, skips texts it has
+already seen, and returns L2-normalized float32 rows, so cosine similarity is
+a plain matrix product.
+
+Two backends are supported:
+    local: Signed feature hashing of word unigrams and bigrams, computed with
+        NumPy in-process; no network call and no model download
+    remote: Any OpenAI-compatible `/embeddings` endpoint, e.g. OpenRouter,
+        called through an `AsyncOpenRouterProvider` in chunks of batch_size
+
+Classes:
+    EmbeddingCacheStats: Counters describing the vector cache
+    EmbeddingModel: Embeds texts through the configured backend with caching
+"""
+
+import asyncio
+import hashlib
+import itertools
+import re
+import zlib
+from collections import OrderedDict
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Final
+
+import numpy as np
+import numpy.typing as npt
+import structlog
+
+from flare_ai_consensus.router import AsyncOpenRouterProvider, EmbeddingRequest
+from flare_ai_consensus.telemetry import EMBEDDING_CACHE, start_span
+
+logger = structlog.get_logger(__name__)
+
+LOCAL_MODEL: Final[str] = "local"
+WORD_PATTERN: Final[re.Pattern[str]] = re.compile(r"\w+")
+
+type Vectors = npt.NDArray[np.float32]
+
+
+def _features(text: str) -> list[str]:
+    """Lowercased word unigrams and bigrams of a text."""
+    words = WORD_PATTERN.findall(text.lower())
+    return words + [f"{a} {b}" for a, b in itertools.pairwise(words)]
+
+
+def normalize(vectors: npt.ArrayLike) -> Vectors:
+    """
+    Scale each row to unit L2 norm; all-zero rows are left as zeros.
+
+    :param vectors: A 2-D array with one vector per row.
+    :return: A float32 array of unit-norm rows.
+    """
+    matrix = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+
+@dataclass(frozen=True)
+class EmbeddingCacheStats:
+    """
+    Counters describing the vector cache.
+
+    :param hits: Texts answered from the cache.
+    :param misses: Texts that had to be embedded.
+    :param size: Vectors currently cached.
+    """
+
+    hits: int
+    misses: int
+    size: int
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups answered from the cache."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class EmbeddingModel:
+    """
+    Embeds texts in batches and caches the vectors by text digest.
+
+    Usage:
+        model = EmbeddingModel()
+        vectors = await model.embed(["first response", "second response"])
+        similarity = vectors @ vectors.T
+    """
+
+    def __init__(
+        self,
+        provider: AsyncOpenRouterProvider | None = None,
+        model_id: str = LOCAL_MODEL,
+        dimensions: int = 512,
+        batch_size: int = 64,
+        cache_size: int = 4096,
+    ) -> None:
+        """
+        :param provider: Async client for the remote `/embeddings` endpoint;
+            required unless model_id is "local".
+        :param model_id: "local" for the hashing backend, otherwise the
+            embedding model to request from the provider.
+        :param dimensions: Vector size of the local backend.
+        :param batch_size: Maximum texts per remote request.
+        :param cache_size: Maximum vectors kept in the LRU cache.
+        """
+        if model_id != LOCAL_MODEL and provider is None:
+            msg = f"Embedding model {model_id!r} needs a provider"
+            raise ValueError(msg)
+        self.provider = provider
+        self.model_id = model_id
+        self.dimensions = dimensions
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+        self._cache: OrderedDict[bytes, Vectors] = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def is_local(self) -> bool:
+        """Whether vectors are computed in-process."""
+        return self.model_id == LOCAL_MODEL
+
+    async def embed(self, texts: Sequence[str]) -> Vectors:
+        """
+        Embed texts, reusing cached vectors and embedding the rest in batches.
+
+        :param texts: The texts to embed; duplicates are embedded once.
+        :return: A (len(texts), dim) float32 array of unit-norm rows.
+        """
+        keys = [hashlib.sha256(text.encode()).digest() for text in texts]
+        # Vectors for this call are kept here, so evictions by the LRU, within
+        # this call or by a concurrent one across the await, cannot lose them.
+        found: dict[bytes, Vectors] = {}
+        missing: dict[bytes, str] = {}
+        for key, text in zip(keys, texts, strict=True):
+            if key in found or key in missing:
+                continue
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                found[key] = cached
+            else:
+                missing[key] = text
+        hits = len(texts) - len(missing)
+        self._hits += hits
+        self._misses += len(missing)
+        EMBEDDING_CACHE.inc(hits, result="hit")
+        EMBEDDING_CACHE.inc(len(missing), result="miss")
+
+        if missing:
+            with start_span(
+                "embed", model_id=self.model_id, texts=len(missing)
+            ) as span:
+                vectors = await self._embed_uncached(list(missing.values()))
+                span.set_attribute("cached", hits)
+            found.update(zip(missing, vectors, strict=True))
+
+        if not texts:
+            return np.zeros((0, self.dimensions), dtype=np.float32)
+        result = np.stack([found[key] for key in keys])
+        for key in missing:
+            self._store(key, found[key])
+        return result
+
+    def cache_stats(self) -> EmbeddingCacheStats:
+        """Return counters describing the vector cache."""
+        return EmbeddingCacheStats(
+            hits=self._hits, misses=self._misses, size=len(self._cache)
+        )
+
+    def _store(self, key: bytes, vector: Vectors) -> None:
+        """Cache one vector, evicting the least recently used beyond the cap."""
+        vector.flags.writeable = False
+        self._cache[key] = vector
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def _embed_uncached(self, texts: list[str]) -> Vectors:
+        if self.is_local:
+            return self._embed_local(texts)
+        chunks = [
+            texts[i : i + self.batch_size]
+            for i in range(0, len(texts), self.batch_size)
+        ]
+        results = await asyncio.gather(*(self._embed_remote(c) for c in chunks))
+        return np.concatenate(results)
+
+    def _embed_local(self, texts: list[str]) -> Vectors:
+        """
+        Hash each feature to a signed bucket and sum the counts per text.
+
+        Counts are damped with log1p so repeated words do not dominate.
+        """
+        rows: list[int] = []
+        columns: list[int] = []
+        signs: list[float] = []
+        for row, text in enumerate(texts):
+            for feature in _features(text):
+                digest = zlib.crc32(feature.encode())
+                rows.append(row)
+                columns.append(digest % self.dimensions)
+                signs.append(1.0 if digest & 0x80000000 else -1.0)
+        counts = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        np.add.at(counts, (np.array(rows), np.array(columns)), np.array(signs))
+        return normalize(np.sign(counts) * np.log1p(np.abs(counts)))
+
+    async def _embed_remote(self, texts: list[str]) -> Vectors:
+        """Embed one chunk of texts through the provider."""
+        if self.provider is None:
+            msg = f"Embedding model {self.model_id!r} needs a provider"
+            raise ValueError(msg)
+        payload: EmbeddingRequest = {"model": self.model_id, "input": texts}
+        response = await self.provider.send_embeddings(payload)
+        data = sorted(response.get("data", []), key=lambda item: item["index"])
+        if len(data) != len(texts):
+            msg = f"Expected {len(texts)} embeddings, received {len(data)}"
+            raise ValueError(msg)
+        return normalize([item["embedding"] for item in data])
+
+
+_shared_model: EmbeddingModel | None = None
+
+
+def get_shared_model() -> EmbeddingModel:
+    """Return the process-wide local model used when none is configured."""
+    global _shared_model  # noqa: PLW0603
+    if _shared_model is None:
+        _shared_model = EmbeddingModel()
+    return _shared_model
@@ -0,0 +1,245 @@
+"""
+Semantic answer cache in front of the consensus pipeline.
+
+Only the user message is embedded; the system message must match exactly,
+compared by a hash kept next to each entry. The cache searches the embeddings
+of past requests with the same system message by cosine similarity: one
+matrix-vector product over a preallocated (max_entries, dim) float32 matrix.
+If the best match reaches the threshold, its stored answer is returned
+instead of running consensus.
+
+When the cache is full, the least recently used entry is overwritten. The
+index is saved as a single .npz file (vectors, system message hashes,
+last-use clock and the answers as JSON) under the data path, written
+atomically in a background thread, and loaded on startup if it was built with
+the same embedding model and vector size.
+
+The cache requires a semantic embedding model: the local hashing model only
+measures word overlap, so different questions sharing most of their words
+would be answered from each other.
+"""
+
+import asyncio
+import hashlib
+import json
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import structlog
+
+from flare_ai_consensus.embeddings.embedding_model import EmbeddingModel
+from flare_ai_consensus.telemetry import SEMANTIC_CACHE, SEMANTIC_CACHE_ENTRIES
+
+logger = structlog.get_logger(__name__)
+
+
+def system_key(system_message: str) -> int:
+    """Hash a system message into the key that entries must match exactly."""
+    digest = hashlib.blake2b(system_message.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, signed=True)
+
+
+class SemanticCache:
+    """Bounded LRU cache of answers, looked up by embedding similarity."""
+
+    def __init__(
+        self,
+        embedding_model: EmbeddingModel,
+        path: Path | None = None,
+        max_entries: int = 10000,
+        threshold: float = 0.95,
+        save_every: int = 50,
+    ) -> None:
+        """
+        :param embedding_model: Embeds the requests; must be a semantic
+            model, not the local hashing model.
+        :param path: The .npz file holding the index; None keeps it in memory.
+        :param max_entries: Maximum number of cached answers.
+        :param threshold: Minimum cosine similarity for a hit.
+        :param save_every: Write the file after this many new entries.
+        :raises ValueError: If the embedding model is the local hashing model.
+        """
+        if embedding_model.is_local:
+            msg = "the semantic cache needs a semantic EMBEDDING_MODEL, not local"
+            raise ValueError(msg)
+        self.embedding_model = embedding_model
+        self.path = path
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.save_every = save_every
+        self._vectors: np.ndarray | None = None
+        self._system_keys = np.zeros(max_entries, dtype=np.int64)
+        self._last_used = np.zeros(max_entries, dtype=np.int64)
+        self._answers: list[dict[str, str]] = []
+        self._clock = 0
+        self._unsaved = 0
+        self._save_task: asyncio.Task[None] | None = None
+        self.load()
+
+    def __len__(self) -> int:
+        return len(self._answers)
+
+    def _tick(self) -> int:
+        self._clock += 1
+        return self._clock
+
+    async def lookup(
+        self, system_message: str, user_message: str
+    ) -> dict[str, str] | None:
+        """
+        Find the answer to the most similar past request with the same
+        system message.
+
+        :param system_message: The request's system message.
+        :param user_message: The request's user message.
+        :return: The stored answer if the best match reaches the threshold,
+            otherwise None.
+        """
+        if self._vectors is None or not self._answers:
+            SEMANTIC_CACHE.inc(result="miss")
+            return None
+        query = await self.embedding_model.embed([user_message])
+        if query.shape[1] != self._vectors.shape[1]:
+            self._reset(query.shape[1])
+            SEMANTIC_CACHE.inc(result="miss")
+            return None
+        size = len(self._answers)
+        scores = np.where(
+            self._system_keys[:size] == system_key(system_message),
+            self._vectors[:size] @ query[0],
+            -np.inf,
+        )
+        best = int(np.argmax(scores))
+        similarity = float(scores[best])
+        if similarity < self.threshold:
+            SEMANTIC_CACHE.inc(result="miss")
+            logger.debug("semantic cache miss", best_similarity=round(similarity, 4))
+            return None
+        self._last_used[best] = self._tick()
+        SEMANTIC_CACHE.inc(result="hit")
+        logger.info("semantic cache hit", similarity=round(similarity, 4))
+        return self._answers[best]
+
+    async def store(
+        self, system_message: str, user_message: str, answer: dict[str, str]
+    ) -> None:
+        """
+        Cache the answer to a request, evicting the least recently used entry
+        if the cache is full.
+
+        :param system_message: The request's system message.
+        :param user_message: The request's user message.
+        :param answer: The response to return on later hits.
+        """
+        vector = (await self.embedding_model.embed([user_message]))[0]
+        vectors = self._vectors
+        if vectors is None or vectors.shape[1] != vector.shape[0]:
+            vectors = self._reset(vector.shape[0])
+        if len(self._answers) < self.max_entries:
+            slot = len(self._answers)
+            self._answers.append(answer)
+        else:
+            slot = int(np.argmin(self._last_used))
+            self._answers[slot] = answer
+            SEMANTIC_CACHE.inc(result="eviction")
+        vectors[slot] = vector
+        self._system_keys[slot] = system_key(system_message)
+        self._last_used[slot] = self._tick()
+        SEMANTIC_CACHE_ENTRIES.set(len(self._answers))
+        self._unsaved += 1
+        saving = self._save_task is not None and not self._save_task.done()
+        if self._unsaved >= self.save_every and not saving:
+            self._save_task = asyncio.create_task(
+                asyncio.to_thread(self._write, self._snapshot())
+            )
+
+    async def close(self) -> None:
+        """Wait for a background save to finish, then write the index."""
+        if self._save_task is not None:
+            await self._save_task
+            self._save_task = None
+        await asyncio.to_thread(self.save)
+
+    def _reset(self, dimensions: int) -> np.ndarray:
+        """Drop every entry and start an index of the given vector size."""
+        if self._answers:
+            logger.warning(
+                "embedding size changed, clearing semantic cache",
+                entries=len(self._answers),
+                dimensions=dimensions,
+            )
+        self._vectors = np.zeros((self.max_entries, dimensions), np.float32)
+        self._system_keys[:] = 0
+        self._last_used[:] = 0
+        self._answers = []
+        SEMANTIC_CACHE_ENTRIES.set(0)
+        return self._vectors
+
+    def load(self) -> None:
+        """Read the index from the file, if it matches the embedding model."""
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            with np.load(self.path) as data:
+                model_id = str(data["model_id"])
+                vectors = data["vectors"]
+                system_keys = data["system_keys"]
+                last_used = data["last_used"]
+                answers = json.loads(str(data["answers"]))
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("ignoring unreadable semantic cache", error=str(e))
+            return
+        if model_id != self.embedding_model.model_id:
+            logger.info("semantic cache built with another model, starting empty")
+            return
+        if (
+            self.embedding_model.is_local
+            and vectors.shape[1] != self.embedding_model.dimensions
+        ):
+            logger.info(
+                "semantic cache built with another vector size, starting empty",
+                dimensions=int(vectors.shape[1]),
+            )
+            return
+        # Keep the most recently used entries if max_entries shrank.
+        keep = np.argsort(last_used)[::-1][: self.max_entries]
+        self._vectors = np.zeros((self.max_entries, vectors.shape[1]), np.float32)
+        self._vectors[: len(keep)] = vectors[keep]
+        self._system_keys[: len(keep)] = system_keys[keep]
+        self._last_used[: len(keep)] = last_used[keep]
+        self._answers = [answers[i] for i in keep]
+        self._clock = int(last_used.max(initial=0))
+        SEMANTIC_CACHE_ENTRIES.set(len(self._answers))
+        logger.info("semantic cache loaded", entries=len(self._answers))
+
+    def save(self) -> None:
+        """Write the index atomically, replacing the previous file."""
+        self._write(self._snapshot())
+
+    def _snapshot(self) -> dict[str, Any] | None:
+        """Copy the index, so it can be written while new entries arrive."""
+        self._unsaved = 0
+        if self.path is None or self._vectors is None:
+            return None
+        size = len(self._answers)
+        return {
+            "model_id": np.array(self.embedding_model.model_id),
+            "vectors": self._vectors[:size].copy(),
+            "system_keys": self._system_keys[:size].copy(),
+            "last_used": self._last_used[:size].copy(),
+            "answers": list(self._answers),
+        }
+
+    def _write(self, snapshot: dict[str, Any] | None) -> None:
+        """Write a snapshot to a temporary file and move it into place."""
+        if self.path is None or snapshot is None:
+            return
+        tmp = self.path.with_suffix(".tmp")
+        snapshot["answers"] = np.array(json.dumps(snapshot["answers"]))
+        try:
+            with tmp.open("wb") as f:
+                np.savez(f, **snapshot)
+            tmp.replace(self.path)
+        except OSError as e:
+            logger.warning("failed to save semantic cache", error=str(e))
@@ -1,32 +1,135 @@
+from collections.abc import AsyncGenerator
+from contextlib import asynccontextmanager
+
 import structlog
 import uvicorn
 from fastapi import APIRouter, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
-from flare_ai_consensus.api import ChatRouter
+from flare_ai_consensus.api import BatchRouter, ChatRouter, JobQueue, JobsRouter
+from flare_ai_consensus.api.middleware import AdmissionMiddleware, MetricsMiddleware
+from flare_ai_consensus.consensus import (
+    BatchEngine,
+    InfluenceTracker,
+    PruningPolicy,
+    RunHooks,
+)
+from flare_ai_consensus.embeddings import EmbeddingModel, SemanticCache
 from flare_ai_consensus.router import AsyncOpenRouterProvider
-from flare_ai_consensus.settings import settings
+from flare_ai_consensus.settings import ConsensusConfig, settings
+from flare_ai_consensus.telemetry import (
+    CONTENT_TYPE,
+    REGISTRY,
+    ChromeTraceExporter,
+    OTLPExporter,
+    TraceExporter,
+    configure_tracing,
+)
+from flare_ai_consensus.transcripts import TranscriptStore
 from flare_ai_consensus.utils import load_json
 
 logger = structlog.get_logger(__name__)
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncGenerator[None]:
+    """
+    Start the background job workers and transcript writer on startup and
+    stop them on shutdown, saving the models' influence history and the
+    semantic cache.
+    """
+    job_queue: JobQueue = app.state.job_queue
+    hooks: RunHooks = app.state.hooks
+    transcripts = hooks.transcripts
+    if transcripts is not None:
+        await transcripts.start()
+    await job_queue.start()
+    try:
+        yield
+    finally:
+        await job_queue.stop()
+        if transcripts is not None:
+            await transcripts.stop()
+        if hooks.pruning is not None:
+            hooks.pruning.tracker.save()
+        if hooks.semantic_cache is not None:
+            await hooks.semantic_cache.close()
+
+
+def create_hooks(
+    provider: AsyncOpenRouterProvider,
+    consensus_config: ConsensusConfig,
+    embedding_model: EmbeddingModel,
+) -> RunHooks:
+    """
+    Create the optional collaborators enabled by the settings and the config.
+
+    Args:
+        provider: The OpenRouter provider, whose load pauses pruned models.
+        consensus_config: The loaded consensus configuration.
+        embedding_model: Embeds requests for the semantic cache.
+
+    Returns:
+        RunHooks: The pruning policy, semantic cache and transcript store,
+            each None when disabled.
+    """
+    # Skip models that rarely shape the aggregate, judged from persisted history.
+    pruning = None
+    pruning_config = consensus_config.pruning
+    if pruning_config is not None:
+        tracker = InfluenceTracker(
+            settings.data_path / "model_influence.json", decay=pruning_config.decay
+        )
+        pruning = PruningPolicy(pruning_config, tracker, load=lambda: provider.load)
+
+    # Answer near-duplicate requests from earlier consensus results.
+    semantic_cache = None
+    if settings.semantic_cache_enabled:
+        semantic_cache = SemanticCache(
+            embedding_model,
+            settings.data_path / "semantic_cache.npz",
+            max_entries=settings.semantic_cache_size,
+            threshold=settings.semantic_cache_threshold,
+        )
+
+    # Append every run's transcript to compressed, rotated JSONL segments.
+    transcripts = None
+    if settings.transcript_enabled:
+        transcripts = TranscriptStore(
+            settings.data_path / "transcripts",
+            compression=settings.transcript_compression,
+            max_bytes=settings.transcript_max_bytes,
+            queue_size=settings.transcript_queue_size,
+        )
+
+    return RunHooks(
+        pruning=pruning, semantic_cache=semantic_cache, transcripts=transcripts
+    )
+
+
 def create_app() -> FastAPI:
     """
     Create and configure the FastAPI application instance.
 
     This function:
-      1. Creates a new FastAPI instance with optional CORS middleware.
+      1. Creates a new FastAPI instance with optional CORS middleware,
+         admission control, metrics, and health and metrics endpoints.
       2. Loads configuration.
       3. Sets up the OpenRouter client.
       4. Initializes a ChatRouter that wraps the RAG pipeline.
       5. Registers the chat endpoint under the /chat prefix.
+      6. Sets up the job queue and registers the job endpoints under /jobs.
+      7. Registers the NDJSON batch endpoint under /batch.
 
     Returns:
         FastAPI: The configured FastAPI application instance.
     """
     app = FastAPI(
-        title="Flare AI Consensus Learning", version="1.0", redirect_slashes=False
+        title="Flare AI Consensus Learning",
+        version="1.0",
+        redirect_slashes=False,
+        lifespan=lifespan,
     )
 
     # Optional: configure CORS middleware using settings.
@@ -38,23 +141,120 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
+    # Cap concurrent consensus runs and shed load that would miss its deadline.
+    app.add_middleware(
+        AdmissionMiddleware,
+        max_concurrent=settings.admission_max_concurrent,
+        default_deadline=settings.admission_deadline,
+        guarded_prefixes=settings.admission_guarded_prefixes,
+        exempt_paths=settings.admission_exempt_paths,
+    )
+
+    # Batch streams run for minutes, so they get their own slots and latency
+    # window instead of shedding chat requests.
+    app.add_middleware(
+        AdmissionMiddleware,
+        max_concurrent=settings.batch_admission_max_concurrent,
+        default_deadline=settings.batch_admission_deadline,
+        guarded_prefixes=["/api/routes/batch"],
+        exempt_paths=settings.admission_exempt_paths,
+        name="batch_admission",
+    )
+
+    # Track requests in flight; added last so it wraps admission control.
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/health", tags=["health"])
+    async def health() -> dict[str, str]:
+        """Liveness probe, exempt from admission control."""
+        return {"status": "ok"}
+
+    @app.get("/metrics", tags=["health"], response_class=PlainTextResponse)
+    async def metrics() -> PlainTextResponse:
+        """Prometheus metrics in the text exposition format."""
+        return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+    # Sample consensus runs for trace export.
+    exporters: list[TraceExporter] = []
+    if "chrome" in settings.trace_exporters:
+        exporters.append(ChromeTraceExporter(settings.data_path / "traces"))
+    if "otlp" in settings.trace_exporters:
+        exporters.append(OTLPExporter(settings.trace_otlp_endpoint))
+    configure_tracing(settings.trace_sample_rate, exporters)
+
     # Load input configuration.
     config_json = load_json(settings.input_path / "input.json")
     settings.load_consensus_config(config_json)
+    consensus_config = settings.consensus_config
+    if consensus_config is None:
+        msg = "no consensus configuration loaded"
+        raise RuntimeError(msg)
 
     # Initialize the OpenRouter provider.
     provider = AsyncOpenRouterProvider(
-        api_key=settings.open_router_api_key, base_url=settings.open_router_base_url
+        api_key=settings.open_router_api_key,
+        base_url=settings.open_router_base_url,
+        max_concurrency=settings.open_router_max_concurrency,
+    )
+
+    # Embed responses locally or through the provider, shared by all routes.
+    embedding_model = EmbeddingModel(
+        provider=provider,
+        model_id=settings.embedding_model,
+        dimensions=settings.embedding_dimensions,
+        batch_size=settings.embedding_batch_size,
+        cache_size=settings.embedding_cache_size,
     )
 
+    # Cosine agreement of local hashing embeddings is lexical, so a cascade
+    # needs typed answers or a semantic model to catch contradictions.
+    if (
+        consensus_config.cascade is not None
+        and consensus_config.aggregator_config.answer_schema is None
+        and embedding_model.is_local
+    ):
+        msg = (
+            "cascade mode needs an aggregator answer_schema or a semantic "
+            "EMBEDDING_MODEL; local embeddings only measure word overlap"
+        )
+        raise RuntimeError(msg)
+
+    # Pruning, the semantic cache and transcripts apply to chat, jobs and batches.
+    hooks = create_hooks(provider, consensus_config, embedding_model)
+    app.state.hooks = hooks
+
     # Create an APIRouter for chat endpoints and initialize ChatRouter.
     chat_router = ChatRouter(
         router=APIRouter(),
         provider=provider,
-        consensus_config=settings.consensus_config,
+        embedding_model=embedding_model,
+        consensus_config=consensus_config,
+        hooks=hooks,
     )
     app.include_router(chat_router.router, prefix="/api/routes/chat", tags=["chat"])
 
+    # Run chat messages as background jobs drained by a fixed worker pool.
+    job_queue = JobQueue(
+        handler=chat_router.process,
+        workers=settings.job_workers,
+        max_size=settings.job_queue_size,
+        result_ttl=settings.job_result_ttl,
+    )
+    app.state.job_queue = job_queue
+    jobs_router = JobsRouter(router=APIRouter(), job_queue=job_queue)
+    app.include_router(jobs_router.router, prefix="/api/routes/jobs", tags=["jobs"])
+
+    # Run many chat messages per request under one shared concurrency limit.
+    batch_engine = BatchEngine(
+        provider=provider,
+        consensus_config=consensus_config,
+        max_concurrency=settings.batch_max_concurrency,
+        embedding_model=embedding_model,
+        hooks=hooks,
+    )
+    batch_router = BatchRouter(router=APIRouter(), engine=batch_engine)
+    app.include_router(batch_router.router, prefix="/api/routes/batch", tags=["batch"])
+
     return app
 
 
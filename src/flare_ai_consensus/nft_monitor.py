@@ -3,12 +3,24 @@ import sys
 import os
 import re
 import json
+from collections.abc import Generator, Iterable
 from typing import Any
 
 from web3 import Web3
 
-from flare_ai_consensus.consensus.aggregator import centralized_llm_aggregator
-from flare_ai_consensus.settings import AggregatorConfig, ModelConfig
+from flare_ai_consensus.consensus.strategies import aggregate_sync
+from flare_ai_consensus.settings import (
+    AggregatorConfig,
+    AnswerSchema,
+    ModelConfig,
+    settings,
+)
+from flare_ai_consensus.telemetry import (
+    NFT_EVENT_DURATION,
+    NFT_EVENTS,
+    NFT_TRANSACTIONS,
+    start_http_server,
+)
 from flare_ai_consensus.router import OpenRouterProvider
 
 import random
@@ -28,7 +40,26 @@ FLARE_FACT_CHECKER_ADDRESS = "0xBb242f415dd53e47b0a8c6E71f8D1A0A32ce4F90"
 with open("/app/src/flare_ai_consensus/abi.json", "r") as abi_file:
     FLARE_FACT_CHECKER_ABI = json.load(abi_file)
 
+def _timed_events(events: Iterable[Any]) -> Generator[Any]:
+    """Yield events, counting each one and timing how long it takes to process."""
+    for event in events:
+        NFT_EVENTS.inc()
+        start = time.perf_counter()
+        yield event
+        NFT_EVENT_DURATION.observe(time.perf_counter() - start)
+
+
+def _record_transaction(kind: str, status: int) -> None:
+    """Count a mined transaction by kind and outcome."""
+    NFT_TRANSACTIONS.inc(kind=kind, status="success" if status == 1 else "failed")
+
+
 def main():
+    # -----------------------------
+    # Expose metrics (router, aggregator and event loop)
+    # -----------------------------
+    start_http_server(settings.nft_metrics_port)
+
     # -----------------------------
     # Setup Web3
     # -----------------------------
@@ -59,7 +90,7 @@ def main():
     try:
         while True:
             new_events = threshold_filter.get_new_entries()
-            for event in new_events:
+            for event in _timed_events(new_events):
                 # Parse event data
                 request_id = event["args"]["requestId"]
                 on_chain_verifiers = event["args"]["verifiers"]
@@ -84,6 +115,7 @@ def main():
                 aggregated_score = aggregator_score_from_llm(verifier_results_map)
                 aggregated_score_tx_hash=submit_aggregate_result(web3, contract, aggregator_acct, request_id, aggregated_score,verifier_results_map)
                 receipt=web3.eth.wait_for_transaction_receipt(aggregated_score_tx_hash)
+                _record_transaction("submit_aggregate", receipt.status)
 
                 print(f"Aggregated correctness score (0-100): {aggregated_score}. Was aggregated score submitted successfully: ",receipt.status==1,"HASH: ",aggregated_score_tx_hash.hex())      
                 verifier_count = len(on_chain_verifiers)
@@ -95,6 +127,7 @@ def main():
                 )
                 if withdraw_fees_tx_hash:
                     receipt = web3.eth.wait_for_transaction_receipt(withdraw_fees_tx_hash)
+                    _record_transaction("withdraw", receipt.status)
                     if receipt.status == 1:
                         print(f"    Withdraw TX succeeded in block {receipt.blockNumber}")
                     else:
@@ -140,6 +173,7 @@ def main():
                     send_tx_hash = web3.eth.send_raw_transaction(signed_tx.raw_transaction)
                     print(f"        Sending {int(address2reward[v])} wei to {v}. Tx: {send_tx_hash.hex()}")
                     receipt = web3.eth.wait_for_transaction_receipt(send_tx_hash)
+                    _record_transaction("distribute", receipt.status)
                     if receipt.status != 1:
                         print("Distribution transaction failed!")
                         break
@@ -206,7 +240,15 @@ def aggregator_score_from_llm(verifier_results_map: dict[str, Any]) -> int:
             max_tokens=1000,
             temperature=0.0,  # more deterministic
         ),
-        approach="centralized-llm",
+        # Take the median of the verifiers' own scores; the LLM is only asked
+        # when fewer than half of the summaries carry a valid score.
+        approach="median",
+        answer_schema=AnswerSchema(
+            type="integer",
+            pattern=r'"correctness_score":\s*(-?\d+(?:\.\d+)?)',
+            minimum=0,
+            maximum=100,
+        ),
         context=[
             {
                 "role": "system",
@@ -251,12 +293,12 @@ def aggregator_score_from_llm(verifier_results_map: dict[str, Any]) -> int:
             aggregated_responses[str(verifier)] = str(data)
     print("AGGREGRATED RESPONSES THAT GOES TO MODEL: ", aggregated_responses)
     # ----------------------------------------------------------
-    # 3) Call the LLM-based aggregator
+    # 3) Vote on the scores, falling back to the LLM-based aggregator
     # ----------------------------------------------------------
-    aggregated_score_str = centralized_llm_aggregator(
+    aggregated_score_str = aggregate_sync(
         provider=provider,
         aggregator_config=aggregator_config,
-        aggregated_responses=aggregated_responses,
+        responses=aggregated_responses,
     )
     # ----------------------------------------------------------
     # 4) Parse aggregator’s output as an integer [0..100]
@@ -1,10 +1,32 @@
-from .base_router import ChatRequest, CompletionRequest, EmbeddingRequest
+from .base_router import (
+    CacheableMessage,
+    CacheControl,
+    ChatRequest,
+    CompletionRequest,
+    EmbeddingCompletionRequest,
+    EmbeddingRequest,
+    TextPart,
+)
 from .openrouter import AsyncOpenRouterProvider, OpenRouterProvider
+from .prompt_cache import cached_tokens, mark_cache_breakpoint, record_cache_usage
+from .usage import CallUsage, RunUsage, UsageLedger, UsageTotals, track_run
 
 __all__ = [
     "AsyncOpenRouterProvider",
+    "CacheControl",
+    "CacheableMessage",
+    "CallUsage",
     "ChatRequest",
     "CompletionRequest",
-    "OpenRouterProvider",
+    "EmbeddingCompletionRequest",
     "EmbeddingRequest",
+    "OpenRouterProvider",
+    "RunUsage",
+    "TextPart",
+    "UsageLedger",
+    "UsageTotals",
+    "cached_tokens",
+    "mark_cache_breakpoint",
+    "record_cache_usage",
+    "track_run",
 ]
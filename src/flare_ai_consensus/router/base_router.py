@@ -1,9 +1,14 @@
-from typing import Any, TypedDict
+import asyncio
+import contextlib
+import time
+from collections.abc import AsyncGenerator, Sequence
+from typing import Any, Literal, NotRequired, TypedDict
 
 import httpx
 import requests
 
 from flare_ai_consensus.settings import Message
+from flare_ai_consensus.telemetry import ROUTER_REQUEST_ERRORS, ROUTER_REQUEST_LATENCY
 
 
 class CompletionRequest(TypedDict):
@@ -13,17 +18,39 @@ class CompletionRequest(TypedDict):
     temperature: float
 
 
+class CacheControl(TypedDict):
+    type: Literal["ephemeral"]
+
+
+class TextPart(TypedDict):
+    type: Literal["text"]
+    text: str
+    cache_control: NotRequired[CacheControl]
+
+
+class CacheableMessage(TypedDict):
+    role: str
+    content: list[TextPart]
+
+
 class ChatRequest(TypedDict):
     model: str
-    messages: list[Message]
+    messages: Sequence[Message | CacheableMessage]
     max_tokens: int
     temperature: float
 
+
 class EmbeddingRequest(TypedDict):
+    model: str
+    input: list[str]
+
+
+class EmbeddingCompletionRequest(TypedDict):
     model: str
     prompt: str
     max_tokens: int
 
+
 class BaseRouter:
     """A base class to handle HTTP requests and common logic for API interaction."""
 
@@ -64,7 +91,11 @@ class BaseRouter:
     def _post(
         self,
         endpoint: str,
-        json_payload: dict[str, Any] | CompletionRequest | ChatRequest,
+        json_payload: dict[str, Any]
+        | CompletionRequest
+        | ChatRequest
+        | EmbeddingRequest
+        | EmbeddingCompletionRequest,
     ) -> dict:
         """
         Make a POST request to the API with a JSON payload and return the JSON response.
@@ -75,13 +106,28 @@ class BaseRouter:
         :return: JSON response as a dictionary.
         """
         url = self.base_url + endpoint
-        response = self.session.post(
-            url=url, headers=self.headers, json=json_payload, timeout=30
-        )
+        model = str(json_payload.get("model", "unknown"))
+        start = time.perf_counter()
+        try:
+            response = self.session.post(
+                url=url, headers=self.headers, json=json_payload, timeout=30
+            )
+        except requests.RequestException:
+            ROUTER_REQUEST_ERRORS.inc(
+                model=model, endpoint=endpoint, reason="transport"
+            )
+            raise
+        finally:
+            ROUTER_REQUEST_LATENCY.observe(
+                time.perf_counter() - start, model=model, endpoint=endpoint
+            )
 
         success_status = 200
         if response.status_code == success_status:
             return response.json()
+        ROUTER_REQUEST_ERRORS.inc(
+            model=model, endpoint=endpoint, reason=f"http_{response.status_code}"
+        )
         msg = f"Error ({response.status_code}): {response.text}"
         raise ConnectionError(msg)
 
@@ -92,14 +138,24 @@ class AsyncBaseRouter:
     common logic for API interaction.
     """
 
-    def __init__(self, base_url: str, api_key: str | None = None) -> None:
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str | None = None,
+        max_concurrency: int | None = None,
+    ) -> None:
         """
         :param base_url: The base URL for the API.
         :param api_key: Optional API key for authentication.
+        :param max_concurrency: Optional cap on requests in flight at once,
+            shared by every caller of this client.
         """
         self.base_url = base_url.rstrip("/")
         self.api_key = api_key
         self.client = httpx.AsyncClient(timeout=30.0)
+        self.max_concurrency = max_concurrency
+        self._limiter = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+        self.pending = 0
         self.headers = {"accept": "application/json"}
         if self.api_key:
             self.headers["Authorization"] = f"Bearer {self.api_key}"
@@ -114,7 +170,8 @@ class AsyncBaseRouter:
         """
         params = params or {}
         url = self.base_url + endpoint
-        response = await self.client.get(url, params=params, headers=self.headers)
+        async with self._limit():
+            response = await self.client.get(url, params=params, headers=self.headers)
 
         success_status = 200
         if response.status_code == success_status:
@@ -125,7 +182,11 @@ class AsyncBaseRouter:
     async def _post(
         self,
         endpoint: str,
-        json_payload: dict[str, Any] | CompletionRequest | ChatRequest,
+        json_payload: dict[str, Any]
+        | CompletionRequest
+        | ChatRequest
+        | EmbeddingRequest
+        | EmbeddingCompletionRequest,
     ) -> dict:
         """
         Make an asynchronous POST request to the API with a JSON
@@ -137,14 +198,55 @@ class AsyncBaseRouter:
         :return: JSON response as a dictionary.
         """
         url = self.base_url + endpoint
-        response = await self.client.post(url, headers=self.headers, json=json_payload)
+        model = str(json_payload.get("model", "unknown"))
+        async with self._limit():
+            start = time.perf_counter()
+            try:
+                response = await self.client.post(
+                    url, headers=self.headers, json=json_payload
+                )
+            except httpx.HTTPError:
+                ROUTER_REQUEST_ERRORS.inc(
+                    model=model, endpoint=endpoint, reason="transport"
+                )
+                raise
+            finally:
+                ROUTER_REQUEST_LATENCY.observe(
+                    time.perf_counter() - start, model=model, endpoint=endpoint
+                )
 
         success_status = 200
         if response.status_code == success_status:
             return response.json()
+        ROUTER_REQUEST_ERRORS.inc(
+            model=model, endpoint=endpoint, reason=f"http_{response.status_code}"
+        )
         msg = f"Error ({response.status_code}): {response.text}"
         raise ConnectionError(msg)
 
+    @contextlib.asynccontextmanager
+    async def _limit(self) -> AsyncGenerator[None]:
+        """
+        Hold one slot of the concurrency budget, counting the request as
+        pending while it waits for the slot and while it runs.
+        """
+        self.pending += 1
+        try:
+            async with self._limiter or contextlib.nullcontext():
+                yield
+        finally:
+            self.pending -= 1
+
+    @property
+    def load(self) -> float:
+        """
+        Pending requests as a fraction of max_concurrency; above 1 when
+        requests are queueing. Always 0 without a concurrency cap.
+        """
+        if not self.max_concurrency:
+            return 0.0
+        return self.pending / self.max_concurrency
+
     async def close(self) -> None:
         """
         Close the underlying asynchronous HTTP client.
@@ -1,10 +1,18 @@
+import time
+
 from flare_ai_consensus.router.base_router import (
     AsyncBaseRouter,
     BaseRouter,
     ChatRequest,
     CompletionRequest,
+    EmbeddingCompletionRequest,
     EmbeddingRequest,
 )
+from flare_ai_consensus.router.prompt_cache import record_cache_usage
+from flare_ai_consensus.router.usage import CallUsage, UsageLedger
+
+# Ask OpenRouter to report the cost of each call in its usage block.
+USAGE_ACCOUNTING = {"usage": {"include": True}}
 
 
 class OpenRouterProvider(BaseRouter):
@@ -23,6 +31,7 @@ class OpenRouterProvider(BaseRouter):
             Defaults to "https://openrouter.ai/api/v1"
         """
         super().__init__(base_url, api_key)
+        self.usage = UsageLedger(api_key)
 
     def get_available_models(self) -> dict:
         """
@@ -73,11 +82,29 @@ class OpenRouterProvider(BaseRouter):
         The payload should include a "model" field and a "messages"
         array where each message has a "role"
         (e.g., "user", "assistant", "system") and "content".
+        Tokens, cost and latency of the call are recorded in `self.usage`.
         """
         endpoint = "/chat/completions"
+        start = time.perf_counter()
+        response = self._post(endpoint, {**payload, **USAGE_ACCOUNTING})
+        latency = time.perf_counter() - start
+        record_cache_usage(payload["model"], response)
+        self.usage.record(CallUsage.from_response(payload["model"], response, latency))
+        return response
+
+    def send_embeddings(self, payload: EmbeddingRequest) -> dict:
+        """
+        Embed a batch of texts with the embeddings endpoint.
+
+        The payload should include a "model" field and an "input" list of
+        texts; the response's "data" holds one "embedding" per input "index".
+        """
+        endpoint = "/embeddings"
         return self._post(endpoint, payload)
 
-    def send_completion_from_embeddings(self, payload: EmbeddingRequest) -> dict:
+    def send_completion_from_embeddings(
+        self, payload: EmbeddingCompletionRequest
+    ) -> dict:
         """
         Get a completion from a list of embeddings.
 
@@ -92,15 +119,21 @@ class AsyncOpenRouterProvider(AsyncBaseRouter):
     """Asynchronous provider to interact with the OpenRouter API."""
 
     def __init__(
-        self, api_key: str | None = None, base_url: str = "https://openrouter.ai/api/v1"
+        self,
+        api_key: str | None = None,
+        base_url: str = "https://openrouter.ai/api/v1",
+        max_concurrency: int | None = None,
     ) -> None:
         """
         Initialize the AsyncOpenRouterProvider.
 
         :param api_key: Optional API key for authentication.
         :param base_url: Optional custom base URL.
+        :param max_concurrency: Optional cap on concurrent requests, shared by
+            all callers so they draw from one rate-limit budget.
         """
-        super().__init__(base_url, api_key)
+        super().__init__(base_url, api_key, max_concurrency)
+        self.usage = UsageLedger(api_key)
 
     async def send_completion(self, payload: CompletionRequest) -> dict:
         """
@@ -116,13 +149,33 @@ class AsyncOpenRouterProvider(AsyncBaseRouter):
         """
         Send a prompt to the chat completions endpoint.
 
+        Tokens, cost and latency of the call are recorded in `self.usage`,
+        and in the run tracked by the calling context, if any.
+
         :param payload: The JSON payload.
         :return: The JSON response from the API.
         """
         endpoint = "/chat/completions"
+        start = time.perf_counter()
+        response = await self._post(endpoint, {**payload, **USAGE_ACCOUNTING})
+        latency = time.perf_counter() - start
+        record_cache_usage(payload["model"], response)
+        self.usage.record(CallUsage.from_response(payload["model"], response, latency))
+        return response
+
+    async def send_embeddings(self, payload: EmbeddingRequest) -> dict:
+        """
+        Embed a batch of texts with the embeddings endpoint.
+
+        :param payload: The model and the "input" list of texts.
+        :return: The JSON response, with one "embedding" per input "index".
+        """
+        endpoint = "/embeddings"
         return await self._post(endpoint, payload)
 
-    async def send_completion_from_embeddings(self, payload: EmbeddingRequest) -> dict:
+    async def send_completion_from_embeddings(
+        self, payload: EmbeddingCompletionRequest
+    ) -> dict:
         """
         Get a completion from a list of embeddings.
 
@@ -0,0 +1,69 @@
+"""
+Prompt caching for OpenRouter chat completions.
+
+Providers reuse a cached prompt prefix only if it is byte-identical to an
+earlier request. OpenAI-style providers cache long prefixes automatically;
+Anthropic and Gemini models cache up to a `cache_control` breakpoint set on a
+content part. OpenRouter accepts content-part messages for every model and
+ignores breakpoints where caching is not supported, so marking the end of the
+stable prefix is safe for any model.
+
+Cache hits are reported in the response's
+`usage.prompt_tokens_details.cached_tokens`.
+"""
+
+from collections.abc import Sequence
+
+from flare_ai_consensus.router.base_router import CacheableMessage
+from flare_ai_consensus.settings import Message
+from flare_ai_consensus.telemetry import PROMPT_CACHE_TOKENS
+
+
+def mark_cache_breakpoint(
+    messages: Sequence[Message], prefix_length: int
+) -> list[Message | CacheableMessage]:
+    """
+    Mark the first prefix_length messages as a cacheable prefix.
+
+    :param messages: The conversation, stable prefix first.
+    :param prefix_length: Number of leading messages that are identical
+        across requests.
+    :return: A copy of the conversation whose last prefix message carries an
+        ephemeral cache_control breakpoint; unchanged if the prefix is empty.
+    """
+    marked: list[Message | CacheableMessage] = list(messages)
+    if not 0 < prefix_length <= len(messages):
+        return marked
+    last = messages[prefix_length - 1]
+    marked[prefix_length - 1] = {
+        "role": last["role"],
+        "content": [
+            {
+                "type": "text",
+                "text": last["content"],
+                "cache_control": {"type": "ephemeral"},
+            }
+        ],
+    }
+    return marked
+
+
+def cached_tokens(response: dict) -> int:
+    """Return the prompt tokens served from the provider's cache."""
+    usage = response.get("usage") or {}
+    details = usage.get("prompt_tokens_details") or {}
+    return int(details.get("cached_tokens") or 0)
+
+
+def record_cache_usage(model: str, response: dict) -> None:
+    """
+    Count a chat completion's prompt tokens by cache result.
+
+    :param model: The model ID of the request.
+    :param response: The chat completion response.
+    """
+    usage = response.get("usage") or {}
+    prompt_tokens = int(usage.get("prompt_tokens") or 0)
+    cached = min(cached_tokens(response), prompt_tokens)
+    PROMPT_CACHE_TOKENS.inc(cached, model=model, result="hit")
+    PROMPT_CACHE_TOKENS.inc(prompt_tokens - cached, model=model, result="miss")
@@ -0,0 +1,197 @@
+"""
+Token and cost accounting for chat completions.
+
+Every chat completion sent through an OpenRouter provider is recorded as a
+`CallUsage`: prompt, completion and cached tokens from the response's `usage`,
+the cost OpenRouter reports in `usage.cost` (in credits, i.e. USD), and the
+request latency. Each call is rolled up three ways:
+
+    per API key: the provider's `UsageLedger`, exported as the
+        llm_tokens_total and llm_cost_total metrics under a key fingerprint
+    per run: the `RunUsage` opened with `track_run` in the calling context
+    per round: the run's current round, set with `RunUsage.start_round`
+
+Usage:
+    with track_run() as usage:
+        usage.start_round("initial")
+        await provider.send_chat_completion(payload)
+    usage.summary()
+"""
+
+import hashlib
+from collections.abc import Generator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from typing import Self
+
+from flare_ai_consensus.router.prompt_cache import cached_tokens
+from flare_ai_consensus.telemetry import LLM_COST, LLM_TOKENS
+
+_current_run: ContextVar["RunUsage | None"] = ContextVar("run_usage", default=None)
+
+
+@dataclass(frozen=True)
+class CallUsage:
+    """Tokens, cost and latency of one chat completion."""
+
+    model: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    cost: float = 0.0
+    latency: float = 0.0
+
+    @classmethod
+    def from_response(cls, model: str, response: dict, latency: float) -> Self:
+        """
+        Read the usage block of a chat completion response.
+
+        :param model: The model ID of the request.
+        :param response: The chat completion response.
+        :param latency: Seconds from sending the request to the response.
+        :return: The call's usage; missing fields count as 0.
+        """
+        usage = response.get("usage") or {}
+        return cls(
+            model=model,
+            prompt_tokens=int(usage.get("prompt_tokens") or 0),
+            completion_tokens=int(usage.get("completion_tokens") or 0),
+            cached_tokens=cached_tokens(response),
+            cost=float(usage.get("cost") or 0.0),
+            latency=latency,
+        )
+
+
+@dataclass
+class UsageTotals:
+    """Running totals over a set of calls."""
+
+    calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    cost: float = 0.0
+    latency: float = 0.0
+
+    @property
+    def total_tokens(self) -> int:
+        """Prompt plus completion tokens."""
+        return self.prompt_tokens + self.completion_tokens
+
+    def add(self, call: CallUsage) -> None:
+        """Add one call to the totals."""
+        self.calls += 1
+        self.prompt_tokens += call.prompt_tokens
+        self.completion_tokens += call.completion_tokens
+        self.cached_tokens += call.cached_tokens
+        self.cost += call.cost
+        self.latency += call.latency
+
+    def to_dict(self) -> dict[str, float]:
+        """Return the totals, with cost and latency rounded for reporting."""
+        totals = asdict(self)
+        totals["total_tokens"] = self.total_tokens
+        totals["cost"] = round(self.cost, 8)
+        totals["latency"] = round(self.latency, 3)
+        return totals
+
+
+@dataclass
+class RunUsage:
+    """Usage of one consensus run, in total and per round and model."""
+
+    total: UsageTotals = field(default_factory=UsageTotals)
+    rounds: dict[str, UsageTotals] = field(default_factory=dict)
+    models: dict[str, UsageTotals] = field(default_factory=dict)
+    current_round: str = "initial"
+
+    def start_round(self, label: str) -> None:
+        """Attribute the following calls, aggregation included, to a round."""
+        self.current_round = label
+
+    def record(self, call: CallUsage) -> None:
+        """Add a call to the run, its current round and its model."""
+        self.total.add(call)
+        self.rounds.setdefault(self.current_round, UsageTotals()).add(call)
+        self.models.setdefault(call.model, UsageTotals()).add(call)
+
+    def summary(self) -> dict[str, dict]:
+        """Return the totals as plain dictionaries."""
+        return {
+            "total": self.total.to_dict(),
+            "rounds": {k: v.to_dict() for k, v in self.rounds.items()},
+            "models": {k: v.to_dict() for k, v in self.models.items()},
+        }
+
+
+@contextmanager
+def track_run() -> Generator[RunUsage]:
+    """
+    Record the usage of every call made in this context, including tasks
+    started from it.
+
+    :return: The run's usage, filled in as calls complete.
+    """
+    usage = RunUsage()
+    token = _current_run.set(usage)
+    try:
+        yield usage
+    finally:
+        _current_run.reset(token)
+
+
+def key_fingerprint(api_key: str | None) -> str:
+    """Identify an API key in metrics and logs without revealing it."""
+    if not api_key:
+        return "anonymous"
+    return hashlib.sha256(api_key.encode()).hexdigest()[:12]
+
+
+class UsageLedger:
+    """Per-model usage of all calls made with one API key."""
+
+    def __init__(self, api_key: str | None = None) -> None:
+        """
+        :param api_key: The provider's API key, stored only as a fingerprint.
+        """
+        self.key = key_fingerprint(api_key)
+        self.models: dict[str, UsageTotals] = {}
+
+    def record(self, call: CallUsage) -> None:
+        """
+        Record a call for this key, in the metrics and in the current run.
+
+        :param call: The usage of a completed call.
+        """
+        self.models.setdefault(call.model, UsageTotals()).add(call)
+        for kind, tokens in (
+            ("prompt", call.prompt_tokens),
+            ("completion", call.completion_tokens),
+            ("cached", call.cached_tokens),
+        ):
+            LLM_TOKENS.inc(tokens, model=call.model, api_key=self.key, kind=kind)
+        LLM_COST.inc(call.cost, model=call.model, api_key=self.key)
+        run = _current_run.get()
+        if run is not None:
+            run.record(call)
+
+    def total(self) -> UsageTotals:
+        """Return the totals over every model."""
+        total = UsageTotals()
+        for totals in self.models.values():
+            total.calls += totals.calls
+            total.prompt_tokens += totals.prompt_tokens
+            total.completion_tokens += totals.completion_tokens
+            total.cached_tokens += totals.cached_tokens
+            total.cost += totals.cost
+            total.latency += totals.latency
+        return total
+
+    def summary(self) -> dict[str, object]:
+        """Return this key's fingerprint and totals, overall and per model."""
+        return {
+            "api_key": self.key,
+            "total": self.total().to_dict(),
+            "models": {k: v.to_dict() for k, v in self.models.items()},
+        }
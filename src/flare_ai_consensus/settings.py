@@ -1,8 +1,9 @@
+import re
 from pathlib import Path
 from typing import Literal, TypedDict
 
 import structlog
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 logger = structlog.get_logger(__name__)
@@ -26,6 +27,31 @@ class ModelConfig(BaseModel):
     model_id: str
     max_tokens: int = 50
     temperature: float = 0.7
+    prompt_budget: int | None = None
+    prompt_cache: bool = True
+
+
+class AnswerSchema(BaseModel):
+    """Structured answer extracted from each response by vote aggregators"""
+
+    type: Literal["integer", "number", "boolean", "choice"]
+    choices: list[str] = []
+    pattern: str | None = None
+    minimum: float | None = None
+    maximum: float | None = None
+    min_valid: float = 0.5
+
+    @field_validator("pattern")
+    @classmethod
+    def _compile_pattern(cls, pattern: str | None) -> str | None:
+        """Reject invalid regular expressions when the config is loaded."""
+        if pattern is not None:
+            try:
+                re.compile(pattern)
+            except re.error as e:
+                msg = f"invalid answer pattern {pattern!r}: {e}"
+                raise ValueError(msg) from e
+        return pattern
 
 
 class AggregatorConfig(BaseModel):
@@ -35,6 +61,44 @@ class AggregatorConfig(BaseModel):
     approach: str
     context: list[Message]
     prompt: list[Message]
+    answer_schema: AnswerSchema | None = None
+    weights: dict[str, float] = {}
+    trim: float = 0.2
+    fan_in: int = 4
+
+
+class CascadeConfig(BaseModel):
+    """
+    Configuration for answering with a fast model before full consensus.
+    The threshold must be tuned for the embedding model, unless the
+    aggregator has an answer_schema.
+    """
+
+    model: ModelConfig
+    verifier: ModelConfig | None = None
+    threshold: float = 0.8
+
+
+class PruningConfig(BaseModel):
+    """Configuration for skipping models with low historical influence"""
+
+    min_runs: int = 20
+    relative_threshold: float = 0.5
+    sample_rate: float = 0.2
+    high_load: float = 0.8
+    min_models: int = 2
+    decay: float = 0.05
+
+
+def _parse_model(data: dict) -> ModelConfig:
+    """Create a ModelConfig from its JSON form"""
+    return ModelConfig(
+        model_id=data["id"],
+        max_tokens=data["max_tokens"],
+        temperature=data["temperature"],
+        prompt_budget=data.get("prompt_budget"),
+        prompt_cache=data.get("prompt_cache", True),
+    )
 
 
 class ConsensusConfig(BaseModel):
@@ -45,42 +109,55 @@ class ConsensusConfig(BaseModel):
     improvement_prompt: str
     iterations: int
     aggregated_prompt_type: Literal["user", "assistant", "system"]
+    max_run_cost: float | None = None
+    max_run_tokens: int | None = None
+    requery_threshold: float | None = None
+    cascade: CascadeConfig | None = None
+    pruning: PruningConfig | None = None
 
     @classmethod
     def from_json(cls, json_data: dict) -> "ConsensusConfig":
         """Create ConsensusConfig from JSON data"""
         # Parse the list of models
-        models = [
-            ModelConfig(
-                model_id=m["id"],
-                max_tokens=m["max_tokens"],
-                temperature=m["temperature"],
-            )
-            for m in json_data.get("models", [])
-        ]
+        models = [_parse_model(m) for m in json_data.get("models", [])]
 
         # Parse the aggregator configuration
         aggr_data = json_data.get("aggregator", [])[0]
         aggr_model_data = aggr_data.get("model", {})
-        aggregator_model = ModelConfig(
-            model_id=aggr_model_data["id"],
-            max_tokens=aggr_model_data["max_tokens"],
-            temperature=aggr_model_data["temperature"],
-        )
+        aggregator_model = _parse_model(aggr_model_data)
 
         aggregator_config = AggregatorConfig(
             model=aggregator_model,
             approach=aggr_data.get("approach", ""),
             context=aggr_data.get("aggregator_context", []),
             prompt=aggr_data.get("aggregator_prompt", []),
+            answer_schema=aggr_data.get("answer_schema"),
+            weights=aggr_data.get("weights", {}),
+            trim=aggr_data.get("trim", 0.2),
+            fan_in=aggr_data.get("fan_in", 4),
         )
 
+        # Parse the optional cascade configuration
+        cascade = None
+        if cascade_data := json_data.get("cascade"):
+            verifier_data = cascade_data.get("verifier")
+            cascade = CascadeConfig(
+                model=_parse_model(cascade_data["model"]),
+                verifier=_parse_model(verifier_data) if verifier_data else None,
+                threshold=cascade_data.get("threshold", 0.8),
+            )
+
         return cls(
             models=models,
             aggregator_config=aggregator_config,
             improvement_prompt=json_data.get("improvement_prompt", ""),
             iterations=json_data.get("iterations", 1),
             aggregated_prompt_type=json_data.get("aggregated_prompt_type", "system"),
+            max_run_cost=json_data.get("max_run_cost"),
+            max_run_tokens=json_data.get("max_run_tokens"),
+            requery_threshold=json_data.get("requery_threshold"),
+            cascade=cascade,
+            pruning=json_data.get("pruning"),
         )
 
 
@@ -93,6 +170,24 @@ class Settings(BaseSettings):
     # OpenRouter Settings
     open_router_base_url: str = "https://openrouter.ai/api/v1"
     open_router_api_key: str = ""
+    open_router_max_concurrency: int = 16
+
+    # Embedding Settings
+    embedding_model: str = "local"
+    embedding_dimensions: int = 512
+    embedding_batch_size: int = 64
+    embedding_cache_size: int = 4096
+
+    # Semantic Cache Settings
+    semantic_cache_enabled: bool = False
+    semantic_cache_threshold: float = 0.95
+    semantic_cache_size: int = 10000
+
+    # Transcript Settings
+    transcript_enabled: bool = False
+    transcript_compression: Literal["none", "gzip"] = "gzip"
+    transcript_max_bytes: int = 64 * 1024 * 1024
+    transcript_queue_size: int = 1024
 
     # Path Settings
     data_path: Path = create_path("data")
@@ -101,6 +196,31 @@ class Settings(BaseSettings):
     # Restrict backend listener to specific IPs
     cors_origins: list[str] = ["*"]
 
+    # Job Queue Settings
+    job_workers: int = 4
+    job_queue_size: int = 64
+    job_result_ttl: float = 600.0
+
+    # Batch Settings
+    batch_max_concurrency: int = 8
+    batch_max_size: int = 100
+    batch_admission_max_concurrent: int = 2
+    batch_admission_deadline: float = 600.0
+
+    # Admission Control Settings
+    admission_max_concurrent: int = 8
+    admission_deadline: float = 60.0
+    admission_guarded_prefixes: list[str] = ["/api/routes/chat"]
+    admission_exempt_paths: list[str] = ["/health"]
+
+    # Metrics Settings
+    nft_metrics_port: int = 9100
+
+    # Tracing Settings
+    trace_sample_rate: float = 0.0
+    trace_exporters: list[Literal["chrome", "otlp"]] = ["chrome"]
+    trace_otlp_endpoint: str = "http://localhost:4318/v1/traces"
+
     # Consensus Settings
     consensus_config: ConsensusConfig | None = None
 
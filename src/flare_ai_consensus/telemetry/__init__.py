@@ -0,0 +1,89 @@
+from .metrics import (
+    AGGREGATOR_FALLBACKS,
+    AGGREGATOR_LATENCY,
+    API_QUEUE_DEPTH,
+    API_REQUESTS_IN_FLIGHT,
+    ATTESTATION_CLAIMS_CACHE,
+    CONSENSUS_BUDGET_STOPS,
+    CONSENSUS_PATHS,
+    CONSENSUS_PRUNED_MODELS,
+    CONSENSUS_REQUERIES,
+    CONSENSUS_ROUND_DURATION,
+    CONSENSUS_ROUNDS,
+    CONSENSUS_RUN_DURATION,
+    CONTENT_TYPE,
+    EMBEDDING_CACHE,
+    LLM_COST,
+    LLM_TOKENS,
+    NFT_EVENT_DURATION,
+    NFT_EVENTS,
+    NFT_TRANSACTIONS,
+    PROMPT_CACHE_TOKENS,
+    PROMPT_COMPACTIONS,
+    PROMPT_TOKENS,
+    REGISTRY,
+    ROUTER_REQUEST_ERRORS,
+    ROUTER_REQUEST_LATENCY,
+    SEMANTIC_CACHE,
+    SEMANTIC_CACHE_ENTRIES,
+    TRANSCRIPT_RECORDS,
+    Counter,
+    Gauge,
+    Histogram,
+    MetricsRegistry,
+    start_http_server,
+)
+from .tracing import (
+    ChromeTraceExporter,
+    OTLPExporter,
+    Span,
+    Trace,
+    TraceExporter,
+    Tracer,
+    configure_tracing,
+    start_span,
+)
+
+__all__ = [
+    "AGGREGATOR_FALLBACKS",
+    "AGGREGATOR_LATENCY",
+    "API_QUEUE_DEPTH",
+    "API_REQUESTS_IN_FLIGHT",
+    "ATTESTATION_CLAIMS_CACHE",
+    "CONSENSUS_BUDGET_STOPS",
+    "CONSENSUS_PATHS",
+    "CONSENSUS_PRUNED_MODELS",
+    "CONSENSUS_REQUERIES",
+    "CONSENSUS_ROUNDS",
+    "CONSENSUS_ROUND_DURATION",
+    "CONSENSUS_RUN_DURATION",
+    "CONTENT_TYPE",
+    "EMBEDDING_CACHE",
+    "LLM_COST",
+    "LLM_TOKENS",
+    "NFT_EVENTS",
+    "NFT_EVENT_DURATION",
+    "NFT_TRANSACTIONS",
+    "PROMPT_CACHE_TOKENS",
+    "PROMPT_COMPACTIONS",
+    "PROMPT_TOKENS",
+    "REGISTRY",
+    "ROUTER_REQUEST_ERRORS",
+    "ROUTER_REQUEST_LATENCY",
+    "SEMANTIC_CACHE",
+    "SEMANTIC_CACHE_ENTRIES",
+    "TRANSCRIPT_RECORDS",
+    "ChromeTraceExporter",
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "MetricsRegistry",
+    "OTLPExporter",
+    "Span",
+    "Trace",
+    "TraceExporter",
+    "Tracer",
+    "configure_tracing",
+    "start_http_server",
+    "start_span",
+]
@@ -0,0 +1,483 @@
+"""
+Prometheus metrics for the router, consensus loop, aggregator and API.
+
+A small, dependency-free implementation of counters, gauges and histograms
+rendered in the Prometheus text exposition format. Every metric caps the
+number of label combinations it tracks; once the cap is reached new
+combinations are folded into a single "other" series so label cardinality
+stays bounded even if, say, arbitrary model IDs are sent to the router.
+
+The FastAPI app serves the registry on /metrics. Stand-alone processes such
+as the NFT monitor can expose it with start_http_server().
+
+Classes:
+    Counter: Monotonically increasing value
+    Gauge: Value that can go up and down
+    Histogram: Bucketed distribution of observations
+    MetricsRegistry: Collection of metrics rendered together
+"""
+
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Generator, Iterator, Mapping, Sequence
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Final, override
+
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+CONTENT_TYPE: Final[str] = "text/plain; version=0.0.4; charset=utf-8"
+OVERFLOW_LABEL: Final[str] = "other"
+DEFAULT_BUCKETS: Final[tuple[float, ...]] = (
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    20.0,
+    30.0,
+    60.0,
+    120.0,
+)
+
+type LabelValues = tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    """Escape a label value for the text exposition format."""
+    return value.replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+def _format_value(value: float) -> str:
+    """Format a sample value for the text exposition format."""
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class _Metric(ABC):
+    """Shared label handling and rendering for all metric types."""
+
+    metric_type: str = "untyped"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        max_series: int = 64,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.max_series = max_series
+        self._lock = threading.Lock()
+
+    def _key(
+        self, labels: dict[str, str], series: Mapping[LabelValues, object]
+    ) -> LabelValues:
+        """Resolve label values, folding new series into "other" past the cap."""
+        if set(labels) != set(self.labelnames):
+            msg = f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}"
+            raise ValueError(msg)
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        if key not in series and len(series) >= self.max_series:
+            return tuple(OVERFLOW_LABEL for _ in self.labelnames)
+        return key
+
+    def _label_str(self, key: LabelValues, extra: str = "") -> str:
+        pairs = [
+            f'{name}="{_escape(value)}"'
+            for name, value in zip(self.labelnames, key, strict=True)
+        ]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    @abstractmethod
+    def _samples(self) -> Iterator[str]:
+        """Yield the metric's sample lines."""
+
+    def render(self) -> str:
+        """Render the metric in the Prometheus text exposition format."""
+        with self._lock:
+            lines = [
+                f"# HELP {self.name} {self.documentation}",
+                f"# TYPE {self.name} {self.metric_type}",
+                *self._samples(),
+            ]
+        return "\n".join(lines)
+
+
+class _ScalarMetric(_Metric):
+    """A metric holding a single value per label combination."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        max_series: int = 64,
+    ) -> None:
+        super().__init__(name, documentation, labelnames, max_series)
+        self._values: dict[LabelValues, float] = {}
+
+    def _add(self, amount: float, labels: dict[str, str]) -> None:
+        with self._lock:
+            key = self._key(labels, self._values)
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    @override
+    def _samples(self) -> Iterator[str]:
+        for key, value in self._values.items():
+            yield f"{self.name}{self._label_str(key)} {_format_value(value)}"
+
+
+class Counter(_ScalarMetric):
+    """A monotonically increasing counter."""
+
+    metric_type = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        """Increment the counter by a non-negative amount."""
+        if amount < 0:
+            msg = "Counters can only be incremented by non-negative amounts"
+            raise ValueError(msg)
+        self._add(amount, labels)
+
+
+class Gauge(_ScalarMetric):
+    """A value that can go up and down."""
+
+    metric_type = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        """Set the gauge to a value."""
+        with self._lock:
+            self._values[self._key(labels, self._values)] = value
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        """Increment the gauge."""
+        self._add(amount, labels)
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        """Decrement the gauge."""
+        self._add(-amount, labels)
+
+    @contextmanager
+    def track_in_progress(self, **labels: str) -> Generator[None]:
+        """Increment the gauge for the duration of the block."""
+        self._add(1.0, labels)
+        try:
+            yield
+        finally:
+            self._add(-1.0, labels)
+
+
+class Histogram(_Metric):
+    """A bucketed distribution of observations, typically latencies."""
+
+    metric_type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        max_series: int = 64,
+    ) -> None:
+        super().__init__(name, documentation, labelnames, max_series)
+        self.buckets = (*sorted(buckets), math.inf)
+        self._counts: dict[LabelValues, list[int]] = {}
+        self._sums: dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        """Record an observation."""
+        with self._lock:
+            key = self._key(labels, self._counts)
+            counts = self._counts.setdefault(key, [0] * len(self.buckets))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._sums[key] = self._sums.get(key, 0.0) + value
+
+    @contextmanager
+    def time(self, **labels: str) -> Generator[None]:
+        """Observe the wall-clock duration of the block in seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    @override
+    def _samples(self) -> Iterator[str]:
+        for key, counts in self._counts.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts, strict=True):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{self._label_str(key, le)} {cumulative}"
+            labels = self._label_str(key)
+            yield f"{self.name}_sum{labels} {_format_value(self._sums[key])}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class MetricsRegistry:
+    """A collection of metrics rendered together."""
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+
+    def register[M: _Metric](self, metric: M) -> M:
+        """Add a metric to the registry and return it."""
+        if metric.name in self._metrics:
+            msg = f"Metric {metric.name} is already registered"
+            raise ValueError(msg)
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+# Router
+ROUTER_REQUEST_LATENCY = REGISTRY.register(
+    Histogram(
+        "router_request_duration_seconds",
+        "Latency of requests sent to the model provider.",
+        ("model", "endpoint"),
+    )
+)
+ROUTER_REQUEST_ERRORS = REGISTRY.register(
+    Counter(
+        "router_request_errors_total",
+        "Failed requests sent to the model provider.",
+        ("model", "endpoint", "reason"),
+    )
+)
+
+# Consensus
+CONSENSUS_ROUND_DURATION = REGISTRY.register(
+    Histogram(
+        "consensus_round_duration_seconds",
+        "Duration of one round of model queries.",
+        ("round",),
+    )
+)
+CONSENSUS_RUN_DURATION = REGISTRY.register(
+    Histogram(
+        "consensus_run_duration_seconds",
+        "Duration of a full consensus run.",
+        buckets=(1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0),
+    )
+)
+CONSENSUS_ROUNDS = REGISTRY.register(
+    Counter("consensus_rounds_total", "Rounds of model queries executed.", ("round",))
+)
+CONSENSUS_BUDGET_STOPS = REGISTRY.register(
+    Counter(
+        "consensus_budget_stops_total",
+        "Runs that skipped improvement rounds after reaching a budget.",
+        ("limit",),
+        max_series=4,
+    )
+)
+CONSENSUS_REQUERIES = REGISTRY.register(
+    Counter(
+        "consensus_requeries_total",
+        "Models per improvement round, re-queried or with their response reused.",
+        ("result",),
+        max_series=4,
+    )
+)
+CONSENSUS_PRUNED_MODELS = REGISTRY.register(
+    Counter(
+        "consensus_pruned_models_total",
+        "Models skipped for a request because of low historical influence.",
+        ("model",),
+    )
+)
+CONSENSUS_PATHS = REGISTRY.register(
+    Counter(
+        "consensus_paths_total",
+        "Runs by execution path: answered by the cascade or by full consensus.",
+        ("path",),
+        max_series=4,
+    )
+)
+
+# Prompts
+PROMPT_TOKENS = REGISTRY.register(
+    Histogram(
+        "llm_prompt_tokens",
+        "Estimated prompt tokens per LLM call, after compaction.",
+        ("model", "call"),
+        buckets=(64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768),
+    )
+)
+PROMPT_COMPACTIONS = REGISTRY.register(
+    Counter(
+        "prompt_compactions_total",
+        "Prompts compacted to fit a token budget, by the last method applied.",
+        ("call", "method"),
+        max_series=16,
+    )
+)
+PROMPT_CACHE_TOKENS = REGISTRY.register(
+    Counter(
+        "llm_prompt_cache_tokens_total",
+        "Prompt tokens reported by the provider, by prompt cache result.",
+        ("model", "result"),
+    )
+)
+
+# Usage
+LLM_TOKENS = REGISTRY.register(
+    Counter(
+        "llm_tokens_total",
+        "Tokens reported by the provider, by API key fingerprint and kind.",
+        ("model", "api_key", "kind"),
+    )
+)
+LLM_COST = REGISTRY.register(
+    Counter(
+        "llm_cost_total",
+        "Cost in OpenRouter credits (USD) reported by the provider.",
+        ("model", "api_key"),
+    )
+)
+
+# Aggregator
+AGGREGATOR_LATENCY = REGISTRY.register(
+    Histogram(
+        "aggregator_duration_seconds",
+        "Latency of aggregation calls.",
+        ("approach",),
+    )
+)
+AGGREGATOR_FALLBACKS = REGISTRY.register(
+    Counter(
+        "aggregator_fallbacks_total",
+        "Rounds where a vote aggregator fell back to the LLM aggregator.",
+        ("approach",),
+    )
+)
+
+# Embeddings
+EMBEDDING_CACHE = REGISTRY.register(
+    Counter(
+        "embedding_cache_lookups_total",
+        "Embedding cache lookups by result.",
+        ("result",),
+        max_series=4,
+    )
+)
+SEMANTIC_CACHE = REGISTRY.register(
+    Counter(
+        "semantic_cache_events_total",
+        "Semantic answer cache lookups and evictions, by result.",
+        ("result",),
+        max_series=4,
+    )
+)
+SEMANTIC_CACHE_ENTRIES = REGISTRY.register(
+    Gauge("semantic_cache_entries", "Answers held in the semantic cache.")
+)
+
+# Transcripts
+TRANSCRIPT_RECORDS = REGISTRY.register(
+    Counter(
+        "transcript_records_total",
+        "Run transcripts written, dropped on a full queue, or failed to write.",
+        ("result",),
+        max_series=4,
+    )
+)
+
+# API
+API_REQUESTS_IN_FLIGHT = REGISTRY.register(
+    Gauge("api_requests_in_flight", "HTTP requests currently being served.")
+)
+API_QUEUE_DEPTH = REGISTRY.register(
+    Gauge(
+        "api_queue_depth",
+        "Requests waiting for a consensus slot.",
+        ("queue",),
+        max_series=8,
+    )
+)
+
+# NFT monitor
+NFT_EVENTS = REGISTRY.register(
+    Counter("nft_monitor_events_total", "ThresholdReached events processed.")
+)
+NFT_EVENT_DURATION = REGISTRY.register(
+    Histogram(
+        "nft_monitor_event_duration_seconds",
+        "Time to aggregate, submit and distribute rewards for one event.",
+    )
+)
+NFT_TRANSACTIONS = REGISTRY.register(
+    Counter(
+        "nft_monitor_transactions_total",
+        "Transactions sent by the NFT monitor.",
+        ("kind", "status"),
+        max_series=16,
+    )
+)
+
+# Attestation
+ATTESTATION_CLAIMS_CACHE = REGISTRY.register(
+    Counter(
+        "attestation_claims_cache_lookups_total",
+        "Validated-claims cache lookups by result.",
+        ("result",),
+        max_series=4,
+    )
+)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    """Serve the registry on any GET request."""
+
+    def do_GET(self) -> None:
+        body = REGISTRY.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    @override
+    def log_message(self, format: str, *args: object) -> None:
+        """Silence the default per-request stderr logging."""
+
+
+def start_http_server(port: int, addr: str = "0.0.0.0") -> ThreadingHTTPServer:  # noqa: S104
+    """
+    Expose the registry over HTTP from a background thread.
+
+    Intended for processes that do not run the FastAPI app.
+
+    :param port: Port to listen on.
+    :param addr: Address to bind.
+    :return: The running server; call shutdown() to stop it.
+    """
+    server = ThreadingHTTPServer((addr, port), _MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    logger.info("metrics exporter started", addr=addr, port=port)
+    return server
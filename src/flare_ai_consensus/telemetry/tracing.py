@@ -0,0 +1,338 @@
+"""
+Lightweight tracing for consensus runs.
+
+Spans are opened with the `start_span` context manager. The outermost span
+starts a trace, which is sampled with a configurable probability; nested
+spans, including those opened in tasks spawned inside it, join the same
+trace through a context variable. When the root span closes, a sampled trace
+is handed to the configured exporters on a background thread:
+
+- `ChromeTraceExporter` writes a Chrome trace-event JSON file per trace that
+  can be opened in chrome://tracing or https://ui.perfetto.dev.
+- `OTLPExporter` posts the trace as OTLP/HTTP JSON to a local collector.
+
+Unsampled traces only cost a context variable lookup per span.
+
+Classes:
+    Span: A timed, attributed operation within a trace
+    Trace: All spans recorded for one root operation
+    ChromeTraceExporter: Writes traces as Chrome trace-event JSON
+    OTLPExporter: Sends traces to an OTLP/HTTP collector
+    Tracer: Sampling decision and export dispatch
+"""
+
+import json
+import random
+import secrets
+import time
+from collections.abc import Generator, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Protocol, override
+
+import httpx
+import structlog
+
+logger = structlog.get_logger(__name__)
+
+type AttributeValue = str | int | float | bool
+
+
+@dataclass
+class Span:
+    """
+    A timed, attributed operation within a trace.
+
+    Attributes:
+        name: Operation name, e.g. the instrumented function
+        span_id: 16 hex character span identifier
+        parent_id: Identifier of the enclosing span, if any
+        start_ns: Start time in nanoseconds since the epoch
+        end_ns: End time in nanoseconds since the epoch
+        attributes: Key/value annotations such as model IDs and token counts
+        error: Error message if the operation raised
+    """
+
+    name: str
+    span_id: str = field(default_factory=lambda: secrets.token_hex(8))
+    parent_id: str | None = None
+    start_ns: int = field(default_factory=time.time_ns)
+    end_ns: int | None = None
+    attributes: dict[str, AttributeValue] = field(default_factory=dict)
+    error: str | None = None
+
+    def set_attribute(self, key: str, value: AttributeValue | None) -> None:
+        """Annotate the span; None values are ignored."""
+        if value is not None:
+            self.attributes[key] = value
+
+    def set_usage(self, response: dict) -> None:
+        """Annotate the span with the token counts of a chat completion."""
+        usage = response.get("usage") or {}
+        self.set_attribute("prompt_tokens", usage.get("prompt_tokens"))
+        self.set_attribute("completion_tokens", usage.get("completion_tokens"))
+        details = usage.get("prompt_tokens_details") or {}
+        self.set_attribute("cached_tokens", details.get("cached_tokens"))
+
+
+class _NoopSpan(Span):
+    """Span handed out for unsampled traces; discards all annotations."""
+
+    @override
+    def set_attribute(self, key: str, value: AttributeValue | None) -> None:
+        """Ignore the annotation."""
+
+
+@dataclass
+class Trace:
+    """All spans recorded for one root operation."""
+
+    trace_id: str = field(default_factory=lambda: secrets.token_hex(16))
+    sampled: bool = True
+    spans: list[Span] = field(default_factory=list)
+
+
+# Shared by every unsampled operation so they allocate nothing per span.
+_NOOP_SPAN = _NoopSpan(name="noop", span_id="0" * 16, start_ns=0)
+_UNSAMPLED_TRACE = Trace(trace_id="0" * 32, sampled=False)
+
+
+class TraceExporter(Protocol):
+    def export(self, trace: Trace) -> None: ...
+
+
+class ChromeTraceExporter:
+    """
+    Writes each trace to `<directory>/<trace_id>.json` in the Chrome
+    trace-event format.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+
+    def export(self, trace: Trace) -> None:
+        """Write a trace to disk."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"{trace.trace_id}.json"
+        with path.open("w") as f:
+            json.dump(self.to_chrome_trace(trace), f)
+        logger.debug("trace exported", path=str(path))
+
+    @staticmethod
+    def to_chrome_trace(trace: Trace) -> dict[str, Any]:
+        """
+        Convert a trace to Chrome trace-event JSON.
+
+        Concurrent spans are spread over separate thread lanes so that the
+        complete ("X") events on each lane nest properly.
+        """
+        spans = sorted(
+            (s for s in trace.spans if s.end_ns is not None),
+            key=lambda s: (s.start_ns, -(s.end_ns or 0)),
+        )
+        lanes: list[list[int]] = []
+        events: list[dict[str, Any]] = []
+        for span in spans:
+            end_ns = span.end_ns or span.start_ns
+            lane = None
+            for i, stack in enumerate(lanes):
+                while stack and stack[-1] <= span.start_ns:
+                    stack.pop()
+                if not stack or stack[-1] >= end_ns:
+                    lane = i
+                    break
+            if lane is None:
+                lanes.append([])
+                lane = len(lanes) - 1
+            lanes[lane].append(end_ns)
+            args: dict[str, Any] = dict(span.attributes)
+            if span.error is not None:
+                args["error"] = span.error
+            events.append(
+                {
+                    "name": span.name,
+                    "ph": "X",
+                    "ts": span.start_ns / 1_000,
+                    "dur": (end_ns - span.start_ns) / 1_000,
+                    "pid": 1,
+                    "tid": lane,
+                    "args": args,
+                }
+            )
+        return {
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "otherData": {"trace_id": trace.trace_id},
+        }
+
+
+class OTLPExporter:
+    """Posts traces as OTLP/HTTP JSON to a collector."""
+
+    def __init__(
+        self,
+        endpoint: str = "http://localhost:4318/v1/traces",
+        service_name: str = "flare-ai-consensus",
+    ) -> None:
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.client = httpx.Client(timeout=5.0)
+
+    def export(self, trace: Trace) -> None:
+        """Send a trace to the collector."""
+        response = self.client.post(self.endpoint, json=self.to_otlp(trace))
+        success_status = 200
+        if response.status_code != success_status:
+            logger.warning(
+                "otlp export failed", status=response.status_code, body=response.text
+            )
+
+    def to_otlp(self, trace: Trace) -> dict[str, Any]:
+        """Convert a trace to an OTLP ExportTraceServiceRequest."""
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            _otlp_attribute("service.name", self.service_name)
+                        ]
+                    },
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": "flare_ai_consensus"},
+                            "spans": [
+                                _otlp_span(trace.trace_id, span)
+                                for span in trace.spans
+                                if span.end_ns is not None
+                            ],
+                        }
+                    ],
+                }
+            ]
+        }
+
+
+def _otlp_attribute(key: str, value: AttributeValue) -> dict[str, Any]:
+    """Encode an attribute as an OTLP KeyValue."""
+    if isinstance(value, bool):
+        encoded: dict[str, Any] = {"boolValue": value}
+    elif isinstance(value, int):
+        encoded = {"intValue": str(value)}
+    elif isinstance(value, float):
+        encoded = {"doubleValue": value}
+    else:
+        encoded = {"stringValue": str(value)}
+    return {"key": key, "value": encoded}
+
+
+def _otlp_span(trace_id: str, span: Span) -> dict[str, Any]:
+    """Encode a span as an OTLP Span."""
+    encoded: dict[str, Any] = {
+        "traceId": trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        "kind": 1,
+        "startTimeUnixNano": str(span.start_ns),
+        "endTimeUnixNano": str(span.end_ns),
+        "attributes": [_otlp_attribute(k, v) for k, v in span.attributes.items()],
+    }
+    if span.parent_id is not None:
+        encoded["parentSpanId"] = span.parent_id
+    if span.error is not None:
+        encoded["status"] = {"code": 2, "message": span.error}
+    return encoded
+
+
+class Tracer:
+    """
+    Makes the sampling decision for new traces and exports finished ones.
+
+    Args:
+        sample_rate: Probability in [0, 1] that a new trace is recorded
+        exporters: Destinations for sampled traces
+    """
+
+    def __init__(
+        self, sample_rate: float = 0.0, exporters: Sequence[TraceExporter] = ()
+    ) -> None:
+        self.sample_rate = sample_rate
+        self.exporters = list(exporters)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="trace")
+
+    def new_trace(self) -> Trace:
+        """Start a trace, sampled with probability sample_rate."""
+        sampled = self.sample_rate > 0 and random.random() < self.sample_rate  # noqa: S311
+        return Trace() if sampled else _UNSAMPLED_TRACE
+
+    def finish(self, trace: Trace) -> None:
+        """Hand a sampled trace to the exporters without blocking the caller."""
+        if not trace.sampled:
+            return
+        for exporter in self.exporters:
+            self._executor.submit(self._export, exporter, trace)
+
+    @staticmethod
+    def _export(exporter: TraceExporter, trace: Trace) -> None:
+        try:
+            exporter.export(trace)
+        except Exception as e:
+            logger.exception("trace export failed", error=str(e))
+
+
+_tracer = Tracer()
+_current_trace: ContextVar[Trace | None] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Span | None] = ContextVar("current_span", default=None)
+
+
+def configure_tracing(
+    sample_rate: float, exporters: Sequence[TraceExporter] = ()
+) -> Tracer:
+    """Replace the global tracer used by `start_span`."""
+    global _tracer  # noqa: PLW0603
+    _tracer = Tracer(sample_rate=sample_rate, exporters=exporters)
+    return _tracer
+
+
+@contextmanager
+def start_span(name: str, **attributes: AttributeValue) -> Generator[Span]:
+    """
+    Record the enclosed block as a span.
+
+    Starts a new trace when no trace is active. The yielded span accepts
+    further attributes via `set_attribute`; for unsampled traces it is a
+    shared no-op span, so they pay no per-span allocation.
+    """
+    trace = _current_trace.get()
+    is_root = trace is None
+    if trace is None:
+        trace = _tracer.new_trace()
+
+    if not trace.sampled:
+        trace_token = _current_trace.set(trace) if is_root else None
+        try:
+            yield _NOOP_SPAN
+        finally:
+            if trace_token is not None:
+                _current_trace.reset(trace_token)
+        return
+
+    parent = _current_span.get()
+    span = Span(name=name, parent_id=parent.span_id if parent else None)
+    span.attributes.update(attributes)
+    trace.spans.append(span)
+    trace_token = _current_trace.set(trace) if is_root else None
+    span_token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.error = repr(e)
+        raise
+    finally:
+        span.end_ns = time.time_ns()
+        _current_span.reset(span_token)
+        if trace_token is not None:
+            _current_trace.reset(trace_token)
+            _tracer.finish(trace)
@@ -0,0 +1,19 @@
+from .transcript_store import (
+    Compression,
+    IndexEntry,
+    TranscriptIndex,
+    TranscriptStore,
+    iter_records,
+    read_record,
+    segments,
+)
+
+__all__ = [
+    "Compression",
+    "IndexEntry",
+    "TranscriptIndex",
+    "TranscriptStore",
+    "iter_records",
+    "read_record",
+    "segments",
+]
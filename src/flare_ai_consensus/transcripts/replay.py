@@ -0,0 +1,345 @@
+"""
+Offline re-aggregation of recorded consensus runs.
+
+Replays the model responses stored in transcripts through a different
+aggregator configuration (model, prompt or approach) without querying the
+ensemble again:
+
+    aggregate: re-aggregate each run's final round
+    rounds: re-aggregate every recorded round in order, simulating how each
+        round's aggregate would have come out
+
+Records are read in a worker thread into a bounded queue drained by a fixed
+pool of workers. Each replayed aggregate is compared with the recorded one,
+written out and counted as its run finishes, so memory does not grow with the
+number of runs beyond one latency sample per round for the percentiles.
+Latency and the aggregator's token usage are reported per round and in
+total.
+
+Usage:
+    python -m flare_ai_consensus.transcripts.replay data/transcripts \
+        --config aggregator_input.json --mode aggregate --output replay.jsonl
+"""
+
+import argparse
+import asyncio
+import contextlib
+import difflib
+import functools
+import itertools
+import json
+import re
+import statistics
+import sys
+import time
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Final, Literal, TextIO
+
+import structlog
+
+from flare_ai_consensus.consensus import AggregationContext, aggregate
+from flare_ai_consensus.embeddings import EmbeddingModel
+from flare_ai_consensus.router import AsyncOpenRouterProvider, track_run
+from flare_ai_consensus.settings import ConsensusConfig, settings
+from flare_ai_consensus.transcripts.transcript_store import iter_records
+from flare_ai_consensus.utils import load_json
+
+logger = structlog.get_logger(__name__)
+
+type ReplayMode = Literal["aggregate", "rounds"]
+
+ITERATION_PATTERN: Final[re.Pattern[str]] = re.compile(r"iteration_(\d+)$")
+
+
+@dataclass
+class ReplayResult:
+    """
+    Outcome of re-aggregating one recorded round.
+
+    :param run_id: The recorded run's ID.
+    :param round: The round's index; 0 is the initial round.
+    :param original: The recorded aggregate.
+    :param replayed: The new aggregate, if aggregation succeeded.
+    :param similarity: Character-level similarity of the two, in [0, 1].
+    :param latency: Seconds spent aggregating.
+    :param usage: Tokens and cost of the aggregator calls.
+    :param error: The error message, if aggregation failed.
+    """
+
+    run_id: str
+    round: int
+    original: str
+    replayed: str | None = None
+    similarity: float = 0.0
+    latency: float = 0.0
+    usage: dict[str, float] = field(default_factory=dict)
+    error: str | None = None
+
+    @property
+    def changed(self) -> bool:
+        """Whether the replayed aggregate differs from the recorded one."""
+        return self.replayed is not None and self.replayed != self.original
+
+    def diff(self) -> str:
+        """Return a unified line diff from the recorded to the new aggregate."""
+        return "\n".join(
+            difflib.unified_diff(
+                self.original.splitlines(),
+                (self.replayed or "").splitlines(),
+                "recorded",
+                "replayed",
+                lineterm="",
+            )
+        )
+
+
+def recorded_rounds(record: dict[str, Any]) -> list[tuple[int, dict[str, str], str]]:
+    """
+    Extract the rounds that went through aggregation from a transcript.
+
+    :param record: A transcript record.
+    :return: (round index, responses, recorded aggregate) per round, in
+        order; empty for runs answered by the cascade or without rounds.
+    """
+    rounds = record.get("rounds") or {}
+    found = []
+    for key, responses in rounds.items():
+        match = ITERATION_PATTERN.match(key)
+        aggregate_key = f"aggregate_{match.group(1)}" if match else None
+        if match and aggregate_key in rounds and responses:
+            found.append((int(match.group(1)), responses, rounds[aggregate_key]))
+    return sorted(found, key=lambda item: item[0])
+
+
+async def replay_round(
+    context: AggregationContext,
+    run_id: str,
+    index: int,
+    responses: dict[str, str],
+    original: str,
+) -> ReplayResult:
+    """
+    Re-aggregate one recorded round with the context's configuration.
+
+    :param context: The provider and the aggregator configuration to test.
+    :param run_id: The recorded run's ID.
+    :param index: The round's index.
+    :param responses: The recorded model responses of the round.
+    :param original: The recorded aggregate.
+    :return: The comparison of the new aggregate with the recorded one.
+    """
+    result = ReplayResult(run_id=run_id, round=index, original=original)
+    start = time.perf_counter()
+    with track_run() as usage:
+        try:
+            result.replayed = await aggregate(context, responses)
+        except Exception as e:  # noqa: BLE001
+            result.error = str(e)
+            logger.warning("replay failed", run_id=run_id, round=index, error=str(e))
+    result.latency = time.perf_counter() - start
+    result.usage = usage.total.to_dict()
+    if result.replayed is not None:
+        result.similarity = difflib.SequenceMatcher(
+            None, original, result.replayed, autojunk=False
+        ).ratio()
+    return result
+
+
+async def replay_record(
+    context: AggregationContext, record: dict[str, Any], mode: ReplayMode
+) -> list[ReplayResult]:
+    """
+    Replay one transcript.
+
+    :param context: The provider and the aggregator configuration to test.
+    :param record: A transcript record.
+    :param mode: "aggregate" for the final round only, "rounds" for every
+        recorded round.
+    :return: One result per replayed round.
+    """
+    rounds = recorded_rounds(record)
+    if mode == "aggregate":
+        rounds = rounds[-1:]
+    run_id = str(record.get("run_id", ""))
+    return [
+        await replay_round(context, run_id, index, responses, original)
+        for index, responses, original in rounds
+    ]
+
+
+class ReplaySummary:
+    """Running totals of replayed rounds, updated as each run finishes."""
+
+    def __init__(self) -> None:
+        self.runs = 0
+        self.rounds = 0
+        self.failed = 0
+        self.changed = 0
+        self.similarity = 0.0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost = 0.0
+        self.latencies: list[float] = []
+
+    def add(self, results: Sequence[ReplayResult]) -> None:
+        """Count the replayed rounds of one run."""
+        if results:
+            self.runs += 1
+        for result in results:
+            self.rounds += 1
+            self.prompt_tokens += int(result.usage.get("prompt_tokens", 0))
+            self.completion_tokens += int(result.usage.get("completion_tokens", 0))
+            self.cost += result.usage.get("cost", 0.0)
+            if result.error is not None:
+                self.failed += 1
+                continue
+            self.changed += result.changed
+            self.similarity += result.similarity
+            self.latencies.append(result.latency * 1000)
+
+    def report(self) -> dict[str, Any]:
+        """
+        Return the totals.
+
+        :return: Counts, latency percentiles in milliseconds, token and cost
+            totals, and how much the aggregates changed.
+        """
+        succeeded = self.rounds - self.failed
+        latencies = sorted(self.latencies)
+        return {
+            "rounds": self.rounds,
+            "runs": self.runs,
+            "failed": self.failed,
+            "changed": self.changed,
+            "mean_similarity": round(self.similarity / succeeded, 4)
+            if succeeded
+            else 0.0,
+            "latency_ms": {
+                "p50": round(_percentile(latencies, 50), 3),
+                "p95": round(_percentile(latencies, 95), 3),
+                "max": round(latencies[-1], 3) if latencies else 0.0,
+            },
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cost": round(self.cost, 8),
+        }
+
+
+def _percentile(values: Sequence[float], q: int) -> float:
+    if len(values) < 2:  # noqa: PLR2004
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1]
+
+
+async def replay(
+    context: AggregationContext,
+    records: Iterable[dict[str, Any]],
+    mode: ReplayMode = "aggregate",
+    concurrency: int = 32,
+    sink: Callable[[ReplayResult], None] | None = None,
+) -> ReplaySummary:
+    """
+    Replay many transcripts concurrently.
+
+    Records are read in a worker thread into a queue of at most twice the
+    concurrency, and each result is passed to the sink and counted as soon
+    as its run finishes, so neither records nor results accumulate.
+
+    :param context: The provider and the aggregator configuration to test.
+    :param records: Transcript records, e.g. from `iter_records`; read
+        lazily, off the event loop.
+    :param mode: "aggregate" or "rounds".
+    :param concurrency: Number of records replayed at once.
+    :param sink: Optional callback receiving every replayed round.
+    :return: The totals over every replayed round.
+    """
+    iterator: Iterator[dict[str, Any]] = iter(records)
+    queue: asyncio.Queue[dict[str, Any] | None] = asyncio.Queue(2 * concurrency)
+    summary = ReplaySummary()
+
+    async def read() -> None:
+        try:
+            while (record := await asyncio.to_thread(next, iterator, None)) is not None:
+                await queue.put(record)
+        finally:
+            for _ in range(concurrency):
+                await queue.put(None)
+
+    async def worker() -> None:
+        while (record := await queue.get()) is not None:
+            results = await replay_record(context, record, mode)
+            summary.add(results)
+            if sink is not None:
+                for result in results:
+                    sink(result)
+
+    await asyncio.gather(read(), *(worker() for _ in range(concurrency)))
+    return summary
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Re-aggregate recorded consensus rounds with a different "
+        "aggregator configuration and compare the results."
+    )
+    parser.add_argument("directory", type=Path, help="Transcript store directory")
+    parser.add_argument(
+        "--config",
+        type=Path,
+        default=settings.input_path / "input.json",
+        help="input.json-style file whose aggregator is replayed",
+    )
+    parser.add_argument("--mode", choices=["aggregate", "rounds"], default="aggregate")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--limit", type=int, help="Replay at most this many runs")
+    parser.add_argument("--since", type=float, help="Only runs started after")
+    parser.add_argument("--until", type=float, help="Only runs started before")
+    parser.add_argument(
+        "--output", type=Path, help="Write every replayed round as JSON lines"
+    )
+    return parser.parse_args()
+
+
+def _write_result(output: TextIO, result: ReplayResult) -> None:
+    """Write one replayed round, with its diff, as a JSON line."""
+    row = asdict(result) | {"diff": result.diff()}
+    output.write(json.dumps(row, separators=(",", ":")) + "\n")
+
+
+async def _main(args: argparse.Namespace) -> dict[str, Any]:
+    config = ConsensusConfig.from_json(load_json(args.config))
+    provider = AsyncOpenRouterProvider(
+        api_key=settings.open_router_api_key,
+        base_url=settings.open_router_base_url,
+        max_concurrency=settings.open_router_max_concurrency,
+    )
+    embedding_model = EmbeddingModel(
+        provider=provider,
+        model_id=settings.embedding_model,
+        dimensions=settings.embedding_dimensions,
+        batch_size=settings.embedding_batch_size,
+        cache_size=settings.embedding_cache_size,
+    )
+    context = AggregationContext(provider, config.aggregator_config, embedding_model)
+    records: Iterable[dict[str, Any]] = iter_records(
+        args.directory, args.since, args.until
+    )
+    if args.limit is not None:
+        records = itertools.islice(records, args.limit)
+    with contextlib.ExitStack() as stack:
+        sink = None
+        if args.output:
+            output = stack.enter_context(args.output.open("w"))
+            sink = functools.partial(_write_result, output)
+        try:
+            summary = await replay(context, records, args.mode, args.concurrency, sink)
+        finally:
+            await provider.close()
+    return summary.report()
+
+
+if __name__ == "__main__":
+    report = asyncio.run(_main(parse_arguments()))
+    sys.stdout.write(json.dumps(report, indent=2) + "\n")
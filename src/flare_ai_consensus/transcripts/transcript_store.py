@@ -0,0 +1,365 @@
+"""
+Append-only store of consensus run transcripts.
+
+Each run is one compact JSON line holding its conversation, every round's
+responses and aggregates, and the result. Records are appended to segment
+files `transcripts-<n>.jsonl[.gz|.zst]` in a directory, and a new segment
+is started once the current one reaches max_bytes on disk.
+
+Writes never block the event loop: `TranscriptStore.append` only enqueues
+the record, and a background task writes whatever has accumulated as one
+batch in a worker thread. With compression, each batch becomes a separate
+gzip member or zstd frame, so segments stay valid concatenated streams and a
+batch can be decompressed on its own.
+
+`index.jsonl` maps each run ID and timestamp to the segment and byte offset
+of its batch, so one run is found by decompressing a single batch rather
+than the whole history. `iter_records` streams records in write order,
+optionally filtered by time.
+
+zstd compression needs the optional `zstandard` package.
+"""
+
+import asyncio
+import bisect
+import gzip
+import io
+import json
+import re
+from collections.abc import Iterator
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Final, Literal
+
+import structlog
+
+from flare_ai_consensus.telemetry import TRANSCRIPT_RECORDS
+
+logger = structlog.get_logger(__name__)
+
+type Compression = Literal["none", "gzip", "zstd"]
+
+INDEX_FILE: Final[str] = "index.jsonl"
+SUFFIXES: Final[dict[str, str]] = {"none": "", "gzip": ".gz", "zstd": ".zst"}
+SEGMENT_PATTERN: Final[re.Pattern[str]] = re.compile(
+    r"transcripts-(\d+)\.jsonl(\.gz|\.zst)?$"
+)
+
+
+def _zstandard() -> Any:
+    try:
+        import zstandard  # noqa: PLC0415  # pyright: ignore[reportMissingImports]
+    except ImportError as e:
+        msg = "zstd compression needs the zstandard package"
+        raise RuntimeError(msg) from e
+    return zstandard
+
+
+def _compress(data: bytes, compression: Compression) -> bytes:
+    """Encode one batch as raw bytes, a gzip member or a zstd frame."""
+    if compression == "gzip":
+        return gzip.compress(data)
+    if compression == "zstd":
+        return _zstandard().ZstdCompressor().compress(data)
+    return data
+
+
+def _open_stream(
+    f: io.BufferedReader, suffix: str, *, single: bool = False
+) -> io.BufferedIOBase:
+    """
+    Wrap a segment file in a decompressing reader.
+
+    :param f: The segment opened in binary mode, positioned where to start.
+    :param suffix: The segment's compression suffix.
+    :param single: Read only one zstd frame (gzip readers continue to the
+        end, which callers reading a single batch stop early anyway).
+    :return: A binary stream of the decompressed JSON lines.
+    """
+    if suffix == ".gz":
+        return gzip.GzipFile(fileobj=f, mode="rb")
+    if suffix == ".zst":
+        reader = (
+            _zstandard()
+            .ZstdDecompressor()
+            .stream_reader(f, read_across_frames=not single)
+        )
+        return io.BufferedReader(reader)
+    return f
+
+
+@dataclass(frozen=True)
+class IndexEntry:
+    """
+    Location of one run's record.
+
+    :param run_id: The run's ID.
+    :param timestamp: Unix time at which the run started.
+    :param segment: File name of the segment holding the record.
+    :param offset: Byte offset of the record's line, or of its compressed
+        batch, in the segment.
+    """
+
+    run_id: str
+    timestamp: float
+    segment: str
+    offset: int
+
+
+class TranscriptIndex:
+    """In-memory index by run ID and timestamp, backed by index.jsonl."""
+
+    def __init__(self, path: Path) -> None:
+        """
+        :param path: The index file, loaded if it exists.
+        """
+        self.path = path
+        self._by_id: dict[str, IndexEntry] = {}
+        self._by_time: list[tuple[float, str]] = []
+        if path.exists():
+            with path.open() as f:
+                for line in f:
+                    try:
+                        self.add(IndexEntry(**json.loads(line)))
+                    except (ValueError, TypeError):
+                        logger.warning("skipping corrupt transcript index line")
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def add(self, entry: IndexEntry) -> None:
+        """Add an entry to the in-memory index."""
+        self._by_id[entry.run_id] = entry
+        bisect.insort(self._by_time, (entry.timestamp, entry.run_id))
+
+    def get(self, run_id: str) -> IndexEntry | None:
+        """Return the location of a run, or None if it is unknown."""
+        return self._by_id.get(run_id)
+
+    def between(
+        self, since: float | None = None, until: float | None = None
+    ) -> list[IndexEntry]:
+        """
+        Return the entries of runs started within a time range, oldest first.
+
+        :param since: Inclusive lower bound in Unix time.
+        :param until: Exclusive upper bound in Unix time.
+        :return: The matching entries.
+        """
+        lo = 0 if since is None else bisect.bisect_left(self._by_time, (since, ""))
+        hi = (
+            len(self._by_time)
+            if until is None
+            else bisect.bisect_left(self._by_time, (until, ""))
+        )
+        return [self._by_id[run_id] for _, run_id in self._by_time[lo:hi]]
+
+
+def _segment_number(path: Path) -> int:
+    """The sequence number of a segment file, or 0 for other files."""
+    match = SEGMENT_PATTERN.match(path.name)
+    return int(match.group(1)) if match else 0
+
+
+def segments(directory: Path) -> list[Path]:
+    """Return a directory's segment files in write order."""
+    found = [path for path in directory.iterdir() if _segment_number(path)]
+    return sorted(found, key=_segment_number)
+
+
+def iter_records(
+    directory: Path, since: float | None = None, until: float | None = None
+) -> Iterator[dict[str, Any]]:
+    """
+    Stream transcript records in write order, one segment at a time.
+
+    :param directory: The store's directory.
+    :param since: Optional inclusive lower bound on the record's timestamp.
+    :param until: Optional exclusive upper bound on the record's timestamp.
+    :return: An iterator over the decoded records.
+    """
+    for path in segments(directory):
+        with path.open("rb") as f, _open_stream(f, path.suffix) as stream:
+            for line in stream:
+                record = json.loads(line)
+                timestamp = record.get("timestamp", 0.0)
+                if since is not None and timestamp < since:
+                    continue
+                if until is not None and timestamp >= until:
+                    continue
+                yield record
+
+
+def read_record(directory: Path, entry: IndexEntry) -> dict[str, Any] | None:
+    """
+    Read one run's record from the batch the index points to.
+
+    :param directory: The store's directory.
+    :param entry: The run's index entry.
+    :return: The record, or None if the batch does not contain the run.
+    """
+    path = directory / entry.segment
+    with path.open("rb") as f:
+        f.seek(entry.offset)
+        with _open_stream(f, path.suffix, single=True) as stream:
+            for line in stream:
+                record = json.loads(line)
+                if record.get("run_id") == entry.run_id:
+                    return record
+    return None
+
+
+class TranscriptStore:
+    """Appends transcript records to rotated segments from a background task."""
+
+    def __init__(
+        self,
+        directory: Path,
+        compression: Compression = "gzip",
+        max_bytes: int = 64 * 1024 * 1024,
+        queue_size: int = 1024,
+        batch_size: int = 64,
+    ) -> None:
+        """
+        :param directory: Where segments and the index are written.
+        :param compression: "none", "gzip" or "zstd".
+        :param max_bytes: Size on disk at which a new segment is started.
+        :param queue_size: Records buffered before new ones are dropped.
+        :param batch_size: Maximum records written per batch.
+        """
+        if compression == "zstd":
+            _zstandard()
+        directory.mkdir(parents=True, exist_ok=True)
+        self.directory = directory
+        self.compression: Compression = compression
+        self.max_bytes = max_bytes
+        self.batch_size = batch_size
+        self.index = TranscriptIndex(directory / INDEX_FILE)
+        self._queue: asyncio.Queue[dict[str, Any] | None] = asyncio.Queue(queue_size)
+        self._task: asyncio.Task[None] | None = None
+        existing = segments(directory)
+        self._segment = existing[-1] if existing else None
+
+    async def start(self) -> None:
+        """Start the background writer."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._drain(), name="transcript-writer")
+
+    async def stop(self) -> None:
+        """Write every queued record, then stop the background writer."""
+        if self._task is None:
+            return
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+
+    def append(self, record: dict[str, Any]) -> bool:
+        """
+        Queue a record for writing without waiting.
+
+        :param record: A JSON-serializable record with "run_id" and
+            "timestamp" keys.
+        :return: False if the queue was full and the record was dropped.
+        :raises ValueError: If the record has no "run_id" or "timestamp".
+        """
+        if "run_id" not in record or "timestamp" not in record:
+            msg = 'transcript records need "run_id" and "timestamp" keys'
+            raise ValueError(msg)
+        try:
+            self._queue.put_nowait(record)
+        except asyncio.QueueFull:
+            TRANSCRIPT_RECORDS.inc(result="dropped")
+            logger.warning("transcript queue full, dropping record")
+            return False
+        return True
+
+    async def get(self, run_id: str) -> dict[str, Any] | None:
+        """
+        Look up one run's record through the index.
+
+        :param run_id: The run's ID.
+        :return: The record, or None if the run is not in the store.
+        """
+        entry = self.index.get(run_id)
+        if entry is None:
+            return None
+        return await asyncio.to_thread(read_record, self.directory, entry)
+
+    async def _drain(self) -> None:
+        """Write queued records in batches until the stop sentinel arrives."""
+        stopping = False
+        while not stopping:
+            record = await self._queue.get()
+            batch: list[dict[str, Any]] = []
+            if record is None:
+                stopping = True
+            else:
+                batch.append(record)
+            while not stopping and len(batch) < self.batch_size:
+                try:
+                    record = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                if record is None:
+                    stopping = True
+                else:
+                    batch.append(record)
+            if not batch:
+                continue
+            try:
+                entries = await asyncio.to_thread(self._write_batch, batch)
+            except (OSError, TypeError, ValueError) as e:
+                TRANSCRIPT_RECORDS.inc(len(batch), result="failed")
+                logger.exception("failed to write transcripts", error=str(e))
+                continue
+            for entry in entries:
+                self.index.add(entry)
+            TRANSCRIPT_RECORDS.inc(len(batch), result="written")
+
+    def _current_segment(self) -> Path:
+        """
+        Return the segment to append to. A new one is started when the last
+        one is full or was written with another compression.
+        """
+        suffix = SUFFIXES[self.compression]
+        segment = self._segment
+        if (
+            segment is None
+            or not segment.name.endswith(f".jsonl{suffix}")
+            or (segment.exists() and segment.stat().st_size >= self.max_bytes)
+        ):
+            number = _segment_number(segment) + 1 if segment else 1
+            segment = self.directory / f"transcripts-{number:06d}.jsonl{suffix}"
+            self._segment = segment
+        return segment
+
+    def _write_batch(self, batch: list[dict[str, Any]]) -> list[IndexEntry]:
+        """Append a batch to the current segment and the index file."""
+        segment = self._current_segment()
+        lines = [
+            json.dumps(record, separators=(",", ":"), default=str).encode() + b"\n"
+            for record in batch
+        ]
+        offset = segment.stat().st_size if segment.exists() else 0
+        with segment.open("ab") as f:
+            f.write(_compress(b"".join(lines), self.compression))
+
+        entries = []
+        line_offset = offset
+        for record, line in zip(batch, lines, strict=True):
+            entries.append(
+                IndexEntry(
+                    run_id=str(record["run_id"]),
+                    timestamp=float(record["timestamp"]),
+                    segment=segment.name,
+                    offset=line_offset,
+                )
+            )
+            if self.compression == "none":
+                line_offset += len(line)
+        with self.index.path.open("a") as f:
+            f.writelines(
+                json.dumps(asdict(entry), separators=(",", ":")) + "\n"
+                for entry in entries
+            )
+        return entries
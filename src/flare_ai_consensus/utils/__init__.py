@@ -1,7 +1,17 @@
 from .file_utils import load_json, load_txt, save_json
 from .parser_utils import extract_author, parse_chat_response
+from .token_utils import (
+    compact_responses,
+    compact_text,
+    estimate_message_tokens,
+    estimate_tokens,
+)
 
 __all__ = [
+    "compact_responses",
+    "compact_text",
+    "estimate_message_tokens",
+    "estimate_tokens",
     "extract_author",
     "load_json",
     "load_txt",
@@ -0,0 +1,174 @@
+"""
+Token estimation and budget-driven compaction of prompt content.
+
+Token counts are estimated without a tokenizer: about four characters per
+token for English text with common BPE vocabularies, plus a fixed overhead per
+chat message. The estimate is meant for budgeting, not billing.
+
+When responses would exceed a prompt budget they are compacted in increasing
+order of loss, stopping as soon as they fit:
+
+    1. dedupe: drop sentences already present in an earlier response
+    2. extract: keep each response's most representative sentences, scored by
+       how common their words are across all responses, in original order
+    3. trim: cut each response to its share of the budget at a word boundary,
+       for budgets too small to hold even truncated sentences
+"""
+
+import math
+import re
+from collections import Counter
+from collections.abc import Mapping, Sequence
+from typing import Final
+
+from flare_ai_consensus.settings import Message
+
+CHARS_PER_TOKEN: Final[int] = 4
+MESSAGE_OVERHEAD_TOKENS: Final[int] = 4
+SENTENCE_PATTERN: Final[re.Pattern[str]] = re.compile(r"(?<=[.!?])\s+|\n+")
+WORD_PATTERN: Final[re.Pattern[str]] = re.compile(r"\w+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens in a text."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def estimate_message_tokens(messages: Sequence[Message]) -> int:
+    """Estimate the prompt tokens of a chat conversation."""
+    return sum(
+        estimate_tokens(m["content"]) + MESSAGE_OVERHEAD_TOKENS for m in messages
+    )
+
+
+def split_sentences(text: str) -> list[str]:
+    """Split a text into sentences and lines, dropping empty pieces."""
+    return [s.strip() for s in SENTENCE_PATTERN.split(text) if s.strip()]
+
+
+def _normalize(sentence: str) -> str:
+    return " ".join(WORD_PATTERN.findall(sentence.lower()))
+
+
+def _total_tokens(responses: Mapping[str, str]) -> int:
+    return sum(estimate_tokens(text) for text in responses.values())
+
+
+def truncate_to_tokens(text: str, budget: int) -> str:
+    """
+    Cut a text to at most budget tokens, at a word boundary where possible.
+
+    :param text: The text to shorten.
+    :param budget: Maximum tokens to keep.
+    :return: The text, or its prefix followed by an ellipsis.
+    """
+    if estimate_tokens(text) <= budget:
+        return text
+    limit = max(budget, 0) * CHARS_PER_TOKEN
+    cut = text[:limit].rsplit(" ", 1)[0] if " " in text[:limit] else text[:limit]
+    return f"{cut.rstrip()} ...".lstrip()
+
+
+def dedupe_sentences(responses: Mapping[str, str]) -> dict[str, str]:
+    """
+    Drop sentences that already appeared in an earlier response.
+
+    :param responses: A dictionary mapping labels to texts.
+    :return: The texts without repeated sentences; a response consisting only
+        of repeats keeps its first sentence.
+    """
+    seen: set[str] = set()
+    deduped: dict[str, str] = {}
+    for label, text in responses.items():
+        sentences = split_sentences(text)
+        kept = []
+        for sentence in sentences:
+            key = _normalize(sentence)
+            if key and key in seen:
+                continue
+            seen.add(key)
+            kept.append(sentence)
+        deduped[label] = " ".join(kept or sentences[:1])
+    return deduped
+
+
+def extract_key_sentences(
+    responses: Mapping[str, str], budget_per_response: int
+) -> dict[str, str]:
+    """
+    Keep the most representative sentences of each response within a budget.
+
+    Sentences are scored by the average document frequency of their words
+    across all responses, so content the ensemble agrees on is kept first.
+
+    :param responses: A dictionary mapping labels to texts.
+    :param budget_per_response: Maximum tokens kept per response.
+    :return: The compressed texts, sentences in their original order; if no
+        whole sentence fits, the top-ranked one truncated to the budget.
+    """
+    sentences = {label: split_sentences(text) for label, text in responses.items()}
+    frequency: Counter[str] = Counter()
+    for text in responses.values():
+        frequency.update(set(WORD_PATTERN.findall(text.lower())))
+
+    def score(sentence: str) -> float:
+        words = WORD_PATTERN.findall(sentence.lower())
+        return sum(frequency[w] for w in words) / len(words) if words else 0.0
+
+    compressed: dict[str, str] = {}
+    for label, parts in sentences.items():
+        ranked = sorted(range(len(parts)), key=lambda i: score(parts[i]), reverse=True)
+        keep: set[int] = set()
+        used = 0
+        for i in ranked:
+            cost = estimate_tokens(parts[i]) + 1
+            if used + cost <= budget_per_response:
+                keep.add(i)
+                used += cost
+        if keep or not ranked:
+            compressed[label] = " ".join(parts[i] for i in sorted(keep))
+        else:
+            best = parts[ranked[0]]
+            compressed[label] = truncate_to_tokens(best, budget_per_response - 1)
+    return compressed
+
+
+def compact_responses(
+    responses: Mapping[str, str], budget: int
+) -> tuple[dict[str, str], str | None]:
+    """
+    Fit responses into a token budget, losing as little content as possible.
+
+    :param responses: A dictionary mapping labels to texts.
+    :param budget: Maximum total tokens for all texts together.
+    :return: The compacted texts and the last method applied ("dedupe",
+        "extract" or "trim"), or None if they already fit.
+    """
+    compacted = dict(responses)
+    if _total_tokens(compacted) <= budget or not compacted:
+        return compacted, None
+
+    compacted = dedupe_sentences(compacted)
+    if _total_tokens(compacted) <= budget:
+        return compacted, "dedupe"
+
+    share = max(budget // len(compacted), 1)
+    extracted = extract_key_sentences(compacted, share)
+    if _total_tokens(extracted) <= budget:
+        return extracted, "extract"
+
+    return {
+        label: truncate_to_tokens(text, share) for label, text in compacted.items()
+    }, "trim"
+
+
+def compact_text(text: str, budget: int) -> tuple[str, str | None]:
+    """
+    Fit a single text into a token budget.
+
+    :param text: The text to compact.
+    :param budget: Maximum tokens.
+    :return: The compacted text and the method applied, or None if it fit.
+    """
+    compacted, method = compact_responses({"text": text}, budget)
+    return compacted["text"], method
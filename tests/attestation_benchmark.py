@@ -0,0 +1,185 @@
+import argparse
+import logging
+import statistics
+import sys
+import time
+from collections.abc import Callable, Sequence
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import structlog
+
+from flare_ai_consensus.attestation import (
+    CertificateCache,
+    ClaimsCache,
+    DocumentCache,
+    Vtpm,
+    VtpmValidation,
+)
+from flare_ai_consensus.attestation.vtpm_validation import (
+    _load_pem_certificate,  # pyright: ignore[reportPrivateUsage]
+    _rsa_key_from_jwk_numbers,  # pyright: ignore[reportPrivateUsage]
+    _sha1_fingerprint,  # pyright: ignore[reportPrivateUsage]
+)
+from flare_ai_consensus.utils import save_json
+from tests.issuer_stub import StubIssuer
+from tests.teeserver_stub import StubTeeServer
+
+logger = structlog.get_logger(__name__)
+
+
+@dataclass
+class BenchmarkResult:
+    operation: str
+    cache: str
+    iterations: int
+    tokens_per_second: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Benchmark vTPM token issuance and validation against local "
+        "stand-ins for the teeserver socket and the token issuer."
+    )
+    parser.add_argument(
+        "--iterations",
+        type=int,
+        default=200,
+        help="Operations measured per scenario.",
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=None,
+        help="Optional path to save the results as JSON.",
+    )
+    return parser.parse_args()
+
+
+def measure(
+    operation: str,
+    cache: str,
+    calls: Sequence[Callable[[], object]],
+    setup: Callable[[], object] | None = None,
+) -> BenchmarkResult:
+    """
+    Time each call and summarize throughput and latency percentiles.
+    `setup` runs untimed before every call.
+    """
+    latencies = []
+    for call in calls:
+        if setup is not None:
+            setup()
+        call_start = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - call_start)
+    elapsed = sum(latencies)
+    percentiles = statistics.quantiles(latencies, n=100, method="inclusive")
+    return BenchmarkResult(
+        operation=operation,
+        cache=cache,
+        iterations=len(calls),
+        tokens_per_second=round(len(calls) / elapsed, 1),
+        p50_ms=round(percentiles[49] * 1000, 3),
+        p95_ms=round(percentiles[94] * 1000, 3),
+        p99_ms=round(percentiles[98] * 1000, 3),
+    )
+
+
+def report(results: Sequence[BenchmarkResult]) -> None:
+    """Write the results as a table to stdout."""
+    header = f"{'operation':<18}{'cache':<7}{'tokens/s':>11}"
+    header += f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}\n"
+    rows = [
+        f"{r.operation:<18}{r.cache:<7}{r.tokens_per_second:>11.1f}"
+        f"{r.p50_ms:>10.3f}{r.p95_ms:>10.3f}{r.p99_ms:>10.3f}\n"
+        for r in results
+    ]
+    sys.stdout.write(header + "".join(rows))
+
+
+def bench_issuance(server: StubTeeServer, iterations: int) -> list[BenchmarkResult]:
+    vtpm = Vtpm(unix_socket_path=server.socket_path)
+    vtpm.get_token(["warmup-nonce"])
+    # Cold: a fresh nonce per call always reaches the teeserver socket.
+    cold = [
+        lambda i=i: vtpm.get_token([f"cold-nonce-{i:06d}"]) for i in range(iterations)
+    ]
+    # Warm: the same nonce is served from the token cache.
+    vtpm.get_token(["warm-nonce-0"])
+    warm = [lambda: vtpm.get_token(["warm-nonce-0"])] * iterations
+    results = [
+        measure("token_issuance", "cold", cold),
+        measure("token_issuance", "warm", warm),
+    ]
+    vtpm.close()
+    return results
+
+
+def clear_parse_caches() -> None:
+    """Empty the module-level key and certificate parsing caches."""
+    _rsa_key_from_jwk_numbers.cache_clear()
+    _load_pem_certificate.cache_clear()
+    _sha1_fingerprint.cache_clear()
+
+
+def new_validator(issuer: StubIssuer) -> VtpmValidation:
+    return VtpmValidation(
+        expected_issuer=issuer.url,
+        root_fingerprint=issuer.root_fingerprint,
+        document_cache=DocumentCache(),
+        claims_cache=ClaimsCache(),
+        certificate_cache=CertificateCache(),
+    )
+
+
+def bench_validation(
+    operation: str, issuer: StubIssuer, tokens: Sequence[str]
+) -> list[BenchmarkResult]:
+    # Cold: every token is validated by a fresh validator with empty caches,
+    # including the module-level parsing caches, so documents are fetched and
+    # keys and certificates parsed and verified each time.
+    cold = [lambda t=t: new_validator(issuer).validate_token(t) for t in tokens]
+
+    # Warm: documents and certificate chains are cached, tokens are distinct.
+    validator = new_validator(issuer)
+    validator.validate_token(tokens[0])
+    warm = [lambda t=t: validator.validate_token(t) for t in tokens[1:]]
+
+    # Hot: the same token again, answered from the claims cache.
+    hot = [lambda: validator.validate_token(tokens[0])] * len(tokens)
+    return [
+        measure(operation, "cold", cold, setup=clear_parse_caches),
+        measure(operation, "warm", warm),
+        measure(operation, "hot", hot),
+    ]
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+    # The attestation modules log every token at info level.
+    structlog.configure(
+        wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING)
+    )
+
+    results = []
+    with StubIssuer() as issuer:
+        with StubTeeServer(
+            token_factory=lambda request: issuer.mint_oidc_token(request["nonces"][0])
+        ) as server:
+            results += bench_issuance(server, args.iterations)
+
+        count = args.iterations + 1
+        oidc_tokens = [
+            issuer.mint_oidc_token(f"oidc-nonce-{i:06d}") for i in range(count)
+        ]
+        pki_tokens = [issuer.mint_pki_token(f"pki-nonce-{i:06d}") for i in range(count)]
+        results += bench_validation("oidc_validation", issuer, oidc_tokens)
+        results += bench_validation("pki_validation", issuer, pki_tokens)
+
+    report(results)
+    if args.output is not None:
+        save_json({"results": [asdict(r) for r in results]}, args.output)
@@ -0,0 +1,86 @@
+import asyncio
+
+import structlog
+
+from flare_ai_consensus.attestation import (
+    BatchAttestation,
+    BatchAttestor,
+    MerkleTree,
+    Vtpm,
+    result_digest,
+)
+from tests.teeserver_stub import StubTeeServer
+
+logger = structlog.get_logger(__name__)
+
+NONCE = "0123456789abcdef"
+
+
+def check_connection_reuse(server: StubTeeServer) -> None:
+    # Sequential token requests should share one kept-alive connection.
+    vtpm = Vtpm(unix_socket_path=server.socket_path, token_cache_size=0)
+    for _ in range(5):
+        vtpm.get_token([NONCE])
+    assert server.connections == 1, server.connections
+
+    # A connection dropped by the server is transparently replaced.
+    server.drop_connections()
+    vtpm.get_token([NONCE])
+    assert server.connections == 2, server.connections  # noqa: PLR2004
+    vtpm.close()
+    logger.info("connection reuse ok", connections=server.connections)
+
+
+def check_merkle_proofs() -> None:
+    # Every leaf of every tree shape up to 33 leaves proves into its root.
+    for size in range(1, 34):
+        digests = [result_digest(f"result {i}") for i in range(size)]
+        tree = MerkleTree(digests)
+        root = tree.root.hex()
+        for i, digest in enumerate(digests):
+            attestation = BatchAttestation(
+                token="", root=root, leaf_index=i, batch_size=size, proof=tree.proof(i)
+            )
+            assert attestation.verify(digest)
+            assert size == 1 or not attestation.verify(digests[i - 1])
+    logger.info("merkle tree shapes ok")
+
+
+async def check_batching(server: StubTeeServer) -> None:
+    vtpm = Vtpm(unix_socket_path=server.socket_path)
+    attestor = BatchAttestor(vtpm, window=0.05, max_batch=64)
+    results = [f"consensus response {i}" for i in range(100)]
+    before = len(server.requests)
+
+    attestations = await asyncio.gather(
+        *(attestor.attest(result_digest(r)) for r in results)
+    )
+
+    # 100 results with max_batch=64 need two tokens instead of 100.
+    token_requests = server.requests[before:]
+    assert len(token_requests) == 2, len(token_requests)  # noqa: PLR2004
+    roots = {a.root for a in attestations}
+    assert roots == {request["nonces"][0] for request in token_requests}
+
+    for result, attestation in zip(results, attestations, strict=True):
+        assert attestation.verify(result_digest(result))
+        assert not attestation.verify(result_digest(result + " tampered"))
+        claims = {"eat_nonce": [attestation.root]}
+        assert attestation.verify(result_digest(result), claims)
+        assert not attestation.verify(result_digest(result), {"eat_nonce": "x"})
+
+    await attestor.flush()
+    vtpm.close()
+    logger.info(
+        "batch attestation ok",
+        results=len(results),
+        token_requests=len(token_requests),
+        connections=server.connections,
+    )
+
+
+if __name__ == "__main__":
+    with StubTeeServer() as server:
+        check_connection_reuse(server)
+        check_merkle_proofs()
+        asyncio.run(check_batching(server))
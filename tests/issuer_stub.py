@@ -0,0 +1,217 @@
+"""
+Stand-in for the Confidential Space token issuer.
+
+Generates an OIDC signing key and a root -> intermediate -> leaf certificate
+chain, serves the OpenID configuration, JWKS and root certificate over local
+HTTP with caching headers, and mints OIDC and PKI tokens that `VtpmValidation`
+accepts when pointed at it.
+"""
+
+import base64
+import datetime as dt
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Self, cast, override
+
+import jwt
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+
+OIDC_KID = "stub-signing-key"
+MAX_AGE = 3600
+
+
+def _b64url_uint(value: int) -> str:
+    data = value.to_bytes((value.bit_length() + 7) // 8, "big")
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _certificate(
+    subject: str,
+    key: rsa.RSAPrivateKey,
+    issuer: str,
+    issuer_key: rsa.RSAPrivateKey,
+    *,
+    ca: bool,
+) -> x509.Certificate:
+    now = dt.datetime.now(dt.UTC)
+    builder = (
+        x509.CertificateBuilder()
+        .subject_name(x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, subject)]))
+        .issuer_name(x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, issuer)]))
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - dt.timedelta(days=1))
+        .not_valid_after(now + dt.timedelta(days=30))
+        .add_extension(x509.BasicConstraints(ca=ca, path_length=None), critical=True)
+    )
+    if ca:
+        builder = builder.add_extension(
+            x509.KeyUsage(
+                digital_signature=False,
+                content_commitment=False,
+                key_encipherment=False,
+                data_encipherment=False,
+                key_agreement=False,
+                key_cert_sign=True,
+                crl_sign=True,
+                encipher_only=False,
+                decipher_only=False,
+            ),
+            critical=True,
+        )
+    return builder.sign(issuer_key, hashes.SHA256())
+
+
+class _IssuerHandler(BaseHTTPRequestHandler):
+    @property
+    def _server(self) -> "StubIssuer":
+        return cast("StubIssuer", self.server)
+
+    def do_GET(self) -> None:
+        document = self._server.documents.get(self.path)
+        if document is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+        body, etag = document
+        self._server.record_request(self.path)
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("Cache-Control", f"max-age={MAX_AGE}")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Cache-Control", f"public, max-age={MAX_AGE}")
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    @override
+    def log_message(self, format: str, *args: object) -> None:
+        """Silence the default per-request stderr logging."""
+
+
+class StubIssuer(ThreadingHTTPServer):
+    """
+    Local HTTP issuer serving well-known documents and minting tokens.
+
+    Usage:
+        with StubIssuer() as issuer:
+            validator = VtpmValidation(
+                expected_issuer=issuer.url,
+                root_fingerprint=issuer.root_fingerprint,
+            )
+            validator.validate_token(issuer.mint_oidc_token())
+    """
+
+    daemon_threads = True
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), _IssuerHandler)
+        self.url = f"http://127.0.0.1:{self.server_address[1]}"
+        self.requests: list[str] = []
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+        self.oidc_key = self._new_key()
+        root_key, intermediate_key, self.leaf_key = (self._new_key() for _ in range(3))
+        root = _certificate("Stub Root", root_key, "Stub Root", root_key, ca=True)
+        intermediate = _certificate(
+            "Stub Intermediate", intermediate_key, "Stub Root", root_key, ca=True
+        )
+        leaf = _certificate(
+            "Stub Leaf", self.leaf_key, "Stub Intermediate", intermediate_key, ca=False
+        )
+        self.x5c = [
+            base64.b64encode(cert.public_bytes(serialization.Encoding.DER)).decode()
+            for cert in (leaf, intermediate, root)
+        ]
+        fingerprint = root.fingerprint(hashes.SHA1())  # noqa: S303
+        self.root_fingerprint = ":".join(format(b, "02x") for b in fingerprint).upper()
+
+        public_numbers = self.oidc_key.public_key().public_numbers()
+        jwks = {
+            "keys": [
+                {
+                    "kty": "RSA",
+                    "alg": "RS256",
+                    "use": "sig",
+                    "kid": OIDC_KID,
+                    "n": _b64url_uint(public_numbers.n),
+                    "e": _b64url_uint(public_numbers.e),
+                }
+            ]
+        }
+        configuration = {"issuer": self.url, "jwks_uri": f"{self.url}/jwks"}
+        self.documents: dict[str, tuple[bytes, str]] = {
+            "/.well-known/openid-configuration": (
+                json.dumps(configuration).encode(),
+                '"config-1"',
+            ),
+            "/jwks": (json.dumps(jwks).encode(), '"jwks-1"'),
+            "/.well-known/confidential_space_root.crt": (
+                root.public_bytes(serialization.Encoding.PEM),
+                '"root-1"',
+            ),
+        }
+
+    @staticmethod
+    def _new_key() -> rsa.RSAPrivateKey:
+        return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+    def record_request(self, path: str) -> None:
+        with self._lock:
+            self.requests.append(path)
+
+    def _claims(self, nonce: str, extra: dict[str, Any]) -> dict[str, Any]:
+        now = int(time.time())
+        return {
+            "iss": self.url,
+            "aud": "https://sts.google.com",
+            "iat": now,
+            "nbf": now,
+            "exp": now + MAX_AGE,
+            "eat_nonce": nonce,
+            **extra,
+        }
+
+    def mint_oidc_token(self, nonce: str = "stub-nonce-0", **claims: Any) -> str:
+        """Sign an OIDC-scheme token with the JWKS key."""
+        return jwt.encode(
+            self._claims(nonce, claims),
+            self.oidc_key,
+            algorithm="RS256",
+            headers={"kid": OIDC_KID},
+        )
+
+    def mint_pki_token(self, nonce: str = "stub-nonce-0", **claims: Any) -> str:
+        """
+        Sign a PKI-scheme token with the leaf key and embed the x5c chain.
+
+        The audience is left out: PKI validation passes no expected audience,
+        so PyJWT would reject any token carrying one.
+        """
+        payload = self._claims(nonce, claims)
+        payload.pop("aud")
+        return jwt.encode(
+            payload,
+            self.leaf_key,
+            algorithm="RS256",
+            headers={"x5c": self.x5c},
+        )
+
+    @override
+    def __enter__(self) -> Self:
+        self._thread.start()
+        return self
+
+    @override
+    def __exit__(self, *args: object) -> None:
+        self.shutdown()
+        self.server_close()
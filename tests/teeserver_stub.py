@@ -0,0 +1,114 @@
+"""
+Stand-in for the Confidential Space teeserver Unix socket.
+
+Answers POST /v1/token over HTTP/1.1 keep-alive, by default with the simulated
+attestation token, and counts connections and token requests, so attestation
+code can be exercised outside a TEE.
+"""
+
+import json
+import socket
+import socketserver
+import tempfile
+import threading
+import time
+from collections.abc import Callable
+from http.server import BaseHTTPRequestHandler
+from pathlib import Path
+from typing import Any, Self, cast, override
+
+from flare_ai_consensus.attestation.vtpm_attestation import SIM_TOKEN
+
+
+class _TokenHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def _server(self) -> "StubTeeServer":
+        return cast("StubTeeServer", self.server)
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length", "0"))
+        request = json.loads(self.rfile.read(length))
+        self._server.record_request(request)
+        time.sleep(self._server.delay)
+        body = self._server.token_factory(request).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    @override
+    def address_string(self) -> str:
+        return "teeserver.sock"
+
+    @override
+    def log_message(self, format: str, *args: object) -> None:
+        """Silence the default per-request stderr logging."""
+
+
+class StubTeeServer(socketserver.ThreadingUnixStreamServer):
+    """
+    Threaded HTTP server on a temporary Unix socket.
+
+    Args:
+        delay: Seconds to wait before answering each token request
+        token_factory: Builds the token for a request body (default: always
+            the simulated token)
+
+    Usage:
+        with StubTeeServer() as server:
+            vtpm = Vtpm(unix_socket_path=server.socket_path)
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        delay: float = 0.0,
+        token_factory: Callable[[dict[str, Any]], str] | None = None,
+    ) -> None:
+        self.delay = delay
+        self.token_factory = token_factory or (lambda _: SIM_TOKEN)
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.socket_path = str(Path(self._tmpdir.name) / "teeserver.sock")
+        super().__init__(self.socket_path, _TokenHandler)
+        self.connections = 0
+        self.requests: list[dict[str, Any]] = []
+        self._sockets: list[socket.socket] = []
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+
+    def record_request(self, request: dict[str, Any]) -> None:
+        with self._lock:
+            self.requests.append(request)
+
+    def drop_connections(self) -> None:
+        """Close all open client connections, as an idle timeout would."""
+        with self._lock:
+            sockets, self._sockets = self._sockets, []
+        for sock in sockets:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                continue
+
+    @override
+    def get_request(self) -> tuple[Any, Any]:
+        request = super().get_request()
+        with self._lock:
+            self.connections += 1
+            self._sockets.append(request[0])
+        return request
+
+    @override
+    def __enter__(self) -> Self:
+        self._thread.start()
+        return self
+
+    @override
+    def __exit__(self, *args: object) -> None:
+        self.shutdown()
+        self.server_close()
+        self._tmpdir.cleanup()
@@ -0,0 +1,50 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import structlog
+
+from flare_ai_consensus.attestation import Vtpm
+from flare_ai_consensus.attestation.vtpm_attestation import SIM_TOKEN
+from tests.teeserver_stub import StubTeeServer
+
+logger = structlog.get_logger(__name__)
+
+NONCE = "0123456789abcdef"
+OTHER_NONCE = "fedcba9876543210"
+
+
+def check_simulated_reuse() -> None:
+    vtpm = Vtpm(simulate=True)
+    for _ in range(10):
+        assert vtpm.get_token([NONCE]) == SIM_TOKEN
+    assert vtpm.token_fetches == 1, vtpm.token_fetches
+    assert vtpm.cache_hits == 9, vtpm.cache_hits  # noqa: PLR2004
+
+    # Different nonces, audience or token type are separate cache entries.
+    vtpm.get_token([OTHER_NONCE])
+    vtpm.get_token([NONCE], audience="https://example.com")
+    vtpm.get_token([NONCE], token_type="PKI")  # noqa: S106
+    assert vtpm.token_fetches == 4, vtpm.token_fetches  # noqa: PLR2004
+
+    # Caching can be switched off.
+    uncached = Vtpm(simulate=True, token_cache_size=0)
+    uncached.get_token([NONCE])
+    uncached.get_token([NONCE])
+    assert uncached.token_fetches == 2, uncached.token_fetches  # noqa: PLR2004
+    logger.info("simulated token reuse ok", fetches=vtpm.token_fetches)
+
+
+def check_shared_inflight_fetch() -> None:
+    # Concurrent callers wait for a single slow token request.
+    with StubTeeServer(delay=0.2) as server:
+        vtpm = Vtpm(unix_socket_path=server.socket_path)
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            tokens = list(pool.map(lambda _: vtpm.get_token([NONCE]), range(8)))
+        assert set(tokens) == {SIM_TOKEN}
+        assert len(server.requests) == 1, len(server.requests)
+        vtpm.close()
+    logger.info("shared in-flight fetch ok", callers=len(tokens))
+
+
+if __name__ == "__main__":
+    check_simulated_reuse()
+    check_shared_inflight_fetch()